@@ -0,0 +1,145 @@
+"""
+Compare the input tokens and the extracted flashcards of original and compressed transcripts.
+
+Without --llm, only the tokens and the words lost by the compression are compared, which needs no API key.
+With --llm, the flashcards are extracted from both transcripts and the English texts missing after the
+compression are listed.
+
+Usage:
+    python -m benchmarks.compression
+    python -m benchmarks.compression lessons/ --target-language German
+    python -m benchmarks.compression lessons/ --llm --model gpt-4o-mini
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import List, Set
+
+from rich import print
+from rich.table import Table
+
+from benchmarks import fixtures
+from benchmarks.output_schema import token_counter
+from ltf import compression, exclusion, local_transcript
+from ltf.known_vocabulary import words
+
+
+def lost_words(transcript: str, compressed: str, target_language: str) -> Set[str]:
+    """Return the words of the transcript missing in the compressed transcript, except fillers and stutters"""
+    removable = set(compression.filler_words(target_language))
+    removable.update(word for phrase in compression.FILLER_PHRASES for word in phrase)
+    removable.update(
+        word.rstrip("-").lower()
+        for word in transcript.split()
+        if compression.STUTTER_PATTERN.match(word)
+    )
+    return words(transcript) - words(compressed) - removable
+
+
+def lessons(paths: List[str], minutes: int) -> List[local_transcript.LocalTranscript]:
+    """Return the transcripts of the paths, or a synthetic lesson of spontaneous speech if no path is given"""
+    if not paths:
+        return [
+            local_transcript.LocalTranscript(
+                Path("synthetic.txt"), "synthetic", fixtures.spoken_transcript(minutes)
+            )
+        ]
+    return [
+        transcript
+        for path in paths
+        for transcript in local_transcript.iter_transcripts(path)
+    ]
+
+
+def english_keys(
+    lesson: local_transcript.LocalTranscript,
+    target_language: str,
+    llm,
+    compress: bool,
+) -> Set[str]:
+    """Extract the flashcards of a lesson and return their normalized English texts"""
+    from ltf import LanguageTransferFlashcards
+
+    flashcard_extraction = LanguageTransferFlashcards(
+        str(lesson.path),
+        target_language=target_language,
+        transcript=lesson,
+        compress=compress,
+    )
+    flashcards = flashcard_extraction._create_flashcards(llm=llm)
+    return {
+        exclusion.normalize_key(flashcard.english)
+        for flashcard in flashcards.flashcards
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "paths", nargs="*", help="local transcript files or directories"
+    )
+    parser.add_argument("--target-language", default="Swahili")
+    parser.add_argument(
+        "--minutes",
+        type=int,
+        default=30,
+        help="length of the synthetic lesson, if no path is given",
+    )
+    parser.add_argument(
+        "--llm", action="store_true", help="also compare the extracted flashcards"
+    )
+    parser.add_argument("--model", default="gpt-4o-mini")
+    args = parser.parse_args(argv)
+
+    llm = None
+    if args.llm:
+        from ltf.llm import create_chat_model
+
+        llm = create_chat_model(args.model, api_key=os.environ.get("OPENAI_API_KEY"))
+
+    count_tokens, tokenizer = token_counter()
+    columns = ["Lesson", "Tokens", "Compressed", "Saved", "Lost words"]
+    if llm is not None:
+        columns += ["Cards", "Compressed cards", "Missing cards"]
+    table = Table(*columns, title=f"Input tokens per lesson ({tokenizer})")
+
+    missing_cards = []
+    for lesson in lessons(args.paths, args.minutes):
+        compressed = compression.compress_transcript(
+            lesson.transcript, target_language=args.target_language
+        ).transcript
+        tokens = count_tokens(lesson.transcript)
+        compressed_tokens = count_tokens(compressed)
+        lost = lost_words(lesson.transcript, compressed, args.target_language)
+        row = [
+            lesson.title,
+            str(tokens),
+            str(compressed_tokens),
+            f"{1 - compressed_tokens / tokens:.0%}",
+            ", ".join(sorted(lost)) or "-",
+        ]
+        if llm is not None:
+            original_keys = english_keys(
+                lesson, args.target_language, llm, compress=False
+            )
+            compressed_keys = english_keys(
+                lesson, args.target_language, llm, compress=True
+            )
+            missing = sorted(original_keys - compressed_keys)
+            missing_cards += [f"{lesson.title}: {key}" for key in missing]
+            row += [
+                str(len(original_keys)),
+                str(len(compressed_keys)),
+                str(len(missing)),
+            ]
+        table.add_row(*row)
+    print(table)
+    for card in missing_cards:
+        print(f"Missing after compression: {card}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,177 @@
+import csv
+import random
+from pathlib import Path
+from typing import List
+
+from ltf.models import Flashcard, FlashcardSet
+from ltf.transcript_pipeline import Segment
+
+# Words per minute of a Language Transfer lesson
+WORDS_PER_MINUTE = 150
+
+ENGLISH_WORDS = (
+    "I want to go eat sleep travel where are you now what is this it was "
+    "we they he she will would can could like need have had do not why how "
+    "when today tomorrow yesterday because so okay um uh right good"
+).split()
+FILLERS = ["um", "uh"]
+SWAHILI_WORDS = (
+    "nataka kwenda kula kulala kusafiri wapi sasa nini hii ilikuwa sisi wao "
+    "yeye atataka angependa unaweza ningeweza penda hitaji kwa sababu leo kesho jana"
+).split()
+
+
+def transcript(minutes: int, seed: int = 0) -> str:
+    """
+    Return a raw transcript in the shape of an auto-generated YouTube transcript
+
+    Args:
+        minutes: Length of the lesson in minutes
+        seed: Seed of the random generator
+
+    Returns:
+        Transcript containing line breaks, non-breaking spaces and [Music] markers
+    """
+    rng = random.Random(seed)
+    words = ENGLISH_WORDS + SWAHILI_WORDS
+    parts = []
+    for index in range(minutes * WORDS_PER_MINUTE):
+        parts.append(rng.choice(words))
+        if index % 12 == 11:
+            parts.append(rng.choice(["\n", "\xa0", "  [Music]  ", "\n\n"]))
+    return " ".join(parts)
+
+
+def spoken_transcript(minutes: int, seed: int = 0) -> str:
+    """
+    Return a cleaned transcript with the fillers, stutters and repetitions of spontaneous speech
+
+    Args:
+        minutes: Length of the lesson in minutes
+        seed: Seed of the random generator
+
+    Returns:
+        Transcript, in which about every fifth word is a filler, a stutter or a repetition
+    """
+    rng = random.Random(seed)
+    content_words = [word for word in ENGLISH_WORDS if word not in FILLERS]
+    content_words += SWAHILI_WORDS
+    parts: List[str] = []
+    while len(parts) < minutes * WORDS_PER_MINUTE:
+        phrase = rng.choices(content_words, k=rng.randint(2, 4))
+        chance = rng.random()
+        if chance < 0.12:
+            parts.append(rng.choice(FILLERS))
+        elif chance < 0.16:
+            parts += ["okay", "so"]
+        elif chance < 0.2:
+            parts.append(f"{phrase[0][0]}-")
+        parts += phrase
+        if rng.random() < 0.12:
+            repeated = rng.randint(1, 2)
+            parts += phrase[-repeated:]
+    return " ".join(parts)
+
+
+def segments(minutes: int, seed: int = 0) -> List[Segment]:
+    """Return raw transcript segments of 13 words, each lasting about 5 seconds"""
+    words = transcript(minutes, seed).split(" ")
+    lines = []
+    for index in range(0, len(words), 13):
+        end = index + 13
+        lines.append(words[index:end])
+    return [
+        Segment(" ".join(line), start=index * 5.2, duration=5.2)
+        for index, line in enumerate(lines)
+    ]
+
+
+def video_titles(count: int, seed: int = 0) -> List[str]:
+    """Return video titles with mixed case, digits and special characters"""
+    rng = random.Random(seed)
+    return [
+        f"Complete Swahili - Track {index:02d} - Language Transfer, The Thinking Method! "
+        f"{rng.choice(['(Part 1)', '| Revision', '#shorts', '★★★', ''])}"
+        for index in range(count)
+    ]
+
+
+def flashcard_set(count: int, seed: int = 0) -> FlashcardSet:
+    """Return a set of flashcards with unique English texts"""
+    rng = random.Random(seed)
+    return FlashcardSet(
+        flashcards=[
+            Flashcard(
+                english=f"{' '.join(rng.choices(ENGLISH_WORDS, k=4))} {index}",
+                target_language=" ".join(rng.choices(SWAHILI_WORDS, k=3)),
+            )
+            for index in range(count)
+        ]
+    )
+
+
+def exclusion_directory(
+    directory: Path, files: int, rows_per_file: int, seed: int = 0
+) -> Path:
+    """
+    Create a directory with exported CSV decks, as used by --exclude
+
+    Args:
+        directory: Directory to create the files in
+        files: Number of CSV files
+        rows_per_file: Number of flashcards per file
+        seed: Seed of the random generator
+
+    Returns:
+        The directory
+    """
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    for file_index in range(files):
+        with open(
+            directory / f"lesson_{file_index:05d}.csv",
+            "w",
+            newline="",
+            encoding="utf-8",
+        ) as file:
+            writer = csv.writer(file)
+            for row in range(rows_per_file):
+                writer.writerow(
+                    [
+                        f"{' '.join(rng.choices(ENGLISH_WORDS, k=3))} {file_index}-{row}",
+                        " ".join(rng.choices(SWAHILI_WORDS, k=3)),
+                    ]
+                )
+    return directory
+
+
+def subtitle_directory(directory: Path, files: int, minutes: int) -> Path:
+    """
+    Create a directory with WebVTT subtitle files of whole lessons, as read by 'ltf csv DIRECTORY'
+
+    Args:
+        directory: Directory to create the files in
+        files: Number of subtitle files
+        minutes: Length of every lesson in minutes
+
+    Returns:
+        The directory
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    for file_index in range(files):
+        with open(
+            directory / f"Track {file_index:03d}.vtt", "w", encoding="utf-8"
+        ) as file:
+            file.write("WEBVTT\n\n")
+            for segment in segments(minutes, seed=file_index):
+                file.write(
+                    f"{_vtt_timestamp(segment.start)} --> {_vtt_timestamp(segment.end)}\n"
+                    f"{segment.text}\n\n"
+                )
+    return directory
+
+
+def _vtt_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
@@ -0,0 +1,79 @@
+"""
+Compare the output tokens of the verbose and the compact structured-output schema for the same flashcards.
+
+The LLM generates the tool call arguments token by token, so the generation time grows with their token count.
+
+Usage:
+    python -m benchmarks.output_schema
+    python -m benchmarks.output_schema --cards 20 50 200
+"""
+
+import argparse
+import json
+import math
+import sys
+from typing import Callable, List, Tuple
+
+from rich import print
+from rich.table import Table
+
+from benchmarks import fixtures
+from ltf.models import CompactFlashcardSet, FlashcardSet
+from ltf.rate_limit import CHARS_PER_TOKEN
+
+
+def token_counter() -> Tuple[Callable[[str], int], str]:
+    """Return a function counting the tokens of a text and its name, the estimate if tiktoken is not available"""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken o200k_base"
+    except Exception:
+        return lambda text: math.ceil(len(text) / CHARS_PER_TOKEN), (
+            f"estimate, {CHARS_PER_TOKEN} characters per token"
+        )
+
+
+def tool_arguments(flashcard_set: FlashcardSet, compact: bool) -> str:
+    """Return the tool call arguments the LLM generates for the flashcards, in JSON without whitespace"""
+    output = (
+        CompactFlashcardSet.from_flashcard_set(flashcard_set)
+        if compact
+        else flashcard_set
+    )
+    return json.dumps(output.dict(), ensure_ascii=False, separators=(",", ":"))
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--cards",
+        type=int,
+        nargs="+",
+        default=[20, 50, 200],
+        help="flashcards per lesson",
+    )
+    args = parser.parse_args(argv)
+
+    count_tokens, tokenizer = token_counter()
+    table = Table(
+        "Flashcards",
+        "Verbose tokens",
+        "Compact tokens",
+        "Saved",
+        title=f"Output tokens per lesson ({tokenizer})",
+    )
+    for cards in args.cards:
+        flashcard_set = fixtures.flashcard_set(cards)
+        verbose = count_tokens(tool_arguments(flashcard_set, compact=False))
+        compact = count_tokens(tool_arguments(flashcard_set, compact=True))
+        table.add_row(
+            str(cards), str(verbose), str(compact), f"{1 - compact / verbose:.0%}"
+        )
+    print(table)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,308 @@
+"""
+Offline micro-benchmarks of the text and CSV hot paths.
+
+Usage:
+    python -m benchmarks.run                    # run all benchmarks and compare with the baseline
+    python -m benchmarks.run --quick            # only the realistic sizes, used in CI
+    python -m benchmarks.run --update-baseline  # store the current timings as new baseline
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple
+from unittest.mock import patch
+
+from rich import print
+from rich.table import Table
+
+from benchmarks import fixtures
+from ltf import compression, exclusion, local_transcript, transcript_pipeline, utils
+from ltf.anki import AnkiPackage
+from ltf.cache import DiskCache
+from ltf.corpus import CorpusStore
+from ltf.youtube_transcript import YoutubeTranscript
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+
+
+class Benchmark(NamedTuple):
+    """A single benchmark. Setup creates the fixtures in a directory and returns the function to time."""
+
+    name: str
+    setup: Callable[[Path], Callable[[], Any]]
+    quick: bool
+
+
+def _clean_text(minutes: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(_: Path) -> Callable[[], Any]:
+        text = fixtures.transcript(minutes)
+        return lambda: YoutubeTranscript._clean_text(text)
+
+    return setup
+
+
+def _clean_segments(minutes: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(_: Path) -> Callable[[], Any]:
+        segments = fixtures.segments(minutes)
+        return lambda: transcript_pipeline.join_segments(
+            transcript_pipeline.clean_segments(segments)
+        )
+
+    return setup
+
+
+def _compress_transcript(minutes: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(_: Path) -> Callable[[], Any]:
+        text = fixtures.spoken_transcript(minutes)
+        return lambda: compression.compress_transcript(text, target_language="German")
+
+    return setup
+
+
+def _read_subtitles(files: int, minutes: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(directory: Path) -> Callable[[], Any]:
+        subtitles = fixtures.subtitle_directory(
+            directory / "subtitles", files=files, minutes=minutes
+        )
+        return lambda: list(local_transcript.iter_transcripts(subtitles))
+
+    return setup
+
+
+def _clean_titles(count: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(_: Path) -> Callable[[], Any]:
+        titles = fixtures.video_titles(count)
+        return lambda: [utils.clean_youtube_video_title(title) for title in titles]
+
+    return setup
+
+
+def _load_exclusions(files: int, warm: bool) -> Callable[[Path], Callable[[], Any]]:
+    def setup(directory: Path) -> Callable[[], Any]:
+        decks = fixtures.exclusion_directory(
+            directory / "decks", files=files, rows_per_file=30
+        )
+        if not warm:
+            return lambda: exclusion.load_english_keys(decks)
+
+        index = DiskCache(directory / "index", max_size_bytes=1024**3)
+        exclusion.load_english_keys(decks, index=index)
+        return lambda: exclusion.load_english_keys(decks, index=index)
+
+    return setup
+
+
+def _find_near_duplicates(files: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(directory: Path) -> Callable[[], Any]:
+        decks = fixtures.exclusion_directory(
+            directory / "decks", files=files, rows_per_file=30
+        )
+        english = [card.english for card in fixtures.flashcard_set(300, 1).flashcards]
+        index = DiskCache(directory / "index", max_size_bytes=1024**3)
+        exclusion.find_near_duplicates(decks, english, threshold=0.8, index=index)
+        return lambda: exclusion.find_near_duplicates(
+            decks, english, threshold=0.8, index=index
+        )
+
+    return setup
+
+
+def _save_csv(cards: int, excluded: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(directory: Path) -> Callable[[], Any]:
+        flashcard_set = fixtures.flashcard_set(cards)
+        # Half of the excluded keys match generated flashcards
+        excluded_keys = {
+            exclusion.normalize_key(flashcard.english)
+            for flashcard in flashcard_set.flashcards[: excluded // 2]
+        } | {f"unknown sentence {index}" for index in range(excluded // 2)}
+        filename = str(directory / "flashcards.csv")
+
+        def save() -> None:
+            with patch.object(
+                utils, "_load_existing_flashcards", return_value=excluded_keys
+            ), patch.object(utils, "_show_file_location"):
+                utils.save_flashcards_as_csv(
+                    flashcard_set, filename, delimiter=",", exclude="decks"
+                )
+
+        return save
+
+    return setup
+
+
+def _write_apkg(cards: int, lessons: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(directory: Path) -> Callable[[], Any]:
+        flashcard_set = fixtures.flashcard_set(cards)
+
+        def write() -> None:
+            package = AnkiPackage(namespace="Swahili")
+            for index, flashcard in enumerate(flashcard_set.flashcards):
+                deck_name = f"Swahili::Track {index * lessons // cards:02d}"
+                package.add(deck_name, flashcard.english, flashcard.target_language)
+            package.write(directory / "course.apkg")
+
+        return write
+
+    return setup
+
+
+def _search_corpus(cards: int, lessons: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(directory: Path) -> Callable[[], Any]:
+        flashcards = fixtures.flashcard_set(cards).flashcards
+        store = CorpusStore(directory / "corpus.sqlite3")
+        per_lesson = cards // lessons
+        for lesson in range(lessons):
+            start = lesson * per_lesson
+            end = start + per_lesson
+            store.add_lesson(
+                f"VIDEO_{lesson}",
+                f"Swahili Track {lesson:02d}",
+                "Swahili",
+                (
+                    (card.english, card.target_language)
+                    for card in flashcards[start:end]
+                ),
+            )
+        # Whole sentences, as the words of the fixtures are far more frequent than in real lessons
+        queries = [card.english for card in flashcards[::1000]]
+        return lambda: [store.search(query) for query in queries]
+
+    return setup
+
+
+BENCHMARKS = [
+    Benchmark("clean_text[3h]", _clean_text(minutes=180), quick=True),
+    Benchmark("clean_text[30h]", _clean_text(minutes=1800), quick=False),
+    Benchmark("clean_segments[3h]", _clean_segments(minutes=180), quick=True),
+    Benchmark("clean_segments[30h]", _clean_segments(minutes=1800), quick=False),
+    Benchmark("compress_transcript[3h]", _compress_transcript(minutes=180), quick=True),
+    Benchmark("read_subtitles[20 files, 30min]", _read_subtitles(20, 30), quick=True),
+    Benchmark("clean_youtube_video_title[10k]", _clean_titles(10_000), quick=True),
+    Benchmark("load_exclusions_cold[1k files]", _load_exclusions(1_000, False), True),
+    Benchmark(
+        "load_exclusions_cold[10k files]", _load_exclusions(10_000, False), False
+    ),
+    Benchmark("load_exclusions_warm[10k files]", _load_exclusions(10_000, True), False),
+    Benchmark(
+        "find_near_duplicates_warm[1k files]", _find_near_duplicates(1_000), True
+    ),
+    Benchmark(
+        "find_near_duplicates_warm[10k files]", _find_near_duplicates(10_000), False
+    ),
+    Benchmark("write_apkg[10k cards]", _write_apkg(10_000, lessons=100), quick=True),
+    Benchmark("search_corpus[100k cards]", _search_corpus(100_000, 400), quick=True),
+    Benchmark("save_flashcards_as_csv[10k cards]", _save_csv(10_000, 50_000), True),
+    Benchmark("save_flashcards_as_csv[100k cards]", _save_csv(100_000, 500_000), False),
+]
+
+
+def measure(function: Callable[[], Any], repeat: int) -> float:
+    """Return the fastest of several runs in seconds, which is the least affected by noise"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(benchmarks: List[Benchmark], repeat: int) -> Dict[str, float]:
+    """
+    Run the benchmarks, each with fresh fixtures in a temporary directory
+
+    Args:
+        benchmarks: Benchmarks to run
+        repeat: Number of runs per benchmark
+
+    Returns:
+        Mapping of benchmark name to its fastest run in seconds
+    """
+    results = {}
+    for benchmark in benchmarks:
+        with tempfile.TemporaryDirectory() as directory:
+            function = benchmark.setup(Path(directory))
+            results[benchmark.name] = measure(function, repeat)
+    return results
+
+
+def regressions(
+    results: Dict[str, float], baseline: Dict[str, float], tolerance: float
+) -> List[str]:
+    """
+    Return the names of all benchmarks, which are slower than the baseline times the tolerance
+
+    Args:
+        results: Timings of the current run
+        baseline: Timings of the baseline
+        tolerance: Allowed slowdown factor, e.g. 2 allows twice the baseline time
+
+    Returns:
+        Names of the regressed benchmarks
+    """
+    return [
+        name
+        for name, seconds in results.items()
+        if name in baseline and seconds > baseline[name] * tolerance
+    ]
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="only realistic sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark")
+    parser.add_argument(
+        "--tolerance", type=float, default=2.0, help="allowed slowdown factor"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    selected = [
+        benchmark for benchmark in BENCHMARKS if benchmark.quick or not args.quick
+    ]
+    results = run(selected, repeat=args.repeat)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    regressed = regressions(results, baseline, args.tolerance)
+
+    table = Table(
+        "Benchmark", "Time [ms]", "Baseline [ms]", "Ratio", title="Benchmarks"
+    )
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        table.add_row(
+            f"[red bold]{name}[/red bold]" if name in regressed else name,
+            f"{seconds * 1000:.1f}",
+            f"{reference * 1000:.1f}" if reference else "-",
+            f"{seconds / reference:.2f}" if reference else "-",
+        )
+    print(table)
+
+    if args.update_baseline:
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    name: round(seconds, 6)
+                    for name, seconds in {**baseline, **results}.items()
+                },
+                indent=2,
+                sort_keys=True,
+            )
+            + "\n"
+        )
+        print(f'Baseline updated: "{args.baseline}"')
+        return 0
+
+    if regressed:
+        print(
+            f"[red bold]{len(regressed)} benchmark(s) regressed by more than {args.tolerance}x[/red bold]"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
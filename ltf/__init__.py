@@ -1,2 +1,11 @@
-from .youtube_transcript import YoutubeTranscript
-from .language_transfer_flashcards import LanguageTransferFlashcards
+def __getattr__(name: str):
+    """Import the main classes lazily, so the CLI does not load langchain for every command."""
+    if name == "YoutubeTranscript":
+        from .youtube_transcript import YoutubeTranscript
+
+        return YoutubeTranscript
+    if name == "LanguageTransferFlashcards":
+        from .language_transfer_flashcards import LanguageTransferFlashcards
+
+        return LanguageTransferFlashcards
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
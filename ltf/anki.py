@@ -0,0 +1,400 @@
+"""
+Export flashcards as Anki package (.apkg), which can be opened in Anki directly.
+
+A package is a zip archive containing an SQLite database in the (legacy) Anki collection schema and a media file.
+Notes get GUIDs derived from their English text, so importing a regenerated package updates the existing notes
+instead of adding duplicates.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from ltf.exclusion import normalize_key
+from ltf.streaming import FlashcardWriter
+
+# Stable ID of the note type, Anki only updates notes of the same note type on import
+MODEL_ID = 1723464214
+MODEL_NAME = "Language Transfer Flashcards"
+FIELD_SEPARATOR = "\x1f"
+BASE91_CHARACTERS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!#$%&()*+,-./:;<=>?@[]^_`{|}~"
+
+SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn on notes (usn);
+CREATE INDEX ix_cards_usn on cards (usn);
+CREATE INDEX ix_revlog_usn on revlog (usn);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_cards_sched on cards (did, queue, due);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+CREATE INDEX ix_notes_csum on notes (csum);
+"""
+
+
+def _digest(*parts: str) -> bytes:
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).digest()
+
+
+def _stable_id(*parts: str) -> int:
+    """Return a positive ID below 2^53 (the largest integer Anki can handle in JSON), derived from the parts"""
+    return int.from_bytes(_digest(*parts)[:7], "big") >> 3
+
+
+def note_guid(namespace: str, english: str) -> str:
+    """
+    Return the GUID of a note, which stays the same as long as the English text does
+
+    Args:
+        namespace: Separates notes with the same English text, e.g. the target language
+        english: The English word, phrase or sentence
+
+    Returns:
+        Base91 encoded GUID, like the ones created by Anki
+    """
+    value = int.from_bytes(_digest(namespace, normalize_key(english))[:8], "big")
+    characters = []
+    while value:
+        value, remainder = divmod(value, len(BASE91_CHARACTERS))
+        characters.append(BASE91_CHARACTERS[remainder])
+    return "".join(reversed(characters)) or BASE91_CHARACTERS[0]
+
+
+def _checksum(text: str) -> int:
+    """Return the checksum of the sort field, Anki uses it to detect duplicates"""
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+class AnkiPackage:
+    """
+    Collect flashcards in one or more decks and write them as a single Anki package.
+
+    Flashcards can be added from several threads at the same time, e.g. one deck per lesson of a course.
+    """
+
+    def __init__(self, namespace: str):
+        """
+        Initialize the AnkiPackage class
+
+        Args:
+            namespace: Separates notes with the same English text in the GUIDs, e.g. the target language
+        """
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._decks: Dict[str, int] = {}
+        # Notes as (GUID, deck ID, English, target language) in the order they were added
+        self._notes: List[Tuple[str, int, str, str]] = []
+
+    def add(self, deck_name: str, english: str, target_language: str) -> None:
+        """
+        Add a flashcard to a deck. Use "::" in the deck name to create subdecks, e.g. "Swahili::Track 01"
+
+        Args:
+            deck_name: Name of the deck
+            english: The English word, phrase or sentence
+            target_language: The translation in the target language
+        """
+        guid = note_guid(self.namespace, english)
+        with self._lock:
+            deck_id = self._decks.setdefault(deck_name, _stable_id("deck", deck_name))
+            self._notes.append((guid, deck_id, english, target_language))
+
+    def write(
+        self, path: Union[Path, str], deck_order: Optional[List[str]] = None
+    ) -> None:
+        """
+        Write all decks and flashcards as Anki package
+
+        Args:
+            path: Path of the .apkg file to create
+            deck_order: Names of the decks in the order their new cards should be studied, e.g. in lesson order.
+                Decks not listed follow in the order they were created. The cards of a deck stay in the order
+                they were added. Of several notes with the same GUID, only the first in this order is written
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, "collection.anki2")
+            self._write_collection(database, deck_order or [])
+            with zipfile.ZipFile(
+                path, "w", compression=zipfile.ZIP_DEFLATED
+            ) as package:
+                package.write(database, "collection.anki2")
+                package.writestr("media", "{}")
+
+    def _write_collection(self, database: str, deck_order: List[str]) -> None:
+        now = int(time.time())
+        with self._lock:
+            decks = dict(self._decks)
+            notes = list(self._notes)
+
+        rank = {
+            decks[name]: index
+            for index, name in enumerate(dict.fromkeys(deck_order + list(decks)))
+            if name in decks
+        }
+        # Stable sort, keeps the order of the cards within a deck
+        notes.sort(key=lambda note: rank[note[1]])
+        unique_notes = {}
+        for guid, deck_id, english, target_language in notes:
+            unique_notes.setdefault(guid, (deck_id, english, target_language))
+
+        note_rows = []
+        card_rows = []
+        for position, (guid, (deck_id, english, target_language)) in enumerate(
+            unique_notes.items()
+        ):
+            note_id = _stable_id("note", guid)
+            fields = FIELD_SEPARATOR.join([english, target_language])
+            note_rows.append(
+                (note_id, guid, MODEL_ID, now, fields, english, _checksum(english))
+            )
+            # New cards are due in the order of the decks and within a deck in the order they were added
+            card_rows.append(
+                (_stable_id("card", guid), note_id, deck_id, now, position)
+            )
+
+        # Transactions are controlled explicitly: the schema and all rows are written in a single transaction
+        connection = sqlite3.connect(database, isolation_level=None)
+        try:
+            connection.executescript("BEGIN;" + SCHEMA)
+            connection.execute(
+                "INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+                (
+                    now,
+                    now * 1000,
+                    now * 1000,
+                    json.dumps(_collection_config()),
+                    json.dumps(_models(now)),
+                    json.dumps(_decks(decks, now)),
+                    json.dumps(_deck_configs()),
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO notes VALUES (?, ?, ?, ?, -1, '', ?, ?, ?, 0, '')",
+                note_rows,
+            )
+            connection.executemany(
+                "INSERT INTO cards VALUES (?, ?, ?, 0, ?, -1, 0, 0, ?, 0, 0, 0, 0, 0, 0, 0, 0, '')",
+                card_rows,
+            )
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+
+class AnkiDeckWriter(FlashcardWriter):
+    """
+    Add flashcards one by one to a deck of an Anki package, skipping flashcards that should be excluded.
+    """
+
+    def __init__(
+        self,
+        package: AnkiPackage,
+        deck_name: str,
+        excluded_keys: Optional[Set[str]] = None,
+        near_duplicates: Optional[Dict[str, Tuple[str, float]]] = None,
+    ):
+        """
+        Initialize the AnkiDeckWriter class
+
+        Args:
+            package: The package to add the flashcards to. It is not written by the writer
+            deck_name: Name of the deck, use "::" to create subdecks
+            excluded_keys: Normalized English texts of flashcards that should not be written
+            near_duplicates: Most similar existing flashcard and its similarity per normalized English text.
+                Flashcards contained are not written
+        """
+        super().__init__(
+            deck_name, excluded_keys=excluded_keys, near_duplicates=near_duplicates
+        )
+        self.package = package
+        self.deck_name = deck_name
+
+    def __enter__(self) -> "AnkiDeckWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def write(self, english: str, target_language: str) -> bool:
+        """
+        Add a single flashcard to the deck, unless it is excluded
+
+        Args:
+            english: The English word, phrase or sentence
+            target_language: The translation in the target language
+
+        Returns:
+            True if the flashcard was added, False if it was excluded
+        """
+        if self._is_excluded(english):
+            return False
+        self.package.add(self.deck_name, english, target_language)
+        self.written += 1
+        return True
+
+    def write_all(self, flashcards: Iterable[Any]) -> None:
+        """
+        Add all flashcards to the deck, skipping excluded ones
+
+        Args:
+            flashcards: Objects with the attributes "english" and "target_language"
+        """
+        for flashcard in flashcards:
+            self.write(flashcard.english, flashcard.target_language)
+
+
+def _collection_config() -> dict:
+    return {
+        "activeDecks": [1],
+        "curDeck": 1,
+        "newSpread": 0,
+        "collapseTime": 1200,
+        "timeLim": 0,
+        "estTimes": True,
+        "dueCounts": True,
+        "curModel": str(MODEL_ID),
+        "nextPos": 1,
+        "sortType": "noteFld",
+        "sortBackwards": False,
+        "addToCur": True,
+    }
+
+
+def _models(now: int) -> dict:
+    return {
+        str(MODEL_ID): {
+            "id": MODEL_ID,
+            "name": MODEL_NAME,
+            "type": 0,
+            "mod": now,
+            "usn": -1,
+            "sortf": 0,
+            "did": 1,
+            "tmpls": [
+                {
+                    "name": "English -> Target language",
+                    "ord": 0,
+                    "qfmt": "{{English}}",
+                    "afmt": '{{FrontSide}}<hr id="answer">{{Target language}}',
+                    "did": None,
+                    "bqfmt": "",
+                    "bafmt": "",
+                }
+            ],
+            "flds": [
+                {
+                    "name": name,
+                    "ord": index,
+                    "sticky": False,
+                    "rtl": False,
+                    "font": "Arial",
+                    "size": 20,
+                    "media": [],
+                }
+                for index, name in enumerate(["English", "Target language"])
+            ],
+            "css": ".card { font-family: arial; font-size: 20px; text-align: center; }",
+            "latexPre": "\\documentclass[12pt]{article}\n\\begin{document}\n",
+            "latexPost": "\\end{document}",
+            "latexsvg": False,
+            "req": [[0, "any", [0]]],
+            "tags": [],
+            "vers": [],
+        }
+    }
+
+
+def _deck(deck_id: int, name: str, now: int) -> dict:
+    return {
+        "id": deck_id,
+        "name": name,
+        "desc": "",
+        "mod": now,
+        "usn": -1,
+        "collapsed": False,
+        "browserCollapsed": False,
+        "newToday": [0, 0],
+        "revToday": [0, 0],
+        "lrnToday": [0, 0],
+        "timeToday": [0, 0],
+        "dyn": 0,
+        "conf": 1,
+        "extendNew": 10,
+        "extendRev": 50,
+    }
+
+
+def _decks(decks: Dict[str, int], now: int) -> dict:
+    result = {"1": _deck(1, "Default", now)}
+    for name, deck_id in decks.items():
+        result[str(deck_id)] = _deck(deck_id, name, now)
+    return result
+
+
+def _deck_configs() -> dict:
+    return {
+        "1": {
+            "id": 1,
+            "name": "Default",
+            "mod": 0,
+            "usn": 0,
+            "maxTaken": 60,
+            "autoplay": True,
+            "timer": 0,
+            "replayq": True,
+            "dyn": False,
+            "new": {
+                "delays": [1, 10],
+                "ints": [1, 4, 7],
+                "initialFactor": 2500,
+                "order": 1,
+                "perDay": 20,
+                "bury": True,
+                "separate": True,
+            },
+            "rev": {
+                "perDay": 200,
+                "ease4": 1.3,
+                "fuzz": 0.05,
+                "ivlFct": 1,
+                "maxIvl": 36500,
+                "minSpace": 1,
+                "bury": True,
+            },
+            "lapse": {
+                "delays": [10],
+                "mult": 0,
+                "minInt": 1,
+                "leechFails": 8,
+                "leechAction": 0,
+            },
+        }
+    }
@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import typer
+from rich import print
+from rich.progress import Progress
+from rich.table import Table
+
+
+@dataclass
+class LessonResult:
+    """Outcome of processing a single lesson in a batch run."""
+
+    url: str
+    filename: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def resolve_urls(source: str) -> List[str]:
+    """
+    Resolve the batch source to a list of YouTube video URLs.
+
+    Args:
+        source: Either a YouTube playlist URL or the path to a text file with one video URL per line.
+            Empty lines and lines starting with "#" are ignored.
+
+    Returns:
+        List of YouTube video URLs in lesson order, without duplicates.
+
+    Raises:
+        ValueError: If the source is neither an existing file nor a playlist URL.
+    """
+    source_path = Path(source)
+    if source_path.is_file():
+        with open(source_path, "r", encoding="utf-8") as file:
+            urls = [
+                line.strip()
+                for line in file
+                if line.strip() and not line.strip().startswith("#")
+            ]
+    elif "list=" in source:
+        from pytube import Playlist
+
+        urls = list(Playlist(source).video_urls)
+    else:
+        raise ValueError(
+            f'"{source}" is neither a file containing YouTube URLs nor a YouTube playlist URL '
+            'in the form of "https://www.youtube.com/playlist?list=PLAYLIST_ID".'
+        )
+
+    # Keep lesson order, drop duplicates
+    return list(dict.fromkeys(urls))
+
+
+def run_batch(
+    urls: List[str],
+    process_lesson: Callable[[str], str],
+    concurrency: int = 4,
+    description: str = "Creating flashcards...",
+) -> List[LessonResult]:
+    """
+    Process lessons concurrently and collect the result of every lesson.
+
+    A failing lesson does not abort the run, its error is recorded in the result instead. Fatal errors, which
+    fail every lesson, e.g. an invalid API key, stop the run.
+
+    Args:
+        urls: YouTube video URLs to process
+        process_lesson: Function processing a single URL, returns the name of the created file
+        concurrency: Maximum number of lessons processed at the same time
+        description: Description shown next to the progress bar
+
+    Returns:
+        One result per URL, in the same order as the URLs
+
+    Raises:
+        typer.Abort: If a lesson failed with a fatal error, the lessons not yet started are cancelled
+        typer.Exit: If a lesson exited the program, the lessons not yet started are cancelled
+    """
+    results = {}
+    with Progress() as progress:
+        task = progress.add_task(description, total=len(urls))
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = {executor.submit(process_lesson, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    results[url] = LessonResult(url=url, filename=future.result())
+                except (typer.Abort, typer.Exit):
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                except Exception as error:
+                    results[url] = LessonResult(
+                        url=url, error=str(error) or type(error).__name__
+                    )
+                progress.advance(task)
+
+    return [results[url] for url in urls]
+
+
+def print_summary(results: List[LessonResult]) -> None:
+    """
+    Print a summary of a batch run, listing all failed lessons.
+
+    Args:
+        results: Results of the batch run
+    """
+    failed = [result for result in results if not result.ok]
+    print(
+        f"\n[green bold]{len(results) - len(failed)}[/green bold] of {len(results)} lessons processed successfully."
+    )
+    if not failed:
+        return
+
+    table = Table("URL", "Error", title="Failed lessons")
+    for result in failed:
+        table.add_row(result.url, result.error)
+    print(table)
@@ -0,0 +1,182 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ltf import config
+from ltf.config import CACHE_DIR
+
+
+class DiskCache:
+    """
+    Small persistent key-value store for JSON serializable dictionaries.
+
+    Every entry is stored as a gzip compressed JSON file. The modification time of a file
+    is updated on every read, which is used to evict the least recently used entries once
+    the size cap is exceeded. Entries older than the optional TTL are treated as missing.
+    """
+
+    SUFFIX = ".json.gz"
+
+    def __init__(
+        self,
+        directory: Path,
+        max_size_bytes: int,
+        ttl_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize the DiskCache class
+
+        Args:
+            directory: Directory in which the cache entries are stored
+            max_size_bytes: Maximum size of all entries together, before the least recently used ones are evicted
+            ttl_seconds: Time to live of an entry in seconds. If None, entries never expire
+        """
+        self.directory = Path(directory)
+        self.max_size_bytes = max_size_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached value for the key and count the lookup as hit or miss
+
+        Args:
+            key: Cache key, must be usable as a filename
+
+        Returns:
+            The cached value or None if the key is not cached or has expired
+        """
+        value = self._read(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, EOFError, ValueError):
+            return None
+
+        if (
+            self.ttl_seconds is not None
+            and time.time() - entry.get("created_at", 0) > self.ttl_seconds
+        ):
+            path.unlink(missing_ok=True)
+            return None
+
+        # Mark entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store the value under the key and evict old entries if the size cap is exceeded
+
+        Args:
+            key: Cache key, must be usable as a filename
+            value: JSON serializable dictionary to store
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so concurrent readers never see partial entries
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as raw_file:
+                with gzip.open(raw_file, "wt", encoding="utf-8") as file:
+                    json.dump({"created_at": time.time(), "value": value}, file)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self._evict()
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries until the cache fits into the size cap."""
+        entries = []
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+    def clear(self) -> None:
+        """Delete all entries of the cache."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _configured_cache(name: str) -> DiskCache:
+    """Return the cache stored in the given subdirectory, configured by the .env file"""
+    return DiskCache(
+        CACHE_DIR / name,
+        max_size_bytes=config.settings.CACHE_MAX_SIZE_MB * 1024 * 1024,
+        ttl_seconds=(
+            config.settings.CACHE_TTL_DAYS * 24 * 60 * 60
+            if config.settings.CACHE_TTL_DAYS is not None
+            else None
+        ),
+    )
+
+
+def transcript_cache() -> DiskCache:
+    """Return the cache for YouTube transcripts"""
+    return _configured_cache("transcripts")
+
+
+def flashcard_cache() -> DiskCache:
+    """Return the cache for flashcards created by the LLM"""
+    return _configured_cache("flashcards")
+
+
+def exclusion_index() -> DiskCache:
+    """Return the index of English texts per CSV file in the exclusion directories"""
+    return _configured_cache("exclusion")
+
+
+def flashcard_cache_key(prompt: str, model_name: str, temperature: float) -> str:
+    """
+    Return the key of a LLM result, based on everything that influences the result
+
+    Args:
+        prompt: The rendered prompt sent to the LLM
+        model_name: Name of the LLM
+        temperature: Sampling temperature of the LLM
+
+    Returns:
+        SHA-256 hash of the inputs
+    """
+    return hashlib.sha256(
+        json.dumps([prompt, model_name, temperature]).encode("utf-8")
+    ).hexdigest()
+
+
+def clear_cache() -> None:
+    """Delete all cached data stored by ltf."""
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
@@ -0,0 +1,50 @@
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from ltf.metrics import Metrics
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Record the input, cached input and output tokens of every LLM call in the metrics."""
+
+    def __init__(self, metrics: Metrics):
+        """
+        Initialize the TokenUsageHandler class
+
+        Args:
+            metrics: Metrics in which the token counts are recorded
+        """
+        self.metrics = metrics
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        token_usage = (response.llm_output or {}).get("token_usage")
+        if token_usage:
+            self.metrics.increment("input_tokens", token_usage.get("prompt_tokens", 0))
+            self.metrics.increment(
+                "output_tokens", token_usage.get("completion_tokens", 0)
+            )
+            # Input tokens of the prompt prefix, which the provider reused from an earlier request
+            prompt_tokens_details = token_usage.get("prompt_tokens_details") or {}
+            self.metrics.increment(
+                "cached_input_tokens", prompt_tokens_details.get("cached_tokens") or 0
+            )
+            return
+
+        # Streamed responses report the usage on the message instead
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if usage:
+                    self.metrics.increment("input_tokens", usage.get("input_tokens", 0))
+                    self.metrics.increment(
+                        "output_tokens", usage.get("output_tokens", 0)
+                    )
+                    input_token_details = usage.get("input_token_details") or {}
+                    self.metrics.increment(
+                        "cached_input_tokens",
+                        input_token_details.get("cache_read") or 0,
+                    )
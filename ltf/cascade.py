@@ -0,0 +1,77 @@
+"""
+Fast local checks of the flashcards created by a cheap model, deciding whether a stronger model is needed.
+
+In cascade mode, every lesson or chunk is sent to the cheap model first. Only if its flashcards fail one of the
+checks, the same transcript is sent to the stronger model, whose flashcards are used instead.
+"""
+
+from typing import FrozenSet, List
+
+from ltf.known_vocabulary import words
+from ltf.models import FlashcardSet
+
+# A Language Transfer lesson introduces a new word or sentence every few sentences. Transcripts shorter than 1000
+# words need a single flashcard
+MIN_FLASHCARDS_PER_1000_WORDS = 5
+# Minimum share of the flashcards, whose target language text is found in the transcript. Auto-generated
+# transcripts misspell some target language words, so not all of them are found
+MIN_GROUNDED_SHARE = 0.7
+# Minimum share of the words of a target language text, which have to occur in the transcript
+MIN_WORD_COVERAGE = 0.5
+
+
+def is_grounded(target_language: str, transcript_words: FrozenSet[str]) -> bool:
+    """Return whether the target language text of a flashcard is taught in the transcript"""
+    text_words = words(target_language)
+    if not text_words:
+        return False
+    return len(text_words & transcript_words) / len(text_words) >= MIN_WORD_COVERAGE
+
+
+def check_flashcards(
+    flashcard_set: FlashcardSet, transcript: str, known_vocabulary: bool = False
+) -> List[str]:
+    """
+    Check the flashcards created from a transcript, without calling an LLM
+
+    Args:
+        flashcard_set: The flashcards created by the LLM
+        transcript: The transcript or the part of it, from which the flashcards were created
+        known_vocabulary: Whether already known texts were listed in the prompt. The LLM skips them, so the
+            number of flashcards is not checked
+
+    Returns:
+        The reasons why the flashcards should be created again by a stronger model, an empty list if they pass
+    """
+    flashcards = flashcard_set.flashcards
+    failures = []
+
+    min_flashcards = max(
+        len(transcript.split()) // 1000 * MIN_FLASHCARDS_PER_1000_WORDS, 1
+    )
+    if not known_vocabulary and len(flashcards) < min_flashcards:
+        failures.append(
+            f"only {len(flashcards)} flashcards, at least {min_flashcards} expected"
+        )
+
+    invalid = [
+        flashcard
+        for flashcard in flashcards
+        if not flashcard.english.strip()
+        or not flashcard.target_language.strip()
+        or flashcard.english.strip().lower()
+        == flashcard.target_language.strip().lower()
+    ]
+    if invalid:
+        failures.append(f"{len(invalid)} flashcards without a translation")
+
+    transcript_words = words(transcript)
+    grounded = sum(
+        is_grounded(flashcard.target_language, transcript_words)
+        for flashcard in flashcards
+    )
+    if flashcards and grounded / len(flashcards) < MIN_GROUNDED_SHARE:
+        failures.append(
+            f"only {grounded} of {len(flashcards)} target language texts found in the transcript"
+        )
+    return failures
@@ -0,0 +1,54 @@
+from typing import Iterable, List
+
+from ltf.exclusion import normalize_key
+from ltf.models import FlashcardSet
+
+
+def split_transcript(transcript: str, chunk_size: int, overlap: int) -> List[str]:
+    """
+    Split the transcript into overlapping windows of words.
+
+    The overlap makes sure that examples at the border of two windows are fully contained in at least one of them.
+
+    Args:
+        transcript: The cleaned transcript
+        chunk_size: Number of words per window
+        overlap: Number of words shared by two consecutive windows
+
+    Returns:
+        The windows in lesson order
+
+    Raises:
+        ValueError: If the chunk size is not positive or the overlap is not smaller than the chunk size
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be a positive number of words.")
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("Chunk overlap must be smaller than the chunk size.")
+
+    words = transcript.split()
+    step = chunk_size - overlap
+    chunks = []
+    for start in range(0, max(len(words) - overlap, 1), step):
+        end = start + chunk_size
+        chunks.append(" ".join(words[start:end]))
+    return chunks
+
+
+def merge_flashcard_sets(flashcard_sets: Iterable[FlashcardSet]) -> FlashcardSet:
+    """
+    Merge the flashcards of all windows into a single set, keeping the first occurrence of every English text.
+
+    English texts are compared by exclusion.normalize_key, the same as by the exclusion and the writers.
+
+    Args:
+        flashcard_sets: Flashcards per window, in lesson order
+
+    Returns:
+        A set of flashcards without duplicates, in lesson order
+    """
+    merged = {}
+    for flashcard_set in flashcard_sets:
+        for flashcard in flashcard_set.flashcards:
+            merged.setdefault(normalize_key(flashcard.english), flashcard)
+    return FlashcardSet(flashcards=list(merged.values()))
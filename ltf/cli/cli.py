@@ -1,13 +1,29 @@
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+
 import typer
 from rich import print
 
-from ltf import LanguageTransferFlashcards
-from ltf import utils
+from ltf import batch, cache, local_transcript, sync, utils
+from ltf.anki import AnkiPackage
 from ltf.cli import validate
-from ltf.config import ENV_DIR
-from ltf.models import AvailableTargetLanguages
+from ltf.config import CACHE_DIR, ENV_DIR
+from ltf.languages import AvailableTargetLanguages
+from ltf.llm import Backend
+from ltf.metrics import metrics
+from ltf.streaming import OutputFormat
+
+if TYPE_CHECKING:
+    from ltf import LanguageTransferFlashcards
+
+# Words shared by two consecutive chunks, if --chunk-overlap is not given
+DEFAULT_CHUNK_OVERLAP = 100
 
 app = typer.Typer(name="Language Transfer Flashcards")
+cache_app = typer.Typer(help="Manage the local cache, located in: ~/.ltf/cache")
+app.add_typer(cache_app, name="cache")
 
 
 @app.command(
@@ -16,7 +32,8 @@ app = typer.Typer(name="Language Transfer Flashcards")
 )
 def create_flashcards(
     url: str = typer.Argument(
-        help='YouTube video url, e.g. "https://www.youtube.com/watch?v=VIDEO_ID"'
+        help='YouTube video url, e.g. "https://www.youtube.com/watch?v=VIDEO_ID", '
+        "or a local transcript file (.vtt, .srt, .txt, .json) or directory of transcript files"
     ),
     target_language: AvailableTargetLanguages = typer.Option(
         None,
@@ -29,7 +46,7 @@ def create_flashcards(
         None,
         "--model",
         "-m",
-        help="OpenAI model name. If None, takes value from .env file. Defaults to gpt-4o if .env file does not exist",
+        help="Model name. If None, takes value from .env file. Defaults to gpt-4o if .env file does not exist",
     ),
     api_key: str = typer.Option(
         None,
@@ -38,6 +55,24 @@ def create_flashcards(
         callback=validate.api_key,
         help="OpenAI API key. If None, takes value from .env file, located in: ~/.ltf/.env",
     ),
+    backend: Backend = typer.Option(
+        None,
+        "--backend",
+        "-b",
+        is_eager=True,
+        help="LLM backend. Local backends need an OpenAI-compatible API. If None, takes value from .env file",
+    ),
+    base_url: str = typer.Option(
+        None,
+        "--base-url",
+        help="URL of an OpenAI-compatible API. If None, takes value from .env file or the default of the backend",
+    ),
+    escalation_model_name: str = typer.Option(
+        None,
+        "--escalation-model",
+        help='Stronger model, e.g. "gpt-4o", for the lessons and chunks whose flashcards of --model fail the '
+        "local checks",
+    ),
     delimiter: str = typer.Option(
         ",", "--delimiter", "-d", help="Delimiter to use in CSV file"
     ),
@@ -47,12 +82,143 @@ def create_flashcards(
         "-e",
         help="Directory containing CSV files with words and sentences to exclude",
     ),
+    similarity_threshold: float = typer.Option(
+        None,
+        "--similarity-threshold",
+        min=0.0,
+        max=1.0,
+        help="Also exclude near-duplicates of existing flashcards with at least this similarity, e.g. 0.8",
+    ),
+    known_vocabulary_tokens: int = typer.Option(
+        0,
+        "--known-vocabulary-tokens",
+        min=0,
+        help="Pass up to this many tokens of the most relevant flashcards in --exclude into the prompt, "
+        "so the LLM does not generate them again, e.g. 1000. 0 disables it",
+    ),
+    apkg: bool = typer.Option(
+        False,
+        "--apkg",
+        help="Save the flashcards as Anki package (.apkg), which can be opened in Anki directly",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Always download the transcript from YouTube, instead of using the local cache",
+    ),
+    no_llm_cache: bool = typer.Option(
+        False,
+        "--no-llm-cache",
+        help="Always call the LLM, instead of reusing flashcards of a previous run with the same prompt and model",
+    ),
+    chunk_size: int = typer.Option(
+        0,
+        "--chunk-size",
+        min=0,
+        help="Split long transcripts into chunks of this many words, processed in parallel. 0 disables chunking",
+    ),
+    chunk_overlap: int = typer.Option(
+        None,
+        "--chunk-overlap",
+        min=0,
+        help="Number of words shared by two consecutive chunks. If None, a fifth of the chunk size, at most "
+        f"{DEFAULT_CHUNK_OVERLAP}",
+    ),
+    compress: bool = typer.Option(
+        None,
+        "--compress/--no-compress",
+        help="Remove fillers and repetitions from the transcript before it is sent to the LLM. "
+        "If None, takes value from .env file",
+    ),
+    stream: bool = typer.Option(
+        False,
+        "--stream",
+        help="Write every flashcard as soon as the LLM has generated it",
+    ),
+    output: str = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help='Output file when streaming, "-" writes to stdout. If None, the file is named after the video title',
+    ),
+    output_format: OutputFormat = typer.Option(
+        OutputFormat.CSV, "--format", "-f", help="Output format when streaming"
+    ),
+    show_metrics: bool = typer.Option(
+        False,
+        "--metrics",
+        help="Show the duration of every processing stage, token usage and flashcard counts",
+    ),
+    metrics_file: str = typer.Option(
+        None,
+        "--metrics-file",
+        help="Append the metrics of the run as a single JSON line to this file",
+    ),
 ):
-    flashcard_extraction = LanguageTransferFlashcards(
-        url, target_language=target_language.value
-    )
-    flashcard_extraction.run(
-        model_name=model_name, api_key=api_key, delimiter=delimiter, exclude=exclude
+    chunk_overlap = _resolve_chunk_overlap(chunk_size, chunk_overlap)
+    if stream and chunk_size:
+        raise typer.BadParameter(
+            "Streaming can not be combined with chunking.", param_hint="'--stream'"
+        )
+    if output and not stream:
+        raise typer.BadParameter(
+            "An output file can only be set when streaming.", param_hint="'--output'"
+        )
+    _check_similarity_threshold(similarity_threshold, exclude)
+    _check_known_vocabulary(known_vocabulary_tokens, exclude)
+    if stream and similarity_threshold is not None:
+        raise typer.BadParameter(
+            "Streaming can not be combined with a similarity threshold.",
+            param_hint="'--stream'",
+        )
+    if stream and escalation_model_name:
+        raise typer.BadParameter(
+            "Streaming can not be combined with an escalation model.",
+            param_hint="'--stream'",
+        )
+    if stream and apkg:
+        raise typer.BadParameter(
+            "Streaming can not be combined with an Anki package.",
+            param_hint="'--stream'",
+        )
+    if output not in (None, "-") and Path(url).is_dir():
+        raise typer.BadParameter(
+            "The lessons of a directory can only be streamed to their own files or stdout.",
+            param_hint="'--output'",
+        )
+
+    from ltf.config import settings
+
+    # Resolved here, so the metrics record the model actually used
+    model_name = model_name if model_name else settings.OPENAI_MODEL_NAME
+    for flashcard_extraction in _lessons(
+        url, target_language.value, not no_cache, compress
+    ):
+        flashcard_extraction.run(
+            model_name=model_name,
+            api_key=api_key,
+            delimiter=delimiter,
+            exclude=exclude,
+            use_llm_cache=not no_llm_cache,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            stream=stream,
+            output=output,
+            output_format=output_format.value,
+            backend=backend,
+            base_url=base_url,
+            similarity_threshold=similarity_threshold,
+            apkg=apkg,
+            known_vocabulary_tokens=known_vocabulary_tokens,
+            escalation_model_name=escalation_model_name,
+        )
+    _report_metrics(
+        show_metrics,
+        metrics_file,
+        to_stderr=output == "-",
+        command="csv",
+        source=url,
+        model=model_name,
     )
 
 
@@ -62,7 +228,8 @@ def create_flashcards(
 )
 def create_prompt(
     url: str = typer.Argument(
-        help='YouTube video url, e.g. "https://www.youtube.com/watch?v=VIDEO_ID"'
+        help='YouTube video url, e.g. "https://www.youtube.com/watch?v=VIDEO_ID", '
+        "or a local transcript file (.vtt, .srt, .txt, .json) or directory of transcript files"
     ),
     target_language: AvailableTargetLanguages = typer.Option(
         None,
@@ -71,11 +238,860 @@ def create_prompt(
         callback=validate.target_language,
         help="Target language taught in video. If None, takes value from .env file",
     ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Always download the transcript from YouTube, instead of using the local cache",
+    ),
+    compress: bool = typer.Option(
+        None,
+        "--compress/--no-compress",
+        help="Remove fillers and repetitions from the transcript before it is sent to the LLM. "
+        "If None, takes value from .env file",
+    ),
+):
+    for flashcard_extraction in _lessons(
+        url, target_language.value, not no_cache, compress
+    ):
+        flashcard_extraction.save_prompt()
+
+
+@app.command(
+    name="batch",
+    help="Create flashcards in CSV format for a whole YouTube playlist or a file of YouTube URLs",
+)
+def create_flashcards_batch(
+    source: str = typer.Argument(
+        help='YouTube playlist url, e.g. "https://www.youtube.com/playlist?list=PLAYLIST_ID" '
+        "or path to a text file with one YouTube video url per line"
+    ),
+    target_language: AvailableTargetLanguages = typer.Option(
+        None,
+        "--target-language",
+        "-l",
+        callback=validate.target_language,
+        help="Target language taught in videos. If None, takes value from .env file, located in: ~/.ltf/.env",
+    ),
+    model_name: str = typer.Option(
+        None,
+        "--model",
+        "-m",
+        help="Model name. If None, takes value from .env file. Defaults to gpt-4o if .env file does not exist",
+    ),
+    api_key: str = typer.Option(
+        None,
+        "--api-key",
+        "-k",
+        callback=validate.api_key,
+        help="OpenAI API key. If None, takes value from .env file, located in: ~/.ltf/.env",
+    ),
+    backend: Backend = typer.Option(
+        None,
+        "--backend",
+        "-b",
+        is_eager=True,
+        help="LLM backend. Local backends need an OpenAI-compatible API. If None, takes value from .env file",
+    ),
+    base_url: str = typer.Option(
+        None,
+        "--base-url",
+        help="URL of an OpenAI-compatible API. If None, takes value from .env file or the default of the backend",
+    ),
+    escalation_model_name: str = typer.Option(
+        None,
+        "--escalation-model",
+        help='Stronger model, e.g. "gpt-4o", for the lessons and chunks whose flashcards of --model fail the '
+        "local checks",
+    ),
+    delimiter: str = typer.Option(
+        ",", "--delimiter", "-d", help="Delimiter to use in CSV files"
+    ),
+    exclude: str = typer.Option(
+        None,
+        "--exclude",
+        "-e",
+        help="Directory containing CSV files with words and sentences to exclude",
+    ),
+    similarity_threshold: float = typer.Option(
+        None,
+        "--similarity-threshold",
+        min=0.0,
+        max=1.0,
+        help="Also exclude near-duplicates of existing flashcards with at least this similarity, e.g. 0.8",
+    ),
+    known_vocabulary_tokens: int = typer.Option(
+        0,
+        "--known-vocabulary-tokens",
+        min=0,
+        help="Pass up to this many tokens of the most relevant flashcards in --exclude into the prompt, "
+        "so the LLM does not generate them again, e.g. 1000. 0 disables it",
+    ),
+    apkg: str = typer.Option(
+        None,
+        "--apkg",
+        help="Pack all lessons into this Anki package (.apkg), one subdeck per lesson, instead of CSV files",
+    ),
+    concurrency: int = typer.Option(
+        4,
+        "--concurrency",
+        "-c",
+        min=1,
+        help="Maximum number of lessons processed at the same time",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Always download the transcripts from YouTube, instead of using the local cache",
+    ),
+    no_llm_cache: bool = typer.Option(
+        False,
+        "--no-llm-cache",
+        help="Always call the LLM, instead of reusing flashcards of a previous run with the same prompt and model",
+    ),
+    chunk_size: int = typer.Option(
+        0,
+        "--chunk-size",
+        min=0,
+        help="Split long transcripts into chunks of this many words, processed in parallel. 0 disables chunking",
+    ),
+    chunk_overlap: int = typer.Option(
+        None,
+        "--chunk-overlap",
+        min=0,
+        help="Number of words shared by two consecutive chunks. If None, a fifth of the chunk size, at most "
+        f"{DEFAULT_CHUNK_OVERLAP}",
+    ),
+    show_metrics: bool = typer.Option(
+        False,
+        "--metrics",
+        help="Show the duration of every processing stage, token usage and flashcard counts",
+    ),
+    metrics_file: str = typer.Option(
+        None,
+        "--metrics-file",
+        help="Append the metrics of the run as a single JSON line to this file",
+    ),
 ):
-    flashcard_extraction = LanguageTransferFlashcards(
-        url, target_language=target_language.value
+    from ltf import LanguageTransferFlashcards
+    from ltf.config import settings
+    from ltf.known_vocabulary import KnownVocabulary
+
+    chunk_overlap = _resolve_chunk_overlap(chunk_size, chunk_overlap)
+    _check_similarity_threshold(similarity_threshold, exclude)
+    _check_known_vocabulary(known_vocabulary_tokens, exclude)
+    try:
+        urls = batch.resolve_urls(source)
+    except ValueError as error:
+        raise typer.BadParameter(str(error), param_hint="'SOURCE'")
+
+    llm = utils.initialize_llm(
+        api_key=api_key,
+        model_name=model_name if model_name else settings.OPENAI_MODEL_NAME,
+        backend=backend,
+        base_url=base_url,
+    )
+    escalation_llm = None
+    if escalation_model_name:
+        escalation_llm = utils.initialize_llm(
+            api_key=api_key,
+            model_name=escalation_model_name,
+            backend=backend,
+            base_url=base_url,
+        )
+        print(
+            f"Using: [green bold]{llm.model_name}[/green bold], escalating to "
+            f"[green bold]{escalation_llm.model_name}[/green bold]\n"
+        )
+    else:
+        print(f"Using: [green bold]{llm.model_name}[/green bold]\n")
+    llm_cache = None if no_llm_cache else cache.flashcard_cache()
+
+    package = AnkiPackage(namespace=target_language.value) if apkg else None
+    # Loaded once and shared by all lessons
+    known_vocabulary = (
+        KnownVocabulary(
+            utils._load_existing_flashcards(exclude),
+            token_budget=known_vocabulary_tokens,
+        )
+        if known_vocabulary_tokens
+        else None
     )
-    flashcard_extraction.save_prompt()
+
+    def process_lesson(url: str) -> str:
+        flashcard_extraction = LanguageTransferFlashcards(
+            url, target_language=target_language.value, use_cache=not no_cache
+        )
+        flashcard_extraction.known_vocabulary = known_vocabulary
+        flashcard_extraction.escalation_llm = escalation_llm
+        if package is not None:
+            return flashcard_extraction.add_to_package(
+                llm=llm,
+                package=package,
+                exclude=exclude,
+                llm_cache=llm_cache,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                similarity_threshold=similarity_threshold,
+            )
+        return flashcard_extraction.create_csv(
+            llm=llm,
+            delimiter=delimiter,
+            exclude=exclude,
+            llm_cache=llm_cache,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            similarity_threshold=similarity_threshold,
+        )
+
+    results = batch.run_batch(urls, process_lesson, concurrency=concurrency)
+    if package is not None:
+        # The results contain the deck names in lesson order
+        package.write(apkg, deck_order=[result.filename for result in results])
+        utils._show_file_location(apkg)
+    batch.print_summary(results)
+    if llm_cache is not None:
+        utils.show_cache_statistics(llm_cache)
+    utils.show_prompt_cache_statistics()
+    _report_metrics(
+        show_metrics,
+        metrics_file,
+        command="batch",
+        source=source,
+        model=llm.model_name,
+    )
+    if not all(result.ok for result in results):
+        raise typer.Exit(code=1)
+
+
+@app.command(
+    name="sync",
+    help="Keep the CSV files of a course up to date, only processing new lessons and lessons whose inputs changed",
+)
+def sync_course(
+    source: str = typer.Argument(
+        help='YouTube playlist url, e.g. "https://www.youtube.com/playlist?list=PLAYLIST_ID" '
+        "or path to a text file with one YouTube video url per line"
+    ),
+    target_language: AvailableTargetLanguages = typer.Option(
+        None,
+        "--target-language",
+        "-l",
+        callback=validate.target_language,
+        help="Target language taught in videos. If None, takes value from .env file, located in: ~/.ltf/.env",
+    ),
+    model_name: str = typer.Option(
+        None,
+        "--model",
+        "-m",
+        help="Model name. If None, takes value from .env file. Defaults to gpt-4o if .env file does not exist",
+    ),
+    api_key: str = typer.Option(
+        None,
+        "--api-key",
+        "-k",
+        callback=validate.api_key,
+        help="OpenAI API key. If None, takes value from .env file, located in: ~/.ltf/.env",
+    ),
+    backend: Backend = typer.Option(
+        None,
+        "--backend",
+        "-b",
+        is_eager=True,
+        help="LLM backend. Local backends need an OpenAI-compatible API. If None, takes value from .env file",
+    ),
+    base_url: str = typer.Option(
+        None,
+        "--base-url",
+        help="URL of an OpenAI-compatible API. If None, takes value from .env file or the default of the backend",
+    ),
+    delimiter: str = typer.Option(
+        ",", "--delimiter", "-d", help="Delimiter to use in CSV files"
+    ),
+    exclude: str = typer.Option(
+        None,
+        "--exclude",
+        "-e",
+        help="Directory containing CSV files with words and sentences to exclude",
+    ),
+    similarity_threshold: float = typer.Option(
+        None,
+        "--similarity-threshold",
+        min=0.0,
+        max=1.0,
+        help="Also exclude near-duplicates of existing flashcards with at least this similarity, e.g. 0.8",
+    ),
+    manifest_file: str = typer.Option(
+        "ltf_sync_manifest.json",
+        "--manifest",
+        help="Path of the manifest, recording the inputs of every processed lesson",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        help="Process all lessons, even if their inputs did not change",
+    ),
+    concurrency: int = typer.Option(
+        4,
+        "--concurrency",
+        "-c",
+        min=1,
+        help="Maximum number of lessons processed at the same time",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Always download the transcripts from YouTube, instead of using the local cache",
+    ),
+    no_llm_cache: bool = typer.Option(
+        False,
+        "--no-llm-cache",
+        help="Always call the LLM, instead of reusing flashcards of a previous run with the same prompt and model",
+    ),
+    chunk_size: int = typer.Option(
+        0,
+        "--chunk-size",
+        min=0,
+        help="Split long transcripts into chunks of this many words, processed in parallel. 0 disables chunking",
+    ),
+    chunk_overlap: int = typer.Option(
+        None,
+        "--chunk-overlap",
+        min=0,
+        help="Number of words shared by two consecutive chunks. If None, a fifth of the chunk size, at most "
+        f"{DEFAULT_CHUNK_OVERLAP}",
+    ),
+    show_metrics: bool = typer.Option(
+        False,
+        "--metrics",
+        help="Show the duration of every processing stage, token usage and flashcard counts",
+    ),
+    metrics_file: str = typer.Option(
+        None,
+        "--metrics-file",
+        help="Append the metrics of the run as a single JSON line to this file",
+    ),
+):
+    from ltf import LanguageTransferFlashcards
+    from ltf.config import settings
+
+    chunk_overlap = _resolve_chunk_overlap(chunk_size, chunk_overlap)
+    _check_similarity_threshold(similarity_threshold, exclude)
+    try:
+        urls = batch.resolve_urls(source)
+    except ValueError as error:
+        raise typer.BadParameter(str(error), param_hint="'SOURCE'")
+
+    llm = utils.initialize_llm(
+        api_key=api_key,
+        model_name=model_name if model_name else settings.OPENAI_MODEL_NAME,
+        backend=backend,
+        base_url=base_url,
+    )
+    print(f"Using: [green bold]{llm.model_name}[/green bold]\n")
+    llm_cache = None if no_llm_cache else cache.flashcard_cache()
+
+    manifest = sync.SyncManifest(manifest_file)
+    prompt_hash = sync.file_hash(utils.PROMPT_FILE)
+    unchanged = []
+
+    def process_lesson(url: str) -> str:
+        lesson_id = sync.video_id(url)
+        # The transcript is usually served from the local cache, so unchanged lessons cost no request
+        flashcard_extraction = LanguageTransferFlashcards(
+            url, target_language=target_language.value, use_cache=not no_cache
+        )
+        inputs = sync.LessonInputs(
+            transcript_hash=sync.content_hash(flashcard_extraction.transcript),
+            model=llm.model_name,
+            prompt_hash=prompt_hash,
+            output=f"{flashcard_extraction.filename}.csv",
+        )
+        if not force and manifest.is_current(lesson_id, inputs):
+            unchanged.append(url)
+            return inputs.output
+
+        filename = flashcard_extraction.create_csv(
+            llm=llm,
+            delimiter=delimiter,
+            exclude=exclude,
+            llm_cache=llm_cache,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            similarity_threshold=similarity_threshold,
+        )
+        manifest.record(lesson_id, inputs)
+        return filename
+
+    try:
+        results = batch.run_batch(urls, process_lesson, concurrency=concurrency)
+    finally:
+        # Keep the progress of an interrupted sync
+        manifest.save()
+    metrics.increment("unchanged_lessons", len(unchanged))
+    print(
+        f"\n[green bold]{len(unchanged)}[/green bold] unchanged lessons skipped, "
+        f'manifest saved in: "{manifest.path}"'
+    )
+    batch.print_summary(results)
+    if llm_cache is not None:
+        utils.show_cache_statistics(llm_cache)
+    utils.show_prompt_cache_statistics()
+    _report_metrics(
+        show_metrics,
+        metrics_file,
+        command="sync",
+        source=source,
+        model=llm.model_name,
+    )
+    if not all(result.ok for result in results):
+        raise typer.Exit(code=1)
+
+
+@app.command(
+    name="batch-api",
+    help="Create flashcards for a whole course with the OpenAI Batch API - half the price, results within 24 hours",
+)
+def create_flashcards_batch_api(
+    source: str = typer.Argument(
+        None,
+        help='YouTube playlist url, e.g. "https://www.youtube.com/playlist?list=PLAYLIST_ID" '
+        "or path to a text file with one YouTube video url per line",
+    ),
+    target_language: AvailableTargetLanguages = typer.Option(
+        None,
+        "--target-language",
+        "-l",
+        callback=validate.target_language,
+        help="Target language taught in videos. If None, takes value from .env file, located in: ~/.ltf/.env",
+    ),
+    model_name: str = typer.Option(
+        None,
+        "--model",
+        "-m",
+        help="OpenAI model name. If None, takes value from .env file. Defaults to gpt-4o if .env file does not exist",
+    ),
+    api_key: str = typer.Option(
+        None,
+        "--api-key",
+        "-k",
+        callback=validate.api_key,
+        help="OpenAI API key. If None, takes value from .env file, located in: ~/.ltf/.env",
+    ),
+    delimiter: str = typer.Option(
+        ",", "--delimiter", "-d", help="Delimiter to use in CSV files"
+    ),
+    exclude: str = typer.Option(
+        None,
+        "--exclude",
+        "-e",
+        help="Directory containing CSV files with words and sentences to exclude",
+    ),
+    similarity_threshold: float = typer.Option(
+        None,
+        "--similarity-threshold",
+        min=0.0,
+        max=1.0,
+        help="Also exclude near-duplicates of existing flashcards with at least this similarity, e.g. 0.8",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Always download the transcripts from YouTube, instead of using the local cache",
+    ),
+    batch_id: str = typer.Option(
+        None,
+        "--batch-id",
+        help="ID of an already submitted batch. Skips the submission and only waits for the results",
+    ),
+    requests_file: str = typer.Option(
+        "ltf_batch_requests.jsonl",
+        "--requests-file",
+        help="Path of the batch input file, containing one request per lesson",
+    ),
+    poll_interval: float = typer.Option(
+        60, "--poll-interval", min=1, help="Seconds between two status checks"
+    ),
+):
+    from openai import OpenAI
+
+    from ltf import LanguageTransferFlashcards
+    from ltf.config import settings
+    from ltf.openai_batch import OpenAIBatch, unique_ids
+
+    if source is None and batch_id is None:
+        raise typer.BadParameter(
+            "Either a SOURCE or a --batch-id is required.", param_hint="'SOURCE'"
+        )
+    _check_similarity_threshold(similarity_threshold, exclude)
+
+    openai_batch = OpenAIBatch(
+        OpenAI(api_key=api_key),
+        model_name=model_name if model_name else settings.OPENAI_MODEL_NAME,
+        poll_interval=poll_interval,
+    )
+
+    if batch_id is None:
+        try:
+            urls = batch.resolve_urls(source)
+        except ValueError as error:
+            raise typer.BadParameter(str(error), param_hint="'SOURCE'")
+
+        lessons = {}
+
+        def load_lesson(url: str) -> str:
+            lessons[url] = LanguageTransferFlashcards(
+                url, target_language=target_language.value, use_cache=not no_cache
+            )
+            return lessons[url].filename
+
+        download_results = batch.run_batch(
+            urls, load_lesson, description="Downloading transcripts..."
+        )
+        loaded = [lessons[result.url] for result in download_results if result.ok]
+        openai_batch.write_requests(
+            zip(
+                unique_ids(lesson.filename for lesson in loaded),
+                (lesson.render_prompt() for lesson in loaded),
+            ),
+            requests_file,
+        )
+        batch_id = openai_batch.submit(requests_file)
+        print(
+            f"Submitted batch [green bold]{batch_id}[/green bold] with {len(loaded)} lessons. "
+            f"If interrupted, continue with: --batch-id {batch_id}\n"
+        )
+        batch.print_summary(download_results)
+
+    try:
+        finished_batch = openai_batch.wait(batch_id)
+    except RuntimeError as error:
+        print(
+            f"[red bold]{error}[/red bold]\n"
+            f"Check the batch [green bold]{batch_id}[/green bold] in the OpenAI dashboard. "
+            f"To check it again, continue with: --batch-id {batch_id}\n"
+            "To submit the lessons again, run the command without --batch-id."
+        )
+        raise typer.Exit(code=1)
+    if finished_batch.status == "expired":
+        print(
+            f"[yellow]Batch {batch_id} expired before all requests were finished. "
+            "The finished lessons are saved, the others are listed as failed.[/yellow]"
+        )
+
+    results = []
+    for custom_id, flashcards in openai_batch.results(finished_batch).items():
+        if isinstance(flashcards, str):
+            results.append(batch.LessonResult(url=custom_id, error=flashcards))
+            continue
+        filename = f"{custom_id}.csv"
+        utils.save_flashcards_as_csv(
+            flashcards,
+            filename=filename,
+            delimiter=delimiter,
+            exclude=exclude,
+            similarity_threshold=similarity_threshold,
+        )
+        results.append(batch.LessonResult(url=custom_id, filename=filename))
+
+    batch.print_summary(results)
+    if not all(result.ok for result in results):
+        raise typer.Exit(code=1)
+
+
+@app.command(
+    name="search",
+    help="Search all flashcards created so far, in English or the target language",
+)
+def search_flashcards(
+    query: str = typer.Argument(
+        help='Words or word beginnings to search for, e.g. "kutaka" or "want to"'
+    ),
+    target_language: AvailableTargetLanguages = typer.Option(
+        None,
+        "--target-language",
+        "-l",
+        help="Only search the lessons of this target language. If None, all lessons are searched",
+    ),
+    limit: int = typer.Option(
+        20, "--limit", "-n", min=1, help="Maximum number of results"
+    ),
+):
+    from ltf import corpus
+
+    if not corpus.CORPUS_FILE.is_file():
+        print(
+            f'No flashcards found in: "{corpus.CORPUS_FILE}"\n'
+            "Set CORPUS_ENABLED=true in your .env file, to store all flashcards created from now on."
+        )
+        raise typer.Exit(code=1)
+
+    with corpus.CorpusStore(corpus.CORPUS_FILE) as store:
+        start = time.perf_counter()
+        results = store.search(
+            query,
+            target_language=target_language.value if target_language else None,
+            limit=limit,
+        )
+        duration_ms = (time.perf_counter() - start) * 1000
+        total = len(store)
+
+    print(
+        f"[green bold]{len(results)}[/green bold] matches in {total} flashcards ({duration_ms:.1f} ms)"
+    )
+    if results:
+        print(utils.search_results_table(results))
+
+
+@app.command(
+    name="serve",
+    help="Run a local HTTP service creating flashcards, which keeps the LLM clients and caches warm",
+)
+def serve(
+    host: str = typer.Option("127.0.0.1", "--host", help="Host to listen on"),
+    port: int = typer.Option(8000, "--port", "-p", help="Port to listen on"),
+    target_language: AvailableTargetLanguages = typer.Option(
+        None,
+        "--target-language",
+        "-l",
+        help="Target language of jobs without one. If None, takes value from .env file",
+    ),
+    model_name: str = typer.Option(
+        None,
+        "--model",
+        "-m",
+        help="Model name. If None, takes value from .env file. Defaults to gpt-4o if .env file does not exist",
+    ),
+    api_key: str = typer.Option(
+        None,
+        "--api-key",
+        "-k",
+        callback=validate.api_key,
+        help="OpenAI API key. If None, takes value from .env file, located in: ~/.ltf/.env",
+    ),
+    backend: Backend = typer.Option(
+        None,
+        "--backend",
+        "-b",
+        is_eager=True,
+        help="LLM backend. Local backends need an OpenAI-compatible API. If None, takes value from .env file",
+    ),
+    base_url: str = typer.Option(
+        None,
+        "--base-url",
+        help="URL of an OpenAI-compatible API. If None, takes value from .env file or the default of the backend",
+    ),
+    workers: int = typer.Option(
+        4, "--workers", "-w", min=1, help="Number of jobs processed at the same time"
+    ),
+    max_queued: int = typer.Option(
+        100,
+        "--max-queued",
+        min=1,
+        help="Maximum number of jobs waiting to be processed, further jobs are rejected",
+    ),
+    no_llm_cache: bool = typer.Option(
+        False,
+        "--no-llm-cache",
+        help="Always call the LLM, instead of reusing flashcards of a previous run with the same prompt and model",
+    ),
+    chunk_size: int = typer.Option(
+        0,
+        "--chunk-size",
+        min=0,
+        help="Split long transcripts into chunks of this many words, processed in parallel. 0 disables chunking",
+    ),
+    chunk_overlap: int = typer.Option(
+        None,
+        "--chunk-overlap",
+        min=0,
+        help="Number of words shared by two consecutive chunks. If None, a fifth of the chunk size, at most "
+        f"{DEFAULT_CHUNK_OVERLAP}",
+    ),
+    verbose: bool = typer.Option(False, "--verbose", help="Log every request"),
+):
+    from ltf import LanguageTransferFlashcards
+    from ltf.config import settings
+    from ltf.language_transfer_flashcards import compiled_prompt_template
+    from ltf.server import FlashcardServer, JobQueue
+
+    chunk_overlap = _resolve_chunk_overlap(chunk_size, chunk_overlap)
+    # Everything shared by the jobs is loaded once, before the first request arrives
+    compiled_prompt_template()
+    llm = utils.initialize_llm(
+        api_key=api_key,
+        model_name=model_name if model_name else settings.OPENAI_MODEL_NAME,
+        backend=backend,
+        base_url=base_url,
+    )
+    llm_cache = None if no_llm_cache else cache.flashcard_cache()
+    if target_language is None and settings.TARGET_LANGUAGE is not None:
+        target_language = settings.TARGET_LANGUAGE
+
+    def process_job(job):
+        flashcard_extraction = LanguageTransferFlashcards(
+            job.url, target_language=job.target_language
+        )
+        flashcards = flashcard_extraction.create_flashcards(
+            llm=llm,
+            llm_cache=llm_cache,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+        return flashcard_extraction.title, [
+            (flashcard.english, flashcard.target_language)
+            for flashcard in flashcards.flashcards
+        ]
+
+    jobs = JobQueue(process_job, workers=workers, max_queued=max_queued)
+    server = FlashcardServer(
+        (host, port),
+        jobs,
+        target_language=target_language.value if target_language else None,
+        target_languages=[language.value for language in AvailableTargetLanguages],
+        verbose=verbose,
+    )
+    print(
+        f"Using: [green bold]{llm.model_name}[/green bold]\n"
+        f"Serving on [green bold]http://{host}:{server.server_port}[/green bold] "
+        f"with {workers} workers, press Ctrl+C to stop"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.shutdown()
+
+
+def _lessons(
+    source: str,
+    target_language: str,
+    use_cache: bool,
+    compress: Optional[bool] = None,
+) -> Iterator["LanguageTransferFlashcards"]:
+    """
+    Yield the lesson of a YouTube video, or one lesson per transcript of a local file or directory
+
+    Local transcripts are read one at a time, right before their lesson is processed.
+
+    Args:
+        source: URL of the YouTube video, or path of a local transcript file or directory
+        target_language: The language that is taught in the lessons
+        use_cache: Whether to load the transcript of the YouTube video from the local cache, if available
+        compress: Whether to remove fillers and repetitions from the transcripts. If None, takes value from
+            .env file
+
+    Returns:
+        Iterator over the lessons
+
+    Raises:
+        typer.BadParameter: If a local file is not supported or does not contain a transcript
+    """
+    from ltf import LanguageTransferFlashcards
+
+    if not local_transcript.is_local_source(source):
+        yield LanguageTransferFlashcards(
+            source,
+            target_language=target_language,
+            use_cache=use_cache,
+            compress=compress,
+        )
+        return
+
+    try:
+        for path in local_transcript.transcript_files(source):
+            transcript = local_transcript.read_transcript(path)
+            yield LanguageTransferFlashcards(
+                str(path),
+                target_language=target_language,
+                transcript=transcript,
+                compress=compress,
+            )
+    except ValueError as error:
+        raise typer.BadParameter(str(error), param_hint="'URL'")
+
+
+def _resolve_chunk_overlap(chunk_size: int, chunk_overlap: Optional[int]) -> int:
+    """
+    Return the chunk overlap, checked against the chunk size after all parameters are parsed
+
+    Args:
+        chunk_size: Value of the parameter chunk-size provided in the CLI
+        chunk_overlap: Value of the parameter chunk-overlap provided in the CLI. None if not provided
+
+    Returns:
+        The chunk overlap. If not provided, a fifth of the chunk size, at most DEFAULT_CHUNK_OVERLAP words
+
+    Raises:
+        typer.BadParameter: If chunking is enabled and the chunk overlap is not smaller than the chunk size
+    """
+    if chunk_overlap is None:
+        return min(DEFAULT_CHUNK_OVERLAP, chunk_size // 5)
+    if chunk_size and chunk_overlap >= chunk_size:
+        raise typer.BadParameter(
+            f"Chunk overlap ({chunk_overlap}) must be smaller than the chunk size ({chunk_size}).",
+            param_hint="'--chunk-overlap'",
+        )
+    return chunk_overlap
+
+
+def _check_similarity_threshold(
+    similarity_threshold: Optional[float], exclude: Optional[str]
+) -> None:
+    """
+    Check that the near-duplicate exclusion has a directory of existing flashcards to compare with
+
+    Args:
+        similarity_threshold: Value of the parameter similarity-threshold provided in the CLI
+        exclude: Value of the parameter exclude provided in the CLI
+
+    Raises:
+        typer.BadParameter: If a similarity threshold is set without an exclude directory
+    """
+    if similarity_threshold is not None and not exclude:
+        raise typer.BadParameter(
+            "A similarity threshold requires a directory to --exclude.",
+            param_hint="'--similarity-threshold'",
+        )
+
+
+def _check_known_vocabulary(
+    known_vocabulary_tokens: int, exclude: Optional[str]
+) -> None:
+    """
+    Check that the known vocabulary has a directory of existing flashcards to read from
+
+    Args:
+        known_vocabulary_tokens: Value of the parameter known-vocabulary-tokens provided in the CLI
+        exclude: Value of the parameter exclude provided in the CLI
+
+    Raises:
+        typer.BadParameter: If a known vocabulary budget is set without an exclude directory
+    """
+    if known_vocabulary_tokens and not exclude:
+        raise typer.BadParameter(
+            "The known vocabulary is read from the directory to --exclude.",
+            param_hint="'--known-vocabulary-tokens'",
+        )
+
+
+def _report_metrics(
+    show: bool, metrics_file: Optional[str], to_stderr: bool = False, **context: Any
+) -> None:
+    """
+    Print the metrics of the run and/or append them to a JSON Lines file
+
+    Args:
+        show: Whether to print the metrics as table
+        metrics_file: Path of the JSON Lines file. If None, the metrics are not saved
+        to_stderr: Whether to print to stderr, to keep stdout clean for the flashcards
+        context: Additional values to store with the metrics, e.g. the command
+    """
+    if show:
+        print(metrics.summary_table(), file=sys.stderr if to_stderr else None)
+    if metrics_file:
+        metrics.write_jsonl(metrics_file, **context)
 
 
 @app.command(name="env-location", help="Show location of your .env file")
@@ -86,3 +1102,9 @@ def env_location():
 @app.command(name="env-values", help="Show current values of your .env file")
 def env_values():
     utils.read_env_file(ENV_DIR / ".env")
+
+
+@cache_app.command(name="clear", help="Delete all cached transcripts and flashcards")
+def cache_clear():
+    cache.clear_cache()
+    print(f'Cache cleared: "{CACHE_DIR}"')
@@ -2,8 +2,9 @@ from typing import Optional
 
 import typer
 
-from ltf.config import settings
-from ltf.models import AvailableTargetLanguages
+from ltf import config
+from ltf.languages import AvailableTargetLanguages
+from ltf.llm import Backend
 
 
 def target_language(value: Optional[AvailableTargetLanguages]) -> str:
@@ -21,17 +22,19 @@ def target_language(value: Optional[AvailableTargetLanguages]) -> str:
         and the user has not provided a value in the CLI
     """
     if value is None:
-        if settings.TARGET_LANGUAGE is None:
+        if config.settings.TARGET_LANGUAGE is None:
             raise typer.BadParameter(get_missing_parameter_message("Target language"))
-        return settings.TARGET_LANGUAGE.value
+        return config.settings.TARGET_LANGUAGE.value
     return value.value
 
 
-def api_key(value: Optional[str]):
+def api_key(ctx: typer.Context, value: Optional[str]):
     """
-    Check if the OpenAI API key is set in the .env file, in case the user has not provided a value in the CLI
+    Check if the OpenAI API key is set in the .env file, in case the user has not provided a value in the CLI.
+    Local backends do not require an API key.
 
     Args:
+        ctx: Typer context, containing the already parsed value of the (eager) parameter backend
         value: Value of the parameter api-key provided in the CLI. None if not provided
 
     Returns
@@ -42,9 +45,10 @@ def api_key(value: Optional[str]):
         and the user has not provided a value in the CLI
     """
     if value is None:
-        if settings.OPENAI_API_KEY is None:
+        backend = ctx.params.get("backend") or config.settings.LLM_BACKEND
+        if config.settings.OPENAI_API_KEY is None and backend == Backend.OPENAI:
             raise typer.BadParameter(get_missing_parameter_message("OpenAI API key"))
-        return settings.OPENAI_API_KEY
+        return config.settings.OPENAI_API_KEY
     return value
 
 
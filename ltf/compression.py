@@ -0,0 +1,162 @@
+"""
+Deterministic compression of transcripts, shrinking the prompt before it is sent to the LLM.
+
+Auto-generated transcripts are full of hesitations ("um", "uh"), discourse fillers ("okay so") and immediate
+repetitions ("I want I want to go"). The compression removes the fillers of the English speech and collapses
+immediately repeated word sequences to a single occurrence. Every word, which is not a filler, is kept at least
+once, so no target language word is lost. Words of the target language that look like English fillers, e.g. the
+German "um" or the Turkish "er", are never removed.
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+from ltf.rate_limit import CHARS_PER_TOKEN
+
+# Hesitations of the English speech, compared without punctuation and case
+FILLER_WORDS = frozenset(
+    {"um", "umm", "uh", "uhh", "uhm", "er", "erm", "hmm", "mm", "mhm", "ah"}
+)
+# Discourse fillers of more than one word. Phrases like "you know" are left alone, they occur in example sentences
+FILLER_PHRASES: Tuple[Tuple[str, ...], ...] = (("okay", "so"),)
+# Words of the target languages, which are English fillers otherwise
+PROTECTED_WORDS: Dict[str, FrozenSet[str]] = {
+    "Arabic": frozenset({"um", "umm", "ah"}),
+    "German": frozenset({"um", "er", "ah"}),
+    "Turkish": frozenset({"er"}),
+}
+# Longest word sequence whose immediate repetition is collapsed
+MAX_NGRAM = 4
+# Stutters like "w- want" or "I- I"
+STUTTER_PATTERN = re.compile(r"^\w{1,3}-$")
+PUNCTUATION_PATTERN = re.compile(r"[^\w'-]+")
+
+
+class CompressionResult(NamedTuple):
+    """A compressed transcript and the estimated tokens before and after the compression."""
+
+    transcript: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def reduction(self) -> float:
+        """Share of the tokens removed by the compression, between 0 and 1"""
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the tokens of a text, without running a tokenizer"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def filler_words(target_language: Optional[str] = None) -> FrozenSet[str]:
+    """Return the filler words, without the words of the target language"""
+    return FILLER_WORDS - PROTECTED_WORDS.get(target_language or "", frozenset())
+
+
+@lru_cache(maxsize=4096)
+def _normalize(word: str) -> str:
+    """Return the word as compared by the compression, without punctuation and case"""
+    return PUNCTUATION_PATTERN.sub("", word).lower()
+
+
+def remove_fillers(
+    words: Sequence[str], fillers: FrozenSet[str] = FILLER_WORDS
+) -> List[str]:
+    """
+    Remove the filler words, filler phrases and stutters
+
+    Args:
+        words: Words of the transcript, including their punctuation
+        fillers: The filler words to remove
+
+    Returns:
+        The remaining words
+    """
+    normalized = [_normalize(word) for word in words]
+    kept = []
+    position = 0
+    while position < len(words):
+        phrase_length = _filler_phrase_length(normalized, position)
+        if phrase_length:
+            position += phrase_length
+            continue
+        word = words[position]
+        following = normalized[position + 1] if position + 1 < len(words) else ""
+        is_stutter = STUTTER_PATTERN.match(word) and following.startswith(
+            normalized[position].rstrip("-")
+        )
+        if normalized[position] not in fillers and not is_stutter:
+            kept.append(word)
+        position += 1
+    return kept
+
+
+def _filler_phrase_length(normalized: Sequence[str], position: int) -> int:
+    """Return the number of words of the filler phrase starting at the position, 0 if none starts there"""
+    for phrase in FILLER_PHRASES:
+        end = position + len(phrase)
+        if tuple(normalized[position:end]) == phrase:
+            return len(phrase)
+    return 0
+
+
+def collapse_repetitions(words: Sequence[str], max_ngram: int = MAX_NGRAM) -> List[str]:
+    """
+    Collapse immediately repeated word sequences to their first occurrence, e.g. "I want I want to go"
+
+    Args:
+        words: Words of the transcript, including their punctuation
+        max_ngram: Longest repeated sequence of words to collapse
+
+    Returns:
+        The words without immediate repetitions. Every distinct word is kept at least once
+    """
+    kept: List[str] = []
+    normalized: List[str] = []
+    for word in words:
+        kept.append(word)
+        normalized.append(_normalize(word))
+        # Longer repetitions first, so "a b a b" is collapsed as a whole
+        for size in range(min(max_ngram, len(kept) // 2), 0, -1):
+            # Cheap check of the last word first, most sequences are not repeated
+            if normalized[-1] != normalized[-1 - size]:
+                continue
+            repeated = len(normalized) - 2 * size
+            if normalized[-size:] == normalized[repeated:-size]:
+                del kept[-size:]
+                del normalized[-size:]
+                break
+    return kept
+
+
+def compress_transcript(
+    transcript: str,
+    target_language: Optional[str] = None,
+    remove_filler_words: bool = True,
+    max_ngram: int = MAX_NGRAM,
+) -> CompressionResult:
+    """
+    Remove fillers and immediate repetitions from the transcript
+
+    Args:
+        transcript: The cleaned transcript
+        target_language: The language taught in the lesson, whose words are never removed as fillers
+        remove_filler_words: Whether to remove fillers and stutters
+        max_ngram: Longest repeated sequence of words to collapse. 0 disables collapsing
+
+    Returns:
+        The compressed transcript and the estimated tokens before and after the compression
+    """
+    words = transcript.split()
+    if remove_filler_words:
+        words = remove_fillers(words, filler_words(target_language))
+    if max_ngram:
+        words = collapse_repetitions(words, max_ngram)
+    compressed = " ".join(words)
+    return CompressionResult(
+        compressed, estimate_tokens(transcript), estimate_tokens(compressed)
+    )
@@ -1,26 +1,18 @@
 from pathlib import Path
-from typing import Optional
-
-from pydantic_settings import BaseSettings, SettingsConfigDict
-
-from ltf.models import AvailableTargetLanguages
 
 ENV_DIR = Path.home() / ".ltf"
+CACHE_DIR = ENV_DIR / "cache"
 
 
-class Settings(BaseSettings):
-    # OPENAI settings
-    OPENAI_API_KEY: Optional[str] = None
-    OPENAI_MODEL_NAME: str = "gpt-4o"
-
-    # The language you are currently learning form Language Transfer
-    TARGET_LANGUAGE: Optional[AvailableTargetLanguages] = None
-
-    # Testing
-    FULL_CLI_TEST_WITH_EXTERNAL_DEPENDENCIES: bool = False
-
-    # Load settings from .env file
-    model_config = SettingsConfigDict(env_file=(ENV_DIR / ".env"))
+def __getattr__(name: str):
+    """
+    Load the settings on first access only.
 
+    Reading the .env file requires pydantic, which is slow to import. Commands that
+    do not need the settings (e.g. 'ltf env-location') start faster this way.
+    """
+    if name in ("Settings", "settings"):
+        from ltf import settings as settings_module
 
-settings = Settings()
+        return getattr(settings_module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,207 @@
+"""
+Local store of all flashcards created so far, with a full-text index on both languages.
+
+Every lesson is stored once, rerunning a lesson replaces its flashcards. The store is a single SQLite file,
+which can be written by several threads and processes at the same time.
+"""
+
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from ltf import config
+from ltf.config import ENV_DIR
+
+CORPUS_FILE = ENV_DIR / "corpus.sqlite3"
+
+# Markers around matched terms in the search results, which can not occur in flashcards
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lessons (
+    video_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS flashcards (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT NOT NULL REFERENCES lessons (video_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    english TEXT NOT NULL,
+    target_text TEXT NOT NULL,
+    UNIQUE (video_id, position)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5(
+    english, target_text, content='flashcards', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS flashcards_insert AFTER INSERT ON flashcards BEGIN
+    INSERT INTO flashcards_fts (rowid, english, target_text) VALUES (new.id, new.english, new.target_text);
+END;
+CREATE TRIGGER IF NOT EXISTS flashcards_delete AFTER DELETE ON flashcards BEGIN
+    INSERT INTO flashcards_fts (flashcards_fts, rowid, english, target_text)
+    VALUES ('delete', old.id, old.english, old.target_text);
+END;
+"""
+
+
+class SearchResult(NamedTuple):
+    """A flashcard matching a search query. Matched terms are enclosed in the highlight markers."""
+
+    title: str
+    video_id: str
+    target_language: str
+    position: int
+    english: str
+    target_text: str
+
+
+def to_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query, matching all words of the text as word prefixes
+
+    Args:
+        query: The text entered by the user, e.g. "want to"
+
+    Returns:
+        FTS5 query, in which every word is quoted, so punctuation can not break the query syntax
+    """
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in query.split())
+
+
+class CorpusStore:
+    """
+    SQLite store of all created flashcards per lesson, with an FTS5 index on the English and target language text.
+    """
+
+    def __init__(self, path: Union[str, Path] = CORPUS_FILE):
+        """
+        Initialize the CorpusStore class. The file and its tables are created, if they do not exist
+
+        Args:
+            path: Path of the SQLite file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Transactions are started explicitly, the connection is shared by all threads under the lock
+        self._connection = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False, timeout=30
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        with self._lock:
+            self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the connection to the SQLite file"""
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "CorpusStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def add_lesson(
+        self,
+        video_id: str,
+        title: str,
+        target_language: str,
+        flashcards: Iterable[Tuple[str, str]],
+    ) -> int:
+        """
+        Store the flashcards of a lesson in a single transaction, replacing the flashcards of a previous run
+
+        Args:
+            video_id: ID of the YouTube video of the lesson
+            title: Title of the YouTube video
+            target_language: The language taught in the lesson
+            flashcards: English and target language text of every flashcard, in lesson order
+
+        Returns:
+            The number of stored flashcards
+        """
+        rows = [
+            (video_id, position, english, target_text)
+            for position, (english, target_text) in enumerate(flashcards)
+        ]
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.execute(
+                    "DELETE FROM flashcards WHERE video_id = ?", (video_id,)
+                )
+                self._connection.execute(
+                    "INSERT INTO lessons (video_id, title, target_language, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (video_id) DO UPDATE SET "
+                    "title = excluded.title, target_language = excluded.target_language, "
+                    "updated_at = excluded.updated_at",
+                    (video_id, title, target_language, time.time()),
+                )
+                self._connection.executemany(
+                    "INSERT INTO flashcards (video_id, position, english, target_text) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def search(
+        self, query: str, target_language: Optional[str] = None, limit: int = 20
+    ) -> List[SearchResult]:
+        """
+        Return the flashcards matching all words of the query, best matches first
+
+        Args:
+            query: Words or word beginnings in English or the target language, e.g. "kutaka"
+            target_language: Only search the lessons of this language. If None, all lessons are searched
+            limit: Maximum number of results
+
+        Returns:
+            The matching flashcards, ranked by BM25
+        """
+        match_query = to_match_query(query)
+        if not match_query:
+            return []
+
+        sql = (
+            "SELECT lessons.title, lessons.video_id, lessons.target_language, flashcards.position, "
+            f"highlight(flashcards_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}'), "
+            f"highlight(flashcards_fts, 1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}') "
+            "FROM flashcards_fts "
+            "JOIN flashcards ON flashcards.id = flashcards_fts.rowid "
+            "JOIN lessons ON lessons.video_id = flashcards.video_id "
+            "WHERE flashcards_fts MATCH ? "
+        )
+        parameters: list = [match_query]
+        if target_language is not None:
+            sql += "AND lessons.target_language = ? "
+            parameters.append(target_language)
+        sql += "ORDER BY bm25(flashcards_fts), flashcards.position LIMIT ?"
+        parameters.append(limit)
+
+        with self._lock:
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [SearchResult(*row) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM flashcards"
+            ).fetchone()[0]
+
+
+@lru_cache(maxsize=None)
+def default_store() -> Optional[CorpusStore]:
+    """Return the corpus store shared by all lessons of the process, None if it is disabled in the .env file"""
+    if not config.settings.CORPUS_ENABLED:
+        return None
+    return CorpusStore(CORPUS_FILE)
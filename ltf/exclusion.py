@@ -0,0 +1,194 @@
+import base64
+import csv
+import hashlib
+import os
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ltf.cache import DiskCache
+from ltf.near_duplicates import NearDuplicateIndex, normalize_text
+
+
+def normalize_key(english: str) -> str:
+    """Return the key used to compare English words and sentences"""
+    return english.strip().lower()
+
+
+def load_english_keys(directory: Path, index: Optional[DiskCache] = None) -> Set[str]:
+    """
+    Load the normalized English texts of all CSV files in the directory.
+
+    The keys of every file are stored in a persistent index. A file is only parsed again,
+    if its modification time or size changed and its content hash differs from the indexed one.
+
+    Args:
+        directory: The directory containing the CSV files.
+        index: Persistent index of the keys per file. If None, all files are parsed.
+
+    Returns:
+        A set of normalized English texts.
+    """
+    files = _load_file_entries(directory, index, read_file=_read_keys)
+    return {key for entry in files.values() for key in entry["keys"]}
+
+
+def find_near_duplicates(
+    directory: Path,
+    english_texts: Iterable[str],
+    threshold: float,
+    index: Optional[DiskCache] = None,
+) -> Dict[str, Tuple[str, float]]:
+    """
+    Find the new English texts, which are near-duplicates of a text in one of the CSV files in the directory.
+
+    The new texts are indexed and the existing texts are streamed against them, because a run only creates
+    a few hundred flashcards, while the directory can contain hundreds of thousands. The bucket keys of the
+    existing texts are stored in the persistent index, so only new or modified files are hashed.
+
+    Args:
+        directory: The directory containing the CSV files.
+        english_texts: The English texts of the new flashcards.
+        threshold: Minimum similarity of a near-duplicate, between 0 and 1.
+        index: Persistent index of the bucket keys per file. If None, all files are parsed and hashed.
+
+    Returns:
+        The most similar existing text and its similarity per normalized new text with a near-duplicate.
+    """
+    near_duplicates = NearDuplicateIndex(threshold)
+    for english in english_texts:
+        near_duplicates.add(normalize_text(english))
+
+    def read_file(csv_file: Path) -> Dict[str, Any]:
+        # Texts without letters or digits have no bucket keys, every other text has one per band
+        texts = list(
+            dict.fromkeys(filter(None, map(normalize_text, _read_keys(csv_file))))
+        )
+        keys = array(
+            "I", (key for text in texts for key in near_duplicates.bucket_keys(text))
+        )
+        return {
+            "texts": texts,
+            "buckets": base64.b64encode(keys.tobytes()).decode("ascii"),
+        }
+
+    files = _load_file_entries(
+        directory, index, read_file=read_file, namespace=near_duplicates.namespace
+    )
+
+    matches: Dict[str, Tuple[str, float]] = {}
+    for entry in files.values():
+        bucket_keys = array("I", base64.b64decode(entry["keys"]["buckets"]))
+        # Most files do not share a single bucket with the new texts
+        if not near_duplicates.shares_bucket(bucket_keys):
+            continue
+        for position, existing in enumerate(entry["keys"]["texts"]):
+            start = position * near_duplicates.bands
+            end = start + near_duplicates.bands
+            keys = bucket_keys[start:end]
+            if not near_duplicates.shares_bucket(keys):
+                continue
+            for english, similarity in near_duplicates.matches(existing, keys):
+                if english not in matches or similarity > matches[english][1]:
+                    matches[english] = (existing, similarity)
+    return matches
+
+
+def _load_file_entries(
+    directory: Path,
+    index: Optional[DiskCache],
+    read_file: Callable[[Path], Any],
+    namespace: str = "",
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Return the index entries of all CSV files in the directory, updating the outdated ones.
+
+    Args:
+        directory: The directory containing the CSV files.
+        index: Persistent index of the entries per file. If None, all files are parsed.
+        read_file: Function returning the keys of a CSV file.
+        namespace: Distinguishes different kinds of keys of the same directory in the index.
+
+    Returns:
+        The index entries per filename.
+    """
+    index_key = hashlib.sha256(
+        (str(directory.resolve()) + namespace).encode("utf-8")
+    ).hexdigest()
+    indexed_files = (index.get(index_key) if index is not None else None) or {}
+
+    files = {}
+    outdated = []
+    for csv_file in directory.glob("*.csv"):
+        stat = csv_file.stat()
+        entry = indexed_files.get(csv_file.name)
+        if (
+            entry is not None
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and entry["size"] == stat.st_size
+        ):
+            files[csv_file.name] = entry
+        else:
+            outdated.append((csv_file, stat, entry))
+
+    if outdated:
+        with ThreadPoolExecutor(max_workers=min(len(outdated), 8)) as executor:
+            entries = executor.map(lambda args: _index_file(*args, read_file), outdated)
+            for (csv_file, _, _), entry in zip(outdated, entries):
+                files[csv_file.name] = entry
+
+    if index is not None and (outdated or files.keys() != indexed_files.keys()):
+        index.set(index_key, files)
+
+    return files
+
+
+def _index_file(
+    csv_file: Path,
+    stat: os.stat_result,
+    entry: Optional[Dict[str, Any]],
+    read_file: Callable[[Path], Any],
+) -> Dict[str, Any]:
+    """
+    Create the index entry of a new or modified CSV file.
+
+    Args:
+        csv_file: The CSV file.
+        stat: The current file status of the CSV file.
+        entry: The previous index entry of the file, None if the file is new.
+        read_file: Function returning the keys of the file.
+
+    Returns:
+        The index entry, containing the file status, content hash and keys.
+    """
+    digest = _file_hash(csv_file)
+    if entry is not None and entry["sha256"] == digest:
+        # Only the file status changed (e.g. the file was touched), the content is the same
+        keys = entry["keys"]
+    else:
+        keys = read_file(csv_file)
+
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest,
+        "keys": keys,
+    }
+
+
+def _file_hash(path: Path) -> str:
+    """Return the SHA-256 hash of the file content, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_keys(csv_file: Path) -> List[str]:
+    """Return the normalized English texts of the CSV file, reading it row by row"""
+    with open(csv_file, "r", newline="", encoding="utf-8") as file:
+        return list(
+            dict.fromkeys(normalize_key(row[0]) for row in csv.reader(file) if row)
+        )
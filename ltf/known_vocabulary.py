@@ -0,0 +1,117 @@
+"""
+Digest of the already known flashcards, passed into the prompt so the LLM does not generate them again.
+
+The English texts of the exclusion directory are ranked by how well their words are covered by the transcript,
+since only texts taught in the lesson can be extracted again. The best ranked texts are added until the token
+budget is used up. The exclusion after the LLM call stays in place for everything the LLM still generates.
+"""
+
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from ltf.metrics import metrics
+from ltf.rate_limit import CHARS_PER_TOKEN
+
+WORD_PATTERN = re.compile(r"[\w']+")
+# Shorter words like "to", "I" or "is" occur in every lesson and say nothing about the relevance of a text
+MIN_CONTENT_WORD_LENGTH = 3
+# Minimum share of the content words of a known text, which have to occur in the transcript
+MIN_COVERAGE = 0.5
+SECTION_HEADER = (
+    "*** Already Known ***\n"
+    "The student already has flashcards for the following English words and sentences. "
+    "Do not extract them again:\n"
+)
+
+
+def words(text: str) -> FrozenSet[str]:
+    """Return the lowercase words of a text"""
+    return frozenset(WORD_PATTERN.findall(text.lower()))
+
+
+def content_words(text: str) -> FrozenSet[str]:
+    """Return the lowercase words of a text, which are long enough to tell texts apart. All words of short texts"""
+    all_words = words(text)
+    return (
+        frozenset(word for word in all_words if len(word) >= MIN_CONTENT_WORD_LENGTH)
+        or all_words
+    )
+
+
+class KnownVocabulary:
+    """
+    English texts of the existing flashcards, of which the most relevant are added to the prompt of a lesson.
+    """
+
+    def __init__(self, known_keys: Iterable[str], token_budget: int):
+        """
+        Initialize the KnownVocabulary class
+
+        Args:
+            known_keys: Normalized English texts of the existing flashcards, see exclusion.load_english_keys
+            token_budget: Maximum number of tokens of the known texts in a single prompt
+        """
+        self.token_budget = token_budget
+        self._keys: List[Tuple[str, FrozenSet[str]]] = [
+            (key, key_words)
+            for key in sorted(set(known_keys))
+            if (key_words := content_words(key))
+        ]
+        self._sections: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def digest(self, transcript: str) -> List[str]:
+        """
+        Return the known texts most relevant for the transcript, within the token budget
+
+        Args:
+            transcript: The transcript or a part of it
+
+        Returns:
+            The known texts, most relevant first: the texts with the highest share of content words occurring in
+            the transcript, and of these the shortest, which are the most likely to be extracted again
+        """
+        transcript_words = words(transcript)
+        ranked = []
+        for key, key_words in self._keys:
+            coverage = len(key_words & transcript_words) / len(key_words)
+            if coverage >= MIN_COVERAGE:
+                ranked.append((-coverage, len(key), key))
+        ranked.sort()
+
+        digest = []
+        # Every text is written on its own line
+        remaining_chars = self.token_budget * CHARS_PER_TOKEN
+        for _, _, key in ranked:
+            remaining_chars -= len(key) + 1
+            if remaining_chars < 0:
+                break
+            digest.append(key)
+        return digest
+
+    def prompt_section(self, transcript: str) -> str:
+        """
+        Return the section of the prompt listing the known texts, which is computed once per transcript
+
+        Args:
+            transcript: The transcript or a part of it
+
+        Returns:
+            The section, ending with an empty line. An empty string, if no known text is relevant
+        """
+        with self._lock:
+            section = self._sections.get(transcript)
+        if section is not None:
+            return section
+
+        with metrics.span("known_vocabulary_digest"):
+            digest = self.digest(transcript)
+        metrics.increment("known_vocabulary_items", len(digest))
+        section = SECTION_HEADER + "\n".join(digest) + "\n\n" if digest else ""
+        with self._lock:
+            self._sections[transcript] = section
+        return section
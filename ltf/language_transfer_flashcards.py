@@ -1,17 +1,59 @@
-from typing import Union
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
 
 import typer
+from langchain_core.exceptions import OutputParserException
 from langchain_core.prompt_values import PromptValue
 from langchain_core.prompts import PromptTemplate
+from langchain_core.pydantic_v1 import ValidationError
 from langchain_core.runnables import RunnableSerializable
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langchain_openai import ChatOpenAI
-from openai import AuthenticationError, NotFoundError
+from openai import AuthenticationError, NotFoundError, RateLimitError
 from rich import print
 
 from ltf import YoutubeTranscript
-from ltf import utils
+from ltf import cascade, chunking, corpus, streaming, sync, utils, youtube_fetch
+from ltf.anki import AnkiPackage
+from ltf.cache import (
+    DiskCache,
+    flashcard_cache,
+    flashcard_cache_key,
+    transcript_cache,
+)
+from ltf.compression import CompressionResult, compress_transcript
 from ltf.config import settings
-from ltf.models import FlashcardSet
+from ltf.callbacks import TokenUsageHandler
+from ltf.known_vocabulary import KnownVocabulary
+from ltf.llm import Backend
+from ltf.local_transcript import LocalTranscript
+from ltf.metrics import metrics
+from ltf.models import CompactFlashcardSet, Flashcard, FlashcardSet
+from ltf.rate_limit import RateLimiter, estimate_tokens, shared_rate_limiter
+
+
+@lru_cache(maxsize=None)
+def compiled_prompt_template() -> PromptTemplate:
+    """
+    Return the prompt template, which is loaded and parsed once and shared by all lessons of the process.
+
+    The template starts with the static instructions and ends with the lesson specific variables, so the
+    prompts of all lessons share the same prefix. The LLM provider can only cache a prompt of at least its
+    minimum length (1024 tokens for OpenAI), which a rendered lesson reaches, but the instructions alone do not.
+    """
+    return PromptTemplate(
+        template=utils.load_template(),
+        input_variables=[
+            "video_title",
+            "target_language",
+            "known_vocabulary",
+            "youtube_transcript",
+        ],
+    )
 
 
 class LanguageTransferFlashcards:
@@ -22,20 +64,78 @@ class LanguageTransferFlashcards:
     process them with a language model, and generate flashcards.
     """
 
-    def __init__(self, url: str, target_language: str):
+    def __init__(
+        self,
+        url: str,
+        target_language: str,
+        use_cache: bool = True,
+        transcript: Optional[LocalTranscript] = None,
+        compress: Optional[bool] = None,
+    ):
         """
         Initialize the LanguageTransferFlashcards class
 
         Args:
-            url: URL of the YouTube video
+            url: URL of the YouTube video, or the path of the local transcript file
             target_language: The language that is taught in the YouTube video
+            use_cache: Whether to load the transcript from the local cache, if available
+            transcript: Transcript read from a local file. If given, nothing is downloaded from YouTube
+            compress: Whether to remove fillers and repetitions from the transcript. If None, takes value from
+                .env file
         """
-        self.title, self.transcript = YoutubeTranscript().download_from_url(url)
+        self.url = url
         self.target_language = target_language
-        self.prompt_template = PromptTemplate(
-            template=utils.load_template(),
-            input_variables=["video_title", "target_language", "youtube_transcript"],
+        self.local = transcript is not None
+        # Already known flashcards passed into the prompt, see use_known_vocabulary
+        self.known_vocabulary: Optional[KnownVocabulary] = None
+        # Whether the LLM generates the compact pairs of CompactFlashcardSet instead of FlashcardSet objects
+        self.compact_schema = settings.COMPACT_OUTPUT_SCHEMA
+        # Stronger model for the lessons and chunks, whose flashcards fail the checks of ltf.cascade
+        self.escalation_llm: Optional[ChatOpenAI] = None
+        with metrics.span("template_load"):
+            self.prompt_template = compiled_prompt_template()
+        if transcript is not None:
+            self.title, self.transcript = transcript.title, transcript.transcript
+        else:
+            self.title, self.transcript = self._download_transcript(url, use_cache)
+
+        self.compression: Optional[CompressionResult] = None
+        if settings.TRANSCRIPT_COMPRESSION if compress is None else compress:
+            self._compress_transcript()
+
+    @staticmethod
+    def _download_transcript(url: str, use_cache: bool) -> Tuple[str, str]:
+        """
+        Download the title and transcript of the YouTube video
+
+        Args:
+            url: URL of the YouTube video
+            use_cache: Whether to load the transcript from the local cache, if available
+
+        Returns:
+            The title and the cleaned transcript
+        """
+        youtube_transcript = YoutubeTranscript(
+            cache=transcript_cache() if use_cache else None,
+            http_backend=(
+                youtube_fetch.default_backend()
+                if settings.FAST_TRANSCRIPT_FETCH
+                else None
+            ),
+            fetch_title=settings.FETCH_VIDEO_TITLE,
         )
+        with metrics.span("transcript_fetch"):
+            return youtube_transcript.download_from_url(url)
+
+    def _compress_transcript(self) -> None:
+        """Remove fillers and repetitions from the transcript, before it is passed into any prompt"""
+        with metrics.span("transcript_compression"):
+            self.compression = compress_transcript(
+                self.transcript, target_language=self.target_language
+            )
+        self.transcript = self.compression.transcript
+        metrics.increment("transcript_tokens", self.compression.tokens_before)
+        metrics.increment("compressed_transcript_tokens", self.compression.tokens_after)
 
     def _get_chain(self, llm: ChatOpenAI) -> RunnableSerializable:
         """
@@ -47,60 +147,386 @@ class LanguageTransferFlashcards:
         Returns:
             LLM chain
         """
-        structured_output_llm = llm.with_structured_output(FlashcardSet)
-        return self.prompt_template | structured_output_llm
+        if not self.compact_schema:
+            return self.prompt_template | llm.with_structured_output(FlashcardSet)
+
+        # The LLM generates the short pairs, which are decoded into the regular flashcards
+        structured_output_llm = llm.with_structured_output(CompactFlashcardSet)
+        return (
+            self.prompt_template
+            | structured_output_llm
+            | CompactFlashcardSet.to_flashcard_set
+        )
 
     def _invoke(
-        self, obj_to_invoke: Union[RunnableSerializable, PromptTemplate]
+        self,
+        obj_to_invoke: Union[RunnableSerializable, PromptTemplate],
+        transcript: Optional[str] = None,
     ) -> Union[FlashcardSet, PromptValue]:
         """
         Inject variables into the LLM chain or prompt template
 
         Args:
             obj_to_invoke: LLM chain or prompt template
+            transcript: Part of the transcript to inject. If None, the whole transcript is used
 
         Returns:
             The output of the LLM chain or the prompt template
         """
         return obj_to_invoke.invoke(
-            {
-                "video_title": self.title,
-                "target_language": self.target_language,
-                "youtube_transcript": self.transcript,
-            }
+            self._inputs(self.transcript if transcript is None else transcript),
+            config={"callbacks": [TokenUsageHandler(metrics)]},
         )
 
-    def _create_flashcards(self, llm: ChatOpenAI) -> FlashcardSet:
+    def render_prompt(self, transcript: Optional[str] = None) -> str:
+        """
+        Return the final prompt, containing the video title, target language and transcript
+
+        Args:
+            transcript: Part of the transcript to inject. If None, the whole transcript is used
+
+        Returns:
+            The prompt as string
+        """
+        with metrics.span("prompt_render"):
+            return self._invoke(self.prompt_template, transcript).text
+
+    def _inputs(self, transcript: str) -> Dict[str, str]:
+        """
+        Return the variables of the prompt template
+
+        Args:
+            transcript: The transcript or a part of it
+
+        Returns:
+            Mapping of the template variables to their values
+        """
+        return {
+            "video_title": self.title,
+            "target_language": self.target_language,
+            "known_vocabulary": (
+                self.known_vocabulary.prompt_section(transcript)
+                if self.known_vocabulary is not None
+                else ""
+            ),
+            "youtube_transcript": transcript,
+        }
+
+    def _create_flashcards(
+        self,
+        llm: ChatOpenAI,
+        llm_cache: Optional[DiskCache] = None,
+        chunk_size: int = 0,
+        chunk_overlap: int = 0,
+    ) -> FlashcardSet:
         """
         Create flashcards consisting of English and target language translations
 
+        If a chunk size is given, the transcript is split into overlapping windows, which are
+        processed in parallel. The flashcards of all windows are merged in lesson order.
+
         Args:
             llm: LLM model to use
+            llm_cache: Cache for the flashcards created by the LLM. If None, the LLM is always called
+            chunk_size: Number of transcript words per LLM call. If 0, the whole transcript is sent at once
+            chunk_overlap: Number of words shared by two consecutive chunks
 
         Returns:
             A set of flashcards
 
         Raises:
-            AuthenticationError: If OpenAI API key is invalid
+            typer.Abort: If the OpenAI API key is invalid, the model does not exist or the rate limit
+                is still exceeded after all retries
+        """
+        if not chunk_size:
+            return self._create_flashcards_for(llm, self.transcript, llm_cache)
+
+        chunks = chunking.split_transcript(
+            self.transcript, chunk_size=chunk_size, overlap=chunk_overlap
+        )
+        with ThreadPoolExecutor(
+            max_workers=min(len(chunks), settings.CHUNK_CONCURRENCY)
+        ) as executor:
+            flashcard_sets = executor.map(
+                lambda chunk: self._create_flashcards_for(llm, chunk, llm_cache),
+                chunks,
+            )
+            return chunking.merge_flashcard_sets(flashcard_sets)
+
+    def _create_flashcards_for(
+        self, llm: ChatOpenAI, transcript: str, llm_cache: Optional[DiskCache]
+    ) -> FlashcardSet:
+        """
+        Create flashcards for the transcript or a part of it
+
+        In cascade mode, the flashcards are created again by the escalation model, if the output of the LLM
+        does not match the schema or fails the checks of ltf.cascade.
+
+        Args:
+            llm: LLM model to use
+            transcript: The transcript or a part of it
+            llm_cache: Cache for the flashcards created by the LLM. If None, the LLM is always called
+
+        Returns:
+            A set of flashcards
         """
+        # Rendered once, for the cache keys and the rate limiter of all models
+        prompt = self.render_prompt(transcript)
+        if self.escalation_llm is None:
+            return self._cached_flashcards_for(llm, transcript, prompt, llm_cache)
+
+        # The LLM skips the already known texts listed in the prompt, so it creates fewer flashcards
+        known_vocabulary = self.known_vocabulary is not None and bool(
+            self.known_vocabulary.prompt_section(transcript)
+        )
         try:
-            return self._invoke(self._get_chain(llm=llm))
+            flashcards = self._cached_flashcards_for(llm, transcript, prompt, llm_cache)
+            with metrics.span("cascade_check"):
+                failures = cascade.check_flashcards(
+                    flashcards, transcript, known_vocabulary=known_vocabulary
+                )
+        except (OutputParserException, ValidationError) as error:
+            # Structured output, which does not match the schema
+            failures = [f"invalid output ({type(error).__name__})"]
+        if not failures:
+            return flashcards
+
+        metrics.increment("cascade_escalations")
+        print(
+            f"Escalating to [green bold]{self.escalation_llm.model_name}[/green bold]: "
+            + "; ".join(failures),
+            file=sys.stderr,
+        )
+        return self._cached_flashcards_for(
+            self.escalation_llm, transcript, prompt, llm_cache
+        )
+
+    def _cached_flashcards_for(
+        self,
+        llm: ChatOpenAI,
+        transcript: str,
+        prompt: str,
+        llm_cache: Optional[DiskCache],
+    ) -> FlashcardSet:
+        """
+        Create flashcards for the transcript or a part of it, reusing a cached result if available
+
+        Args:
+            llm: LLM model to use
+            transcript: The transcript or a part of it
+            prompt: The prompt rendered with the transcript
+            llm_cache: Cache for the flashcards created by the LLM. If None, the LLM is always called
+
+        Returns:
+            A set of flashcards
+        """
+        if llm_cache is None:
+            return self._call_llm(llm, transcript, prompt)
+
+        key = flashcard_cache_key(
+            prompt=prompt,
+            model_name=llm.model_name,
+            temperature=llm.temperature,
+        )
+        cached = llm_cache.get(key)
+        metrics.increment("llm_cache_hits" if cached else "llm_cache_misses")
+        if cached is not None:
+            return FlashcardSet.parse_obj(cached)
+
+        flashcards = self._call_llm(llm, transcript, prompt)
+        llm_cache.set(key, flashcards.dict())
+        return flashcards
+
+    def _call_llm(
+        self, llm: ChatOpenAI, transcript: str, prompt: Optional[str] = None
+    ) -> FlashcardSet:
+        """
+        Call the LLM chain and translate OpenAI errors into user-friendly messages
+
+        Args:
+            llm: LLM model to use
+            transcript: The transcript or a part of it
+            prompt: The prompt rendered with the transcript, to estimate its tokens. If None, it is rendered
+
+        Returns:
+            A set of flashcards
+
+        Raises:
+            typer.Abort: If the OpenAI API key is invalid, the model does not exist or the rate limit
+                is still exceeded after all retries
+        """
+        chain = self._get_chain(llm=llm)
+        if prompt is None:
+            prompt = self.render_prompt(transcript)
+
+        def invoke() -> FlashcardSet:
+            with metrics.span("llm_call"):
+                return self._invoke(chain, transcript)
+
+        with self._handle_openai_errors(llm):
+            return self._rate_limiter().call(invoke, tokens=estimate_tokens(prompt))
+
+    @staticmethod
+    def _rate_limiter() -> RateLimiter:
+        """Return the rate limiter shared by all LLM calls of the process, configured by the .env file"""
+        return shared_rate_limiter(
+            settings.LLM_REQUESTS_PER_MINUTE,
+            settings.LLM_TOKENS_PER_MINUTE,
+            settings.LLM_MAX_RETRIES,
+        )
+
+    @staticmethod
+    @contextmanager
+    def _handle_openai_errors(
+        llm: ChatOpenAI, file: Optional[TextIO] = None
+    ) -> Iterator[None]:
+        """
+        Translate OpenAI errors into user-friendly messages
+
+        Args:
+            llm: LLM model in use
+            file: The file to print the messages to. If None, prints to stdout
+
+        Raises:
+            typer.Abort: If the OpenAI API key is invalid, the model does not exist or the rate limit
+                is still exceeded after all retries
+        """
+        try:
+            yield
         except AuthenticationError:
             print(
                 "Incorrect API key provided!\n"
                 "You can find your API key at: https://platform.openai.com/account/api-keys.\n"
-                "Please update the value in your .env file."
+                "Please update the value in your .env file.",
+                file=file,
+            )
+            raise typer.Abort()
+        except RateLimitError as error:
+            print(
+                f"The rate limit or quota of your OpenAI account is exhausted: {error.message}\n"
+                "Lower the number of concurrent lessons or set LLM_REQUESTS_PER_MINUTE and LLM_TOKENS_PER_MINUTE "
+                "in your .env file.",
+                file=file,
             )
             raise typer.Abort()
         except NotFoundError:
             print(
                 f'The model "{llm.model_name}" does not exist or you do not have access to it.\n'
                 f"You can find all available models at: https://platform.openai.com/docs/models\n"
-                f"Please update the value in your .env file."
+                f"Please update the value in your .env file.",
+                file=file,
             )
             raise typer.Abort()
 
-    def run(self, model_name: str, api_key: str, delimiter: str, exclude: str) -> None:
+    def _stream_flashcards(
+        self,
+        llm: ChatOpenAI,
+        llm_cache: Optional[DiskCache] = None,
+        status_file: Optional[TextIO] = None,
+    ) -> Iterator[Flashcard]:
+        """
+        Yield every flashcard as soon as the LLM has finished generating it
+
+        Args:
+            llm: LLM model to use
+            llm_cache: Cache for the flashcards created by the LLM. If None, the LLM is always called
+            status_file: The file to print error messages to. If None, prints to stdout
+
+        Returns:
+            Iterator over the flashcards, in the order generated by the LLM
+        """
+        prompt = self.render_prompt()
+        key = None
+        if llm_cache is not None:
+            key = flashcard_cache_key(
+                prompt=prompt,
+                model_name=llm.model_name,
+                temperature=llm.temperature,
+            )
+            cached = llm_cache.get(key)
+            metrics.increment("llm_cache_hits" if cached else "llm_cache_misses")
+            if cached is not None:
+                yield from FlashcardSet.parse_obj(cached).flashcards
+                return
+
+        # A plain JSON schema makes the chain yield growing partial outputs instead of a single object
+        chain = self.prompt_template | llm.with_structured_output(
+            convert_to_openai_tool(
+                CompactFlashcardSet if self.compact_schema else FlashcardSet
+            )
+        )
+        flashcards = []
+        with self._handle_openai_errors(llm, status_file), metrics.span("llm_call"):
+            partial_outputs = self._rate_limiter().stream(
+                lambda: chain.stream(
+                    self._inputs(self.transcript),
+                    config={"callbacks": [TokenUsageHandler(metrics)]},
+                ),
+                tokens=estimate_tokens(prompt),
+            )
+            for flashcard in streaming.iter_completed_flashcards(
+                partial_outputs, compact=self.compact_schema
+            ):
+                flashcards.append(Flashcard(**flashcard))
+                yield flashcards[-1]
+
+        if llm_cache is not None:
+            llm_cache.set(key, FlashcardSet(flashcards=flashcards).dict())
+
+    @property
+    def filename(self) -> str:
+        """Filename (without extension) derived from the YouTube video title"""
+        return utils.clean_youtube_video_title(self.title)
+
+    @property
+    def video_id(self) -> str:
+        """ID of the YouTube video. Lessons read from a local file are identified by the file name"""
+        if self.local:
+            return f"file:{Path(self.url).name}"
+        return sync.video_id(self.url)
+
+    @property
+    def deck_name(self) -> str:
+        """Name of the Anki deck, a subdeck of the course deck of the target language"""
+        return (
+            f"Language Transfer {self.target_language}::{self.title.replace('::', ':')}"
+        )
+
+    def use_known_vocabulary(
+        self, exclude: str, token_budget: int, status_file: Optional[TextIO] = None
+    ) -> None:
+        """
+        Pass the most relevant English texts of the existing flashcards into the prompt, so the LLM skips them
+
+        Args:
+            exclude: Directory containing CSV files with words and sentences to exclude
+            token_budget: Maximum number of tokens of the known texts per prompt
+            status_file: The file to print status messages to. If None, prints to stdout
+        """
+        self.known_vocabulary = KnownVocabulary(
+            utils._load_existing_flashcards(exclude, file=status_file),
+            token_budget=token_budget,
+        )
+
+    def run(
+        self,
+        model_name: str,
+        api_key: str,
+        delimiter: str,
+        exclude: str,
+        use_llm_cache: bool = True,
+        chunk_size: int = 0,
+        chunk_overlap: int = 0,
+        stream: bool = False,
+        output: Optional[str] = None,
+        output_format: str = "csv",
+        backend: Optional[Backend] = None,
+        base_url: Optional[str] = None,
+        similarity_threshold: Optional[float] = None,
+        apkg: bool = False,
+        known_vocabulary_tokens: int = 0,
+        escalation_model_name: Optional[str] = None,
+    ) -> None:
         """
         Create Flashcards from YouTube video and save them as CSV file
 
@@ -109,27 +535,326 @@ class LanguageTransferFlashcards:
             api_key: OpenAI API key
             delimiter: Delimiter to use in CSV file
             exclude: Directory containing CSV files with words and sentences to exclude
+            use_llm_cache: Whether to reuse flashcards of a previous run with the same prompt and model
+            chunk_size: Number of transcript words per LLM call. If 0, the whole transcript is sent at once
+            chunk_overlap: Number of words shared by two consecutive chunks
+            stream: Whether to write every flashcard as soon as the LLM has generated it
+            output: Path of the output file or "-" for stdout. Only used in streaming mode.
+                If None, the file is named after the YouTube video title
+            output_format: Either "csv" or "jsonl". Only used in streaming mode
+            backend: The backend serving the model. If None, takes value from .env file
+            base_url: URL of an OpenAI-compatible API. If None, takes value from .env file or the default of the backend
+            similarity_threshold: If set, also exclude near-duplicates of the existing flashcards with at least
+                this similarity (between 0 and 1). Not supported in streaming mode
+            apkg: Whether to save the flashcards as Anki package instead of CSV file. Not supported in streaming mode
+            known_vocabulary_tokens: If set, up to this many tokens of the existing flashcards in the exclude
+                directory are passed into the prompt, so the LLM does not generate them again
+            escalation_model_name: If set, the flashcards of the model are checked locally, and lessons or chunks
+                failing the checks are sent to this stronger model. Not supported in streaming mode
         """
+        # Keep stdout clean for the flashcards, when they are written to stdout
+        status_file = sys.stderr if output == "-" else None
+
         llm = utils.initialize_llm(
             api_key=api_key if api_key else settings.OPENAI_API_KEY,
             model_name=model_name if model_name else settings.OPENAI_MODEL_NAME,
+            backend=backend,
+            base_url=base_url,
+        )
+        if escalation_model_name:
+            self.escalation_llm = utils.initialize_llm(
+                api_key=api_key if api_key else settings.OPENAI_API_KEY,
+                model_name=escalation_model_name,
+                backend=backend,
+                base_url=base_url,
+            )
+            print(
+                f"Using: [green bold]{llm.model_name}[/green bold], escalating to "
+                f"[green bold]{self.escalation_llm.model_name}[/green bold]\n",
+                file=status_file,
+            )
+        else:
+            print(
+                f"Using: [green bold]{llm.model_name}[/green bold]\n", file=status_file
+            )
+        if self.compression is not None:
+            print(
+                f"Transcript compressed from {self.compression.tokens_before} to "
+                f"{self.compression.tokens_after} tokens (-{self.compression.reduction:.0%})\n",
+                file=status_file,
+            )
+
+        if exclude and known_vocabulary_tokens:
+            self.use_known_vocabulary(
+                exclude, token_budget=known_vocabulary_tokens, status_file=status_file
+            )
+
+        llm_cache = flashcard_cache() if use_llm_cache else None
+        if stream:
+            self.stream_flashcards(
+                llm=llm,
+                delimiter=delimiter,
+                exclude=exclude,
+                output=output,
+                output_format=output_format,
+                llm_cache=llm_cache,
+            )
+        elif apkg:
+            self.create_apkg(
+                llm=llm,
+                exclude=exclude,
+                llm_cache=llm_cache,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                similarity_threshold=similarity_threshold,
+            )
+        else:
+            self.create_csv(
+                llm=llm,
+                delimiter=delimiter,
+                exclude=exclude,
+                llm_cache=llm_cache,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                similarity_threshold=similarity_threshold,
+            )
+        if llm_cache is not None:
+            utils.show_cache_statistics(llm_cache, file=status_file)
+        utils.show_prompt_cache_statistics(file=status_file)
+
+    def create_flashcards(
+        self,
+        llm: ChatOpenAI,
+        llm_cache: Optional[DiskCache] = None,
+        chunk_size: int = 0,
+        chunk_overlap: int = 0,
+    ) -> FlashcardSet:
+        """
+        Create Flashcards with an already initialized LLM and add them to the corpus, if it is enabled
+
+        Args:
+            llm: LLM model to use
+            llm_cache: Cache for the flashcards created by the LLM. If None, the LLM is always called
+            chunk_size: Number of transcript words per LLM call. If 0, the whole transcript is sent at once
+            chunk_overlap: Number of words shared by two consecutive chunks
+
+        Returns:
+            All flashcards of the lesson, before any exclusion
+        """
+        flashcards = self._create_flashcards(
+            llm=llm,
+            llm_cache=llm_cache,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
         )
-        print(f"Using: [green bold]{llm.model_name}[/green bold]\n")
+        metrics.increment("flashcards", len(flashcards.flashcards))
+        self._add_to_corpus(flashcards.flashcards)
+        return flashcards
+
+    def create_csv(
+        self,
+        llm: ChatOpenAI,
+        delimiter: str,
+        exclude: str,
+        llm_cache: Optional[DiskCache] = None,
+        chunk_size: int = 0,
+        chunk_overlap: int = 0,
+        similarity_threshold: Optional[float] = None,
+    ) -> str:
+        """
+        Create Flashcards with an already initialized LLM and save them as CSV file
+
+        Args:
+            llm: LLM model to use
+            delimiter: Delimiter to use in CSV file
+            exclude: Directory containing CSV files with words and sentences to exclude
+            llm_cache: Cache for the flashcards created by the LLM. If None, the LLM is always called
+            chunk_size: Number of transcript words per LLM call. If 0, the whole transcript is sent at once
+            chunk_overlap: Number of words shared by two consecutive chunks
+            similarity_threshold: If set, also exclude near-duplicates of the existing flashcards with at least
+                this similarity (between 0 and 1)
 
-        flashcards = self._create_flashcards(llm=llm)
+        Returns:
+            The name of the created CSV file
+        """
+        flashcards = self.create_flashcards(
+            llm=llm,
+            llm_cache=llm_cache,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
 
+        filename = f"{self.filename}.csv"
         utils.save_flashcards_as_csv(
             flashcards,
-            filename=f"{utils.clean_youtube_video_title(self.title)}.csv",
+            filename=filename,
             delimiter=delimiter,
             exclude=exclude,
+            similarity_threshold=similarity_threshold,
+        )
+        return filename
+
+    def create_apkg(
+        self,
+        llm: ChatOpenAI,
+        exclude: str,
+        llm_cache: Optional[DiskCache] = None,
+        chunk_size: int = 0,
+        chunk_overlap: int = 0,
+        similarity_threshold: Optional[float] = None,
+    ) -> str:
+        """
+        Create Flashcards with an already initialized LLM and save them as Anki package
+
+        Args:
+            llm: LLM model to use
+            exclude: Directory containing CSV files with words and sentences to exclude
+            llm_cache: Cache for the flashcards created by the LLM. If None, the LLM is always called
+            chunk_size: Number of transcript words per LLM call. If 0, the whole transcript is sent at once
+            chunk_overlap: Number of words shared by two consecutive chunks
+            similarity_threshold: If set, also exclude near-duplicates of the existing flashcards with at least
+                this similarity (between 0 and 1)
+
+        Returns:
+            The name of the created .apkg file
+        """
+        package = AnkiPackage(namespace=self.target_language)
+        self.add_to_package(
+            llm=llm,
+            package=package,
+            exclude=exclude,
+            llm_cache=llm_cache,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            similarity_threshold=similarity_threshold,
+        )
+
+        filename = f"{self.filename}.apkg"
+        package.write(filename)
+        utils._show_file_location(filename)
+        return filename
+
+    def add_to_package(
+        self,
+        llm: ChatOpenAI,
+        package: AnkiPackage,
+        exclude: str,
+        llm_cache: Optional[DiskCache] = None,
+        chunk_size: int = 0,
+        chunk_overlap: int = 0,
+        similarity_threshold: Optional[float] = None,
+    ) -> str:
+        """
+        Create Flashcards with an already initialized LLM and add them as deck to an Anki package,
+        e.g. to pack a whole course into a single package
+
+        Args:
+            llm: LLM model to use
+            package: The Anki package. It is not written, to allow adding further lessons
+            exclude: Directory containing CSV files with words and sentences to exclude
+            llm_cache: Cache for the flashcards created by the LLM. If None, the LLM is always called
+            chunk_size: Number of transcript words per LLM call. If 0, the whole transcript is sent at once
+            chunk_overlap: Number of words shared by two consecutive chunks
+            similarity_threshold: If set, also exclude near-duplicates of the existing flashcards with at least
+                this similarity (between 0 and 1)
+
+        Returns:
+            The name of the deck
+        """
+        flashcards = self.create_flashcards(
+            llm=llm,
+            llm_cache=llm_cache,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+
+        utils.add_flashcards_to_package(
+            flashcards,
+            package=package,
+            deck_name=self.deck_name,
+            exclude=exclude,
+            similarity_threshold=similarity_threshold,
+        )
+        return self.deck_name
+
+    def stream_flashcards(
+        self,
+        llm: ChatOpenAI,
+        delimiter: str,
+        exclude: str,
+        output: Optional[str] = None,
+        output_format: str = "csv",
+        llm_cache: Optional[DiskCache] = None,
+    ) -> str:
+        """
+        Create Flashcards and write each of them as soon as the LLM has generated it
+
+        Args:
+            llm: LLM model to use
+            delimiter: Delimiter to use in CSV format
+            exclude: Directory containing CSV files with words and sentences to exclude
+            output: Path of the output file or "-" for stdout. If None, the file is named after the YouTube video title
+            output_format: Either "csv" or "jsonl"
+            llm_cache: Cache for the flashcards created by the LLM. If None, the LLM is always called
+
+        Returns:
+            The path of the created file or "-" for stdout
+        """
+        output = output or f"{self.filename}.{output_format}"
+        # Keep stdout clean for the flashcards, when they are written to stdout
+        status_file = sys.stderr if output == "-" else None
+        excluded_keys = (
+            utils._load_existing_flashcards(exclude, file=status_file)
+            if exclude
+            else set()
         )
 
+        with streaming.FlashcardWriter(
+            output,
+            delimiter=delimiter,
+            output_format=output_format,
+            excluded_keys=excluded_keys,
+            flush=True,
+        ) as writer:
+            flashcards = []
+            for flashcard in self._stream_flashcards(llm, llm_cache, status_file):
+                metrics.increment("flashcards")
+                writer.write(flashcard.english, flashcard.target_language)
+                flashcards.append(flashcard)
+        self._add_to_corpus(flashcards)
+        metrics.increment("written_flashcards", writer.written)
+        metrics.increment("excluded_flashcards", writer.excluded)
+
+        if output != "-":
+            utils._show_file_location(output)
+        return output
+
+    def _add_to_corpus(self, flashcards: List[Flashcard]) -> None:
+        """
+        Store all created flashcards of the lesson in the corpus, if it is enabled
+
+        Args:
+            flashcards: The flashcards in lesson order, before any exclusion
+        """
+        store = corpus.default_store()
+        if store is None:
+            return
+        with metrics.span("corpus_write"):
+            store.add_lesson(
+                video_id=self.video_id,
+                title=self.title,
+                target_language=self.target_language,
+                flashcards=(
+                    (flashcard.english, flashcard.target_language)
+                    for flashcard in flashcards
+                ),
+            )
+
     def save_prompt(self) -> None:
         """Create final prompt and save it as text file."""
-        prompt_as_string = self._invoke(self.prompt_template).text
+        prompt_as_string = self.render_prompt()
 
         utils.save_prompt_as_txt(
             prompt_as_string,
-            filename=f"{utils.clean_youtube_video_title(self.title)}.txt",
+            filename=f"{self.filename}.txt",
         )
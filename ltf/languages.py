@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class AvailableTargetLanguages(str, Enum):
+    """Enum containing all available target languages."""
+
+    ARABIC = "Arabic"
+    FRENCH = "French"
+    GERMAN = "German"
+    GREEK = "Greek"
+    ITALIAN = "Italian"
+    SPANISH = "Spanish"
+    SWAHILI = "Swahili"
+    TURKISH = "Turkish"
@@ -0,0 +1,92 @@
+from enum import Enum
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+
+class Backend(str, Enum):
+    """Enum containing all supported LLM backends. Local backends have to serve an OpenAI-compatible API."""
+
+    OPENAI = "openai"
+    OLLAMA = "ollama"
+    LLAMA_CPP = "llama.cpp"
+    VLLM = "vllm"
+
+
+# Default URLs of the OpenAI-compatible endpoints of the local servers
+DEFAULT_BASE_URLS = {
+    Backend.OPENAI: None,
+    Backend.OLLAMA: "http://localhost:11434/v1",
+    Backend.LLAMA_CPP: "http://localhost:8080/v1",
+    Backend.VLLM: "http://localhost:8000/v1",
+}
+
+# Local servers do not check the API key, but the OpenAI client requires one
+LOCAL_API_KEY = "not-needed"
+
+
+@lru_cache(maxsize=None)
+def shared_http_client(timeout: float, max_connections: int) -> "httpx.Client":
+    """
+    Return a keep-alive HTTP client, shared by all LLM instances with the same settings in this process
+
+    Reusing the client reuses its connection pool, so consecutive LLM calls skip the TCP and TLS handshake.
+
+    Args:
+        timeout: Timeout of a single request in seconds
+        max_connections: Maximum number of open connections
+
+    Returns:
+        HTTP client with a connection pool
+    """
+    import httpx
+
+    return httpx.Client(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60,
+        ),
+    )
+
+
+def create_chat_model(
+    model_name: str,
+    api_key: Optional[str],
+    backend: Backend = Backend.OPENAI,
+    base_url: Optional[str] = None,
+    timeout: float = 120,
+    max_connections: int = 20,
+) -> "ChatOpenAI":
+    """
+    Return a chat model for the backend, using the shared connection pool
+
+    Args:
+        model_name: Name of the model, e.g. "gpt-4o" or "llama3.1" for Ollama
+        api_key: API key. Not required for local backends
+        backend: The backend serving the model
+        base_url: URL of the OpenAI-compatible API. If None, the default URL of the backend is used
+        timeout: Timeout of a single request in seconds
+        max_connections: Maximum number of open connections to the backend
+
+    Returns:
+        LLM instance
+    """
+    from langchain_openai import ChatOpenAI
+
+    backend = Backend(backend)
+    return ChatOpenAI(
+        model_name=model_name,
+        api_key=api_key or (None if backend == Backend.OPENAI else LOCAL_API_KEY),
+        base_url=base_url or DEFAULT_BASE_URLS[backend],
+        temperature=0,
+        # Report the token usage of streamed responses, not supported by all local servers
+        stream_usage=backend == Backend.OPENAI,
+        # Retries are scheduled by the shared rate limiter, see ltf.rate_limit
+        max_retries=0,
+        http_client=shared_http_client(timeout, max_connections),
+    )
@@ -0,0 +1,212 @@
+"""
+Read lesson transcripts from local subtitle files instead of YouTube.
+
+Supported are WebVTT (.vtt), SubRip (.srt), plain text (.txt) and JSON (.json) files. JSON files contain either the
+segments in the format of the youtube-transcript-api, or an object with a "title" and the "segments" or the
+"transcript" text. Files are read line by line and cleaned the same way as downloaded transcripts.
+"""
+
+import json
+import re
+from html import unescape
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+from ltf.transcript_pipeline import Segment, clean_text, join_segments
+
+SUPPORTED_SUFFIXES = (".vtt", ".srt", ".txt", ".json")
+# Formatting tags and the word timestamps of auto-generated WebVTT files, e.g. "<c>" or "<00:00:01.520>"
+TAG_PATTERN = re.compile(r"<[^>]*>")
+TIMING_SEPARATOR = "-->"
+
+
+class LocalTranscript(NamedTuple):
+    """Title and cleaned transcript of a lesson, read from a local file."""
+
+    path: Path
+    title: str
+    transcript: str
+
+
+def is_local_source(source: str) -> bool:
+    """Return whether the source of a lesson is an existing local file or directory, rather than a URL"""
+    return "://" not in source and Path(source).exists()
+
+
+def transcript_files(path: Union[str, Path]) -> List[Path]:
+    """
+    Return the supported transcript files of a path
+
+    Args:
+        path: A transcript file or a directory containing transcript files. Subdirectories are ignored
+
+    Returns:
+        The transcript files, sorted by name
+
+    Raises:
+        ValueError: If the file is not supported, or the directory does not contain a supported file.
+    """
+    path = Path(path)
+    if path.is_dir():
+        files = sorted(
+            file
+            for file in path.iterdir()
+            if file.is_file() and file.suffix.lower() in SUPPORTED_SUFFIXES
+        )
+        if not files:
+            raise ValueError(
+                f'Directory "{path}" does not contain any transcript files ({", ".join(SUPPORTED_SUFFIXES)}).'
+            )
+        return files
+    if path.suffix.lower() not in SUPPORTED_SUFFIXES:
+        raise ValueError(
+            f'"{path.name}" is not a supported transcript file ({", ".join(SUPPORTED_SUFFIXES)}).'
+        )
+    return [path]
+
+
+def iter_transcripts(path: Union[str, Path]) -> Iterator[LocalTranscript]:
+    """
+    Read the transcripts of a file or of all files in a directory, one file at a time
+
+    Args:
+        path: A transcript file or a directory containing transcript files
+
+    Returns:
+        Iterator over the transcripts, sorted by file name
+
+    Raises:
+        ValueError: If the file is not supported, or the directory does not contain a supported file.
+    """
+    # Validate eagerly, so an unsupported path fails before the first lesson is processed
+    files = transcript_files(path)
+    return (read_transcript(file) for file in files)
+
+
+def read_transcript(path: Union[str, Path]) -> LocalTranscript:
+    """
+    Read the title and transcript of a lesson from a local file
+
+    Args:
+        path: The transcript file. The file name without extension is used as title, unless a JSON file has one
+
+    Returns:
+        The title and cleaned transcript, in the same shape as downloaded from YouTube
+
+    Raises:
+        ValueError: If the file is not supported or does not contain any text.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    title = path.stem
+    # utf-8-sig removes the byte order mark written by many subtitle editors
+    with open(path, encoding="utf-8-sig") as file:
+        if suffix == ".json":
+            title, segments = parse_json(json.load(file), default_title=title)
+        elif suffix in (".vtt", ".srt"):
+            segments = parse_cues(file)
+        elif suffix == ".txt":
+            segments = parse_text(file)
+        else:
+            raise ValueError(
+                f'"{path.name}" is not a supported transcript file ({", ".join(SUPPORTED_SUFFIXES)}).'
+            )
+        transcript = clean_text(join_segments(segments)).strip()
+
+    if not transcript:
+        raise ValueError(f'"{path.name}" does not contain a transcript.')
+    return LocalTranscript(path, clean_text(title).strip(), transcript)
+
+
+def parse_cues(lines: Iterable[str]) -> Iterator[Segment]:
+    """
+    Parse the cues of a WebVTT or SubRip file. Headers, cue numbers, notes and styles are skipped
+
+    Auto-generated WebVTT files repeat the previous line at the beginning of every cue, repeated lines are
+    only kept once.
+
+    Args:
+        lines: Lines of the file
+
+    Returns:
+        Iterator over the cue lines, with the start and duration of their cue
+    """
+    start = duration = 0.0
+    in_cue = False
+    previous_text = None
+    for line in lines:
+        line = line.strip()
+        if TIMING_SEPARATOR in line:
+            start_time, _, end_time = line.partition(TIMING_SEPARATOR)
+            start = parse_timestamp(start_time)
+            # WebVTT cue settings like "align:start position:0%" follow the end time
+            duration = max(parse_timestamp(end_time.split()[0]) - start, 0.0)
+            in_cue = True
+        elif not line:
+            in_cue = False
+        elif in_cue:
+            text = unescape(TAG_PATTERN.sub("", line)).strip()
+            if text and text != previous_text:
+                previous_text = text
+                yield Segment(text, start, duration)
+
+
+def parse_timestamp(timestamp: str) -> float:
+    """
+    Convert a WebVTT or SubRip timestamp to seconds
+
+    Args:
+        timestamp: Timestamp like "01:02:03,456", "01:02:03.456" or "02:03.456"
+
+    Returns:
+        The timestamp in seconds
+    """
+    seconds = 0.0
+    for part in timestamp.strip().replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_text(lines: Iterable[str]) -> Iterator[Segment]:
+    """Every line of a plain text file is a segment without timestamps"""
+    for line in lines:
+        if line.strip():
+            yield Segment(line, 0.0, 0.0)
+
+
+def parse_json(
+    content: Union[list, dict], default_title: str
+) -> Tuple[str, Iterator[Segment]]:
+    """
+    Parse the content of a JSON transcript file
+
+    Args:
+        content: Either a list of segments with "text", "start" and "duration", or an object with an optional
+            "title" and either the "segments" or the "transcript" text
+        default_title: Title to use, if the content does not contain one
+
+    Returns:
+        The title and the segments
+
+    Raises:
+        ValueError: If the content has none of the supported formats.
+    """
+    title = default_title
+    if isinstance(content, dict):
+        title = content.get("title") or default_title
+        if isinstance(content.get("transcript"), str):
+            return title, iter([Segment(content["transcript"], 0.0, 0.0)])
+        content = content.get("segments")
+    if not isinstance(content, list):
+        raise ValueError(
+            'A JSON transcript must be a list of segments or contain "segments" or a "transcript".'
+        )
+    return title, (
+        Segment(
+            segment["text"],
+            float(segment.get("start", 0.0)),
+            float(segment.get("duration", 0.0)),
+        )
+        for segment in content
+        if isinstance(segment, dict) and segment.get("text")
+    )
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Union
+
+from rich.table import Table
+
+
+class Metrics:
+    """
+    Collect the duration of every processing stage and counters (tokens, flashcards, cache hits) of a run.
+
+    Spans and counters can be recorded from several threads at the same time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Delete all recorded spans and counters."""
+        with self._lock:
+            self.spans: Dict[str, Dict[str, float]] = {}
+            self.counters: Counter = Counter()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Measure the duration of the enclosed block
+
+        Args:
+            name: Name of the stage, e.g. "llm_call"
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                span = self.spans.setdefault(
+                    name, {"count": 0, "total_s": 0.0, "max_s": 0.0}
+                )
+                span["count"] += 1
+                span["total_s"] += duration
+                span["max_s"] = max(span["max_s"], duration)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Increase a counter
+
+        Args:
+            name: Name of the counter, e.g. "input_tokens"
+            value: Value to add
+        """
+        if value:
+            with self._lock:
+                self.counters[name] += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return all spans and counters as JSON serializable dictionary"""
+        with self._lock:
+            return {
+                "spans": {
+                    name: {key: round(value, 6) for key, value in span.items()}
+                    for name, span in self.spans.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+    def summary_table(self) -> Table:
+        """Return the spans and counters as table, ready to be printed"""
+        metrics = self.to_dict()
+        table = Table(
+            "Stage / Counter", "Count", "Total [s]", "Max [s]", title="Metrics"
+        )
+        for name, span in metrics["spans"].items():
+            table.add_row(
+                name,
+                str(int(span["count"])),
+                f"{span['total_s']:.3f}",
+                f"{span['max_s']:.3f}",
+            )
+        for name, value in sorted(metrics["counters"].items()):
+            table.add_row(name, str(value), "", "")
+        return table
+
+    def write_jsonl(self, path: Union[Path, str], **context: Any) -> None:
+        """
+        Append the metrics of the run as a single JSON line to the file
+
+        Args:
+            path: Path of the JSON Lines file
+            context: Additional values to store, e.g. the command or model name
+        """
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            **context,
+            **self.to_dict(),
+        }
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+
+
+# Metrics of the current process
+metrics = Metrics()
@@ -0,0 +1,184 @@
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Maximum number of MinHash values per signature, split into bands of rows
+MAX_HASHES = 40
+# Minimum probability of two texts with exactly the threshold similarity to share at least one band. For the
+# threshold 0.8, this gives 10 bands of 4 rows: texts with a similarity of 0.8 share a band with a probability of
+# 99.5%, texts with a similarity of 0.4 only with 23%.
+MIN_CANDIDATE_PROBABILITY = 0.99
+
+NON_ALPHANUMERIC_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Return the text without case, diacritics and punctuation, e.g. "Café, please!" -> "cafe please"
+
+    Args:
+        text: English word, phrase or sentence
+
+    Returns:
+        The normalized text
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    if not text.isascii():
+        text = "".join(char for char in text if not unicodedata.combining(char))
+    return NON_ALPHANUMERIC_PATTERN.sub(" ", text).strip()
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """Return the character trigrams of a normalized text, including the word boundaries at both ends"""
+    padded = f" {normalized} "
+    return {a + b + c for a, b, c in zip(padded, padded[1:], padded[2:])}
+
+
+def banding(threshold: float) -> Tuple[int, int]:
+    """
+    Return the number of LSH bands and rows per band for a similarity threshold
+
+    More rows per band compare fewer dissimilar texts, but miss more near-duplicates. The most rows are used,
+    which still find texts with the threshold similarity with at least MIN_CANDIDATE_PROBABILITY.
+
+    Args:
+        threshold: Minimum Jaccard similarity (between 0 and 1) of two near-duplicates
+
+    Returns:
+        The number of bands and the number of rows per band
+    """
+    for rows in range(MAX_HASHES, 1, -1):
+        bands = MAX_HASHES // rows
+        if 1 - (1 - threshold**rows) ** bands >= MIN_CANDIDATE_PROBABILITY:
+            return bands, rows
+    return MAX_HASHES, 1
+
+
+def jaccard(first: Set[str], second: Set[str]) -> float:
+    """Return the Jaccard similarity of two sets"""
+    if not first or not second:
+        return 0.0
+    intersection = len(first & second)
+    return intersection / (len(first) + len(second) - intersection)
+
+
+class NearDuplicateIndex:
+    """
+    Find indexed texts similar to a given text, with MinHash signatures and locality-sensitive hashing.
+
+    Every text is split into character trigrams. Its MinHash signature is divided into bands and every band is
+    hashed into a bucket key. Only texts sharing at least one bucket are compared, so a lookup does not depend
+    on the number of indexed texts. Candidates are confirmed with their exact Jaccard similarity.
+    """
+
+    def __init__(self, threshold: float, seed: int = 0):
+        """
+        Initialize the NearDuplicateIndex class
+
+        Args:
+            threshold: Minimum Jaccard similarity (between 0 and 1) of the trigrams of two near-duplicates
+            seed: Seed of the MinHash permutations. Bucket keys are only comparable for the same seed
+        """
+        self.threshold = threshold
+        self.seed = seed
+        self.bands, self.rows = banding(threshold)
+        rng = random.Random(seed)
+        self._masks = [rng.getrandbits(32) for _ in range(self.bands * self.rows)]
+        # Permuted hashes per trigram. The number of distinct trigrams is small, so this stays small as well
+        self._permuted: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: Dict[int, List[int]] = {}
+        self._texts: List[str] = []
+        self._trigrams: List[Set[str]] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    @property
+    def namespace(self) -> str:
+        """Name of persisted bucket keys, which changes with the MinHash parameters"""
+        return f"near-duplicates-v2-{self.bands}x{self.rows}-{self.seed}"
+
+    def bucket_keys(self, normalized: str) -> List[int]:
+        """
+        Return the 32-bit LSH bucket keys of a normalized text
+
+        Args:
+            normalized: Text normalized with normalize_text
+
+        Returns:
+            One key per band, empty if the text contains no trigrams
+        """
+        rows = [self._permutations(trigram) for trigram in trigrams(normalized)]
+        signature = list(map(min, zip(*rows)))
+        band_format = f"<{self.rows + 1}I"
+        keys = []
+        for start in range(0, len(signature), self.rows):
+            end = start + self.rows
+            # Persisted in the index, so the hash has to be the same in every Python process and version
+            digest = hashlib.blake2b(
+                struct.pack(band_format, start, *signature[start:end]), digest_size=4
+            ).digest()
+            keys.append(int.from_bytes(digest, "little"))
+        return keys
+
+    def _permutations(self, trigram: str) -> Tuple[int, ...]:
+        permuted = self._permuted.get(trigram)
+        if permuted is None:
+            value = zlib.crc32(trigram.encode("utf-8"))
+            permuted = tuple(value ^ mask for mask in self._masks)
+            self._permuted[trigram] = permuted
+        return permuted
+
+    def add(self, normalized: str) -> None:
+        """
+        Add a normalized text to the index
+
+        Args:
+            normalized: Text normalized with normalize_text
+        """
+        if normalized in self._ids:
+            return
+        text_id = len(self._texts)
+        self._texts.append(normalized)
+        self._trigrams.append(trigrams(normalized))
+        self._ids[normalized] = text_id
+        for key in self.bucket_keys(normalized):
+            self._buckets.setdefault(key, []).append(text_id)
+
+    def shares_bucket(self, keys: Iterable[int]) -> bool:
+        """Return whether any of the bucket keys is used by an indexed text"""
+        return not self._buckets.keys().isdisjoint(keys)
+
+    def matches(
+        self, normalized: str, keys: Optional[Iterable[int]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Return all indexed texts, which are near-duplicates of the given text
+
+        Args:
+            normalized: Text normalized with normalize_text
+            keys: Precomputed bucket keys of the text. If None, they are computed
+
+        Returns:
+            The indexed texts and their similarity to the given text
+        """
+        candidates = {
+            text_id
+            for key in (self.bucket_keys(normalized) if keys is None else keys)
+            for text_id in self._buckets.get(key, ())
+        }
+        if not candidates:
+            return []
+
+        text_trigrams = trigrams(normalized)
+        matches = []
+        for text_id in candidates:
+            similarity = jaccard(text_trigrams, self._trigrams[text_id])
+            if similarity >= self.threshold:
+                matches.append((self._texts[text_id], similarity))
+        return matches
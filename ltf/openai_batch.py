@@ -0,0 +1,203 @@
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from openai import OpenAI
+from rich import print
+
+from ltf.models import FlashcardSet
+
+# Batch states after which the batch does not change anymore
+TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+# Terminal states with results: an expired batch keeps the results of the requests finished in time
+FINISHED_STATES = ("completed", "expired")
+
+
+class OpenAIBatch:
+    """
+    Create flashcards for many lessons with the OpenAI Batch API.
+
+    Batches are processed asynchronously within 24 hours at half the price of regular requests.
+    The prompts are rendered with the regular prompt template and the same FlashcardSet schema
+    is enforced via tool calling, so the results are identical to 'ltf csv'.
+    """
+
+    def __init__(
+        self,
+        client: OpenAI,
+        model_name: str,
+        poll_interval: float = 60,
+    ):
+        """
+        Initialize the OpenAIBatch class
+
+        Args:
+            client: OpenAI client, used to upload files and to create and poll batches
+            model_name: OpenAI model name to use
+            poll_interval: Seconds to wait between two status checks of the batch
+        """
+        self.client = client
+        self.model_name = model_name
+        self.poll_interval = poll_interval
+        self.tool = convert_to_openai_tool(FlashcardSet)
+
+    def build_request(self, custom_id: str, prompt: str) -> Dict[str, Any]:
+        """
+        Build a single request of the batch input file
+
+        Args:
+            custom_id: ID used to map the result back to the lesson
+            prompt: The rendered prompt of the lesson
+
+        Returns:
+            The request in the format expected by the Batch API
+        """
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.model_name,
+                "temperature": 0,
+                "messages": [{"role": "user", "content": prompt}],
+                "tools": [self.tool],
+                "tool_choice": {
+                    "type": "function",
+                    "function": {"name": self.tool["function"]["name"]},
+                },
+            },
+        }
+
+    def write_requests(
+        self, prompts: Iterable[Tuple[str, str]], path: Union[Path, str]
+    ) -> None:
+        """
+        Write the batch input file in JSON Lines format
+
+        Args:
+            prompts: Pairs of custom ID and rendered prompt
+            path: Path of the file to create
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            for custom_id, prompt in prompts:
+                file.write(json.dumps(self.build_request(custom_id, prompt)) + "\n")
+
+    def submit(self, path: Union[Path, str]) -> str:
+        """
+        Upload the batch input file and create the batch
+
+        Args:
+            path: Path of the batch input file
+
+        Returns:
+            ID of the created batch
+        """
+        with open(path, "rb") as file:
+            input_file = self.client.files.create(file=file, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def wait(self, batch_id: str) -> Any:
+        """
+        Poll the batch until it is finished
+
+        Args:
+            batch_id: ID of the batch
+
+        Returns:
+            The finished batch object. An expired batch is returned as well, its output file contains the
+            results of the requests finished within the completion window
+
+        Raises:
+            RuntimeError: If the batch failed or was cancelled
+        """
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in TERMINAL_STATES:
+                break
+            counts = getattr(batch, "request_counts", None)
+            progress = (
+                f" ({counts.completed}/{counts.total} requests)" if counts else ""
+            )
+            print(f"Batch {batch_id}: {batch.status}{progress}")
+            time.sleep(self.poll_interval)
+
+        if batch.status not in FINISHED_STATES:
+            errors = getattr(getattr(batch, "errors", None), "data", None) or []
+            raise RuntimeError(
+                f'Batch {batch_id} finished with status "{batch.status}".'
+                + "".join(f" {error.message}" for error in errors)
+            )
+        return batch
+
+    def results(self, batch: Any) -> Dict[str, Union[FlashcardSet, str]]:
+        """
+        Download the results of a completed batch
+
+        Args:
+            batch: The completed or expired batch object
+
+        Returns:
+            Mapping of custom ID to the created flashcards, or to an error message if the request failed
+        """
+        results = {}
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if file_id:
+                content = self.client.files.content(file_id).text
+                results.update(parse_results(content.splitlines()))
+        return results
+
+
+def parse_results(lines: Iterable[str]) -> Dict[str, Union[FlashcardSet, str]]:
+    """
+    Parse the lines of a batch output or error file
+
+    Args:
+        lines: Lines of the file in JSON Lines format
+
+    Returns:
+        Mapping of custom ID to the created flashcards, or to an error message if the request failed
+    """
+    results = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        custom_id = result["custom_id"]
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            error = result.get("error") or response.get("body", {}).get("error") or {}
+            results[custom_id] = error.get("message", "Request failed")
+            continue
+
+        try:
+            message = response["body"]["choices"][0]["message"]
+            arguments = message["tool_calls"][0]["function"]["arguments"]
+            results[custom_id] = FlashcardSet.parse_raw(arguments)
+        except (KeyError, IndexError, ValueError) as error:
+            results[custom_id] = f"Invalid response: {error}"
+    return results
+
+
+def unique_ids(names: Iterable[str]) -> List[str]:
+    """
+    Make the names unique, so they can be used as custom IDs
+
+    Args:
+        names: Names, e.g. the filenames of the lessons
+
+    Returns:
+        The names, with a numeric suffix added to duplicates
+    """
+    seen = {}
+    ids = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        ids.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return ids
@@ -0,0 +1,369 @@
+"""
+Admission control and retries for LLM calls.
+
+Every request reserves one request and its estimated tokens from two token buckets, refilled at the requests
+per minute (RPM) and tokens per minute (TPM) of the account. Concurrent lessons and chunks share the buckets,
+so they are spread evenly over the minute instead of running into the limits all at once.
+"""
+
+import math
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Callable, Iterator, Mapping, Optional, TypeVar
+
+from ltf.metrics import metrics
+
+T = TypeVar("T")
+
+# Rough number of characters per token of English text, good enough to estimate the cost of a request
+CHARS_PER_TOKEN = 4
+# Expected number of output tokens of a request, which count towards the TPM limit as well
+EXPECTED_OUTPUT_TOKENS = 1024
+# Buckets start with this many seconds of their rate, so the first requests are not delayed
+BURST_SECONDS = 10
+# Share of the limits reported by the API that is actually used, leaving room for other clients
+LIMIT_SAFETY_FACTOR = 0.95
+
+
+def estimate_tokens(
+    prompt: str, expected_output_tokens: int = EXPECTED_OUTPUT_TOKENS
+) -> int:
+    """
+    Estimate the tokens a request counts towards the TPM limit, without running a tokenizer
+
+    Args:
+        prompt: The rendered prompt
+        expected_output_tokens: Expected number of tokens of the response
+
+    Returns:
+        Estimated number of input and output tokens
+    """
+    return math.ceil(len(prompt) / CHARS_PER_TOKEN) + expected_output_tokens
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at a constant rate per minute, which may go into debt.
+
+    A caller reserves its amount at once and waits until the bucket is refilled to zero again. Reservations
+    are therefore served in order, and a single amount may be larger than the bucket itself.
+    """
+
+    def __init__(
+        self,
+        per_minute: Optional[float],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the TokenBucket class
+
+        Args:
+            per_minute: Refill rate per minute. If None, the bucket is unlimited
+            clock: Monotonic clock in seconds
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._updated = clock()
+        self.per_minute = None
+        self._tokens = 0.0
+        self.set_rate(per_minute)
+
+    def set_rate(self, per_minute: Optional[float]) -> None:
+        """
+        Change the refill rate. A new bucket or a bucket that was unlimited so far starts full
+
+        Args:
+            per_minute: Refill rate per minute. If None, the bucket is unlimited
+        """
+        with self._lock:
+            self._refill()
+            if self.per_minute is None and per_minute is not None:
+                self._tokens = self._capacity(per_minute)
+            elif per_minute is not None:
+                self._tokens = min(self._tokens, self._capacity(per_minute))
+            self.per_minute = per_minute
+
+    @staticmethod
+    def _capacity(per_minute: float) -> float:
+        return max(1.0, per_minute / 60 * BURST_SECONDS)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        if self.per_minute is not None:
+            self._tokens = min(
+                self._capacity(self.per_minute),
+                self._tokens + (now - self._updated) * self.per_minute / 60,
+            )
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take the amount out of the bucket
+
+        Args:
+            amount: Number of tokens to take
+
+        Returns:
+            Seconds to wait until the reservation is covered by the refill
+        """
+        with self._lock:
+            if self.per_minute is None:
+                return 0.0
+            self._refill()
+            self._tokens -= amount
+            return max(0.0, -self._tokens * 60 / self.per_minute)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the API reported that the limit is exhausted"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+
+class RateLimiter:
+    """
+    Admit LLM requests through RPM and TPM token buckets, and retry rate-limited (429) and failed (5xx) requests.
+
+    Retries wait for the Retry-After time of the response, or an exponential backoff with jitter. A 429 empties
+    the buckets, so all concurrent requests pause instead of running into the limit as well. Limits reported in
+    the response headers replace unknown or higher configured limits.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+        jitter: Callable[[], float] = random.random,
+    ):
+        """
+        Initialize the RateLimiter class
+
+        Args:
+            requests_per_minute: Requests per minute of the account. If None, requests are not limited
+                until the API reports its limit
+            tokens_per_minute: Tokens per minute of the account. If None, tokens are not limited
+                until the API reports its limit
+            max_retries: Maximum number of retries of a single request
+            base_delay: Backoff of the first retry in seconds, doubled with every further retry
+            max_delay: Maximum backoff in seconds
+            sleep: Function to wait for the given number of seconds
+            clock: Monotonic clock in seconds
+            jitter: Function returning a random number between 0 and 1
+        """
+        self.requests = TokenBucket(requests_per_minute, clock=clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._jitter = jitter
+
+    def acquire(self, tokens: int) -> None:
+        """
+        Wait until a request with the estimated number of tokens may be sent
+
+        Args:
+            tokens: Estimated input and output tokens of the request
+        """
+        delay = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if delay > 0:
+            with metrics.span("rate_limit_wait"):
+                self._sleep(delay)
+
+    def call(self, function: Callable[[], T], tokens: int) -> T:
+        """
+        Call the function once admitted, and retry it on rate limits and server errors
+
+        Args:
+            function: Function sending the request
+            tokens: Estimated input and output tokens of the request
+
+        Returns:
+            The result of the function
+
+        Raises:
+            Exception: The error of the last attempt, if it is not retryable or all retries failed
+        """
+        attempt = 0
+        while True:
+            self.acquire(tokens)
+            try:
+                return function()
+            except Exception as error:
+                self._before_retry(error, attempt)
+            attempt += 1
+
+    def stream(self, function: Callable[[], Iterator[T]], tokens: int) -> Iterator[T]:
+        """
+        Iterate over a streamed response once admitted. The request is only retried until the first item arrived,
+        because items which were already yielded can not be taken back
+
+        Args:
+            function: Function sending the request and returning an iterator over the response
+            tokens: Estimated input and output tokens of the request
+
+        Returns:
+            Iterator over the items of the response
+
+        Raises:
+            Exception: The error of the last attempt, if it is not retryable, all retries failed
+                or items were already yielded
+        """
+        attempt = 0
+        while True:
+            self.acquire(tokens)
+            started = False
+            try:
+                for item in function():
+                    started = True
+                    yield item
+                return
+            except Exception as error:
+                if started:
+                    raise
+                self._before_retry(error, attempt)
+            attempt += 1
+
+    def _before_retry(self, error: Exception, attempt: int) -> None:
+        """
+        Wait before the next attempt or re-raise the error, if it should not be retried
+
+        Args:
+            error: The error of the failed attempt
+            attempt: Number of the failed attempt, starting at 0
+        """
+        status_code = getattr(error, "status_code", None)
+        if (
+            not is_retryable(error)
+            or attempt >= self.max_retries
+            # Retrying does not help, if the account has no credit left
+            or getattr(error, "code", None) == "insufficient_quota"
+        ):
+            raise error
+
+        headers = _headers(error)
+        if status_code == 429:
+            self._update_limits(headers)
+            self.requests.drain()
+            self.tokens.drain()
+        metrics.increment("llm_retries")
+        with metrics.span("rate_limit_wait"):
+            self._sleep(self.retry_delay(attempt, headers))
+
+    def retry_delay(
+        self, attempt: int, headers: Optional[Mapping[str, str]] = None
+    ) -> float:
+        """
+        Return the seconds to wait before the next attempt
+
+        Args:
+            attempt: Number of the failed attempt, starting at 0
+            headers: Headers of the failed response
+
+        Returns:
+            The Retry-After time of the response plus a small jitter, or an exponential backoff with jitter
+        """
+        retry_after = parse_retry_after(headers or {})
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) + self._jitter() * self.base_delay
+        backoff = min(self.max_delay, self.base_delay * 2**attempt)
+        # Equal jitter: at least half of the backoff, so retries of concurrent requests spread out
+        return backoff / 2 + self._jitter() * backoff / 2
+
+    def _update_limits(self, headers: Mapping[str, str]) -> None:
+        """Use the limits reported by the API, if they are lower than the configured ones"""
+        for bucket, header in (
+            (self.requests, "x-ratelimit-limit-requests"),
+            (self.tokens, "x-ratelimit-limit-tokens"),
+        ):
+            try:
+                limit = float(headers[header]) * LIMIT_SAFETY_FACTOR
+            except (KeyError, ValueError):
+                continue
+            if bucket.per_minute is None or limit < bucket.per_minute:
+                bucket.set_rate(limit)
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Return whether a failed request may succeed when it is sent again
+
+    Args:
+        error: Error raised by the OpenAI client
+
+    Returns:
+        True for rate limits (429), server errors (5xx), timeouts and connection errors
+    """
+    from openai import APIConnectionError
+
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    return isinstance(error, APIConnectionError)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Return the seconds to wait as requested by the API
+
+    Args:
+        headers: Headers of the failed response
+
+    Returns:
+        The seconds of the "retry-after-ms" or "retry-after" header, which is either a number or an HTTP date.
+        None if neither header is set or valid
+    """
+    try:
+        return max(0.0, float(headers["retry-after-ms"]) / 1000)
+    except (KeyError, ValueError):
+        pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _headers(error: Exception) -> Mapping[str, str]:
+    """Return the headers of the response of a failed request, empty if there was no response"""
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None) or {}
+
+
+@lru_cache(maxsize=None)
+def shared_rate_limiter(
+    requests_per_minute: Optional[float],
+    tokens_per_minute: Optional[float],
+    max_retries: int,
+) -> RateLimiter:
+    """
+    Return a rate limiter, shared by all LLM calls with the same limits in this process
+
+    Args:
+        requests_per_minute: Requests per minute of the account. If None, they are taken from the API responses
+        tokens_per_minute: Tokens per minute of the account. If None, they are taken from the API responses
+        max_retries: Maximum number of retries of a single request
+
+    Returns:
+        The rate limiter
+    """
+    return RateLimiter(
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        max_retries=max_retries,
+    )
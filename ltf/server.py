@@ -0,0 +1,345 @@
+"""
+Local HTTP service creating flashcards, for many users sharing one warm process.
+
+Jobs are put on a bounded queue and processed by a pool of worker threads, which share the imported modules,
+the compiled prompt template, the LLM connection pool, the rate limiter and the caches.
+
+Endpoints:
+    POST /jobs                      {"url": ..., "target_language": ...}, returns the job with status "queued"
+    GET  /jobs/<id>                 status of the job, including the flashcards once it is done
+    GET  /jobs/<id>/flashcards.csv  flashcards of a finished job as CSV, "?delimiter=;" changes the delimiter
+    GET  /jobs/<id>/flashcards.json flashcards of a finished job as JSON
+    GET  /health                    number of queued jobs and workers
+"""
+
+import csv
+import io
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Maximum size of a request body in bytes, a job only consists of a URL and a language
+MAX_BODY_SIZE = 64 * 1024
+# Number of finished jobs kept for clients to fetch their results, older ones are forgotten
+MAX_FINISHED_JOBS = 1000
+
+
+@dataclass
+class Job:
+    """A request to create the flashcards of a single lesson."""
+
+    url: str
+    target_language: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"
+    title: Optional[str] = None
+    flashcards: List[Tuple[str, str]] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self, include_flashcards: bool = True) -> Dict[str, Any]:
+        """Return the job as JSON serializable dictionary"""
+        result = {
+            "id": self.id,
+            "url": self.url,
+            "target_language": self.target_language,
+            "status": self.status,
+            "title": self.title,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if include_flashcards and self.status == "done":
+            result["flashcards"] = [
+                {"english": english, "target_language": target_text}
+                for english, target_text in self.flashcards
+            ]
+        return result
+
+
+# Creates the flashcards of a job, returns the title of the video and the English and target language texts
+ProcessJob = Callable[[Job], Tuple[str, List[Tuple[str, str]]]]
+
+
+class JobQueue:
+    """
+    Bounded queue of flashcard jobs, processed by a fixed pool of worker threads.
+
+    A full queue rejects new jobs instead of accepting work it can not finish in time, so clients can retry later.
+    """
+
+    def __init__(
+        self, process_job: ProcessJob, workers: int = 4, max_queued: int = 100
+    ):
+        """
+        Initialize the JobQueue class and start the workers
+
+        Args:
+            process_job: Function creating the flashcards of a job
+            workers: Number of jobs processed at the same time
+            max_queued: Maximum number of jobs waiting to be processed
+        """
+        self.process_job = process_job
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queued)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"ltf-worker-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def workers(self) -> int:
+        return len(self._workers)
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, url: str, target_language: str) -> Job:
+        """
+        Put a new job on the queue
+
+        Args:
+            url: URL of the YouTube video
+            target_language: The language that is taught in the YouTube video
+
+        Returns:
+            The queued job
+
+        Raises:
+            queue.Full: If the maximum number of jobs is already waiting
+        """
+        job = Job(url=url, target_language=target_language)
+        with self._lock:
+            self._queue.put_nowait(job)
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with the given ID, None if it does not exist or was already forgotten"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            job.status = "running"
+            try:
+                job.title, job.flashcards = self.process_job(job)
+                job.status = "done"
+            except BaseException as error:
+                job.error = str(error) or type(error).__name__
+                job.status = "failed"
+            job.finished_at = time.time()
+            self._forget_old_jobs()
+
+    def _forget_old_jobs(self) -> None:
+        """Drop the oldest finished jobs, once more than MAX_FINISHED_JOBS are kept"""
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+            excess = len(finished) - MAX_FINISHED_JOBS
+            for job_id in finished[:excess] if excess > 0 else ():
+                del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        """Stop the workers after their current jobs are finished. Jobs still waiting in the queue fail"""
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.error = "The service was stopped."
+                job.status = "failed"
+                job.finished_at = time.time()
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+
+def flashcards_as_csv(flashcards: List[Tuple[str, str]], delimiter: str = ",") -> str:
+    """
+    Return the flashcards in the same CSV format as the CSV files written by the CLI
+
+    Args:
+        flashcards: English and target language text of every flashcard
+        delimiter: Delimiter to use
+
+    Returns:
+        The CSV content
+    """
+    output = io.StringIO()
+    csv.writer(output, delimiter=delimiter).writerows(flashcards)
+    return output.getvalue()
+
+
+class FlashcardRequestHandler(BaseHTTPRequestHandler):
+    """Handle the HTTP requests of the flashcard service. The job queue is attached to the server."""
+
+    server: "FlashcardServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        path, _, query = self.path.partition("?")
+        parts = [part for part in path.split("/") if part]
+        if parts == ["health"]:
+            self._send_json(
+                HTTPStatus.OK,
+                {
+                    "status": "ok",
+                    "queued": self.server.jobs.queued,
+                    "workers": self.server.jobs.workers,
+                },
+            )
+            return
+        if len(parts) not in (2, 3) or parts[0] != "jobs":
+            self._send_error(HTTPStatus.NOT_FOUND, "Not found.")
+            return
+
+        job = self.server.jobs.get(parts[1])
+        if job is None:
+            self._send_error(HTTPStatus.NOT_FOUND, f'Job "{parts[1]}" does not exist.')
+        elif len(parts) == 2:
+            self._send_json(HTTPStatus.OK, job.to_dict())
+        elif job.status != "done":
+            self._send_error(
+                HTTPStatus.CONFLICT, f'Job "{job.id}" is {job.status}, not done.'
+            )
+        elif parts[2] == "flashcards.csv":
+            delimiter = parse_qs(query).get("delimiter", [","])[0]
+            if len(delimiter) != 1:
+                self._send_error(
+                    HTTPStatus.BAD_REQUEST, "The delimiter must be a single character."
+                )
+                return
+            self._send(
+                HTTPStatus.OK,
+                flashcards_as_csv(job.flashcards, delimiter).encode("utf-8"),
+                "text/csv; charset=utf-8",
+            )
+        elif parts[2] == "flashcards.json":
+            self._send_json(HTTPStatus.OK, job.to_dict()["flashcards"])
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, "Not found.")
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path.rstrip("/") != "/jobs":
+            self._send_error(HTTPStatus.NOT_FOUND, "Not found.")
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_SIZE:
+            self._send_error(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body is too large."
+            )
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_error(HTTPStatus.BAD_REQUEST, "Request body must be JSON.")
+            return
+
+        url = body.get("url") if isinstance(body, dict) else None
+        if not isinstance(url, str) or not url:
+            self._send_error(HTTPStatus.BAD_REQUEST, 'A YouTube "url" is required.')
+            return
+        target_language = body.get("target_language") or self.server.target_language
+        if target_language not in self.server.target_languages:
+            self._send_error(
+                HTTPStatus.BAD_REQUEST,
+                f'"{target_language}" is not a valid target language.',
+            )
+            return
+
+        try:
+            job = self.server.jobs.submit(url, target_language)
+        except queue.Full:
+            self._send_error(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                "Too many queued jobs, please try again later.",
+                headers={"Retry-After": "30"},
+            )
+            return
+        self._send_json(
+            HTTPStatus.ACCEPTED, job.to_dict(), headers={"Location": f"/jobs/{job.id}"}
+        )
+
+    def _send_json(
+        self, status: HTTPStatus, content: Any, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        self._send(
+            status, json.dumps(content).encode("utf-8"), "application/json", headers
+        )
+
+    def _send_error(
+        self, status: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        self._send_json(status, {"error": message}, headers)
+
+    def _send(
+        self,
+        status: HTTPStatus,
+        body: bytes,
+        content_type: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FlashcardServer(ThreadingHTTPServer):
+    """HTTP server of the flashcard service. Every connection is handled in its own thread."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        jobs: JobQueue,
+        target_language: Optional[str],
+        target_languages: List[str],
+        verbose: bool = False,
+    ):
+        """
+        Initialize the FlashcardServer class
+
+        Args:
+            address: Host and port to listen on. Port 0 picks a free port
+            jobs: The job queue
+            target_language: Target language of jobs without one. If None, every job has to set it
+            target_languages: All valid target languages
+            verbose: Whether to log every request to stderr
+        """
+        super().__init__(address, FlashcardRequestHandler)
+        self.jobs = jobs
+        self.target_language = target_language
+        self.target_languages = target_languages
+        self.verbose = verbose
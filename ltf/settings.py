@@ -0,0 +1,60 @@
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from ltf.config import ENV_DIR
+from ltf.languages import AvailableTargetLanguages
+from ltf.llm import Backend
+
+
+class Settings(BaseSettings):
+    # OPENAI settings
+    OPENAI_API_KEY: Optional[str] = None
+    OPENAI_MODEL_NAME: str = "gpt-4o"
+
+    # LLM backend settings, local backends (Ollama, llama.cpp, vLLM) need an OpenAI-compatible API
+    LLM_BACKEND: Backend = Backend.OPENAI
+    LLM_BASE_URL: Optional[str] = None
+    LLM_TIMEOUT: float = 120
+    LLM_MAX_CONNECTIONS: int = 20
+
+    # Rate limits of the account. If None, the limits reported by the API after the first 429 response are used
+    LLM_REQUESTS_PER_MINUTE: Optional[int] = None
+    LLM_TOKENS_PER_MINUTE: Optional[int] = None
+    # Maximum number of retries of a rate-limited (429) or failed (5xx) LLM call
+    LLM_MAX_RETRIES: int = 6
+
+    # The language you are currently learning form Language Transfer
+    TARGET_LANGUAGE: Optional[AvailableTargetLanguages] = None
+
+    # Let the LLM generate every flashcard as a pair of texts instead of an object with two long keys,
+    # which needs fewer output tokens for the same flashcards
+    COMPACT_OUTPUT_SCHEMA: bool = False
+
+    # Remove fillers ("um", "uh") and immediate repetitions from transcripts, before they are sent to the LLM
+    TRANSCRIPT_COMPRESSION: bool = False
+
+    # Maximum number of transcript chunks sent to the LLM at the same time
+    CHUNK_CONCURRENCY: int = 8
+
+    # Download transcripts directly instead of through pytube, and the title from the small oEmbed endpoint.
+    # If either download fails, the youtube-transcript-api and pytube are used instead. Without the title
+    # lookup, the video ID is used as title and file name
+    FAST_TRANSCRIPT_FETCH: bool = True
+    FETCH_VIDEO_TITLE: bool = True
+
+    # Cache settings
+    CACHE_MAX_SIZE_MB: int = 100
+    CACHE_TTL_DAYS: Optional[float] = None
+
+    # Store all created flashcards in a local database, which can be searched with 'ltf search'
+    CORPUS_ENABLED: bool = False
+
+    # Testing
+    FULL_CLI_TEST_WITH_EXTERNAL_DEPENDENCIES: bool = False
+
+    # Load settings from .env file
+    model_config = SettingsConfigDict(env_file=(ENV_DIR / ".env"))
+
+
+settings = Settings()
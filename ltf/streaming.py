@@ -0,0 +1,188 @@
+import csv
+import json
+import sys
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ltf.exclusion import normalize_key
+from ltf.near_duplicates import normalize_text
+
+
+class OutputFormat(str, Enum):
+    """Enum containing all formats flashcards can be written in."""
+
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
+def iter_completed_flashcards(
+    partial_outputs: Iterable[Optional[Dict[str, Any]]],
+    compact: bool = False,
+) -> Iterator[Dict[str, str]]:
+    """
+    Yield every flashcard of a streamed structured LLM output as soon as it is complete.
+
+    Each partial output contains all flashcards generated so far, the last one might still be incomplete.
+    A flashcard is complete, once the next one has been started or the stream has ended.
+
+    Args:
+        partial_outputs: Growing partial outputs of the form {"flashcards": [{"english": ..., "target_language": ...}]},
+            or of the form {"cards": [[english, target_language]]} if compact is True
+        compact: Whether the LLM generates the compact format of models.CompactFlashcardSet
+
+    Returns:
+        Iterator over the complete flashcards, in the order generated by the LLM
+    """
+    key, valid = ("cards", _valid_pair) if compact else ("flashcards", _valid)
+    emitted = 0
+    flashcards = []
+    for partial_output in partial_outputs:
+        flashcards = (partial_output or {}).get(key) or []
+        complete = len(flashcards) - 1
+        for flashcard in flashcards[emitted:complete]:
+            yield from valid(flashcard)
+        emitted = max(emitted, complete)
+
+    for flashcard in flashcards[emitted:]:
+        yield from valid(flashcard)
+
+
+def _valid(flashcard: Any) -> Iterator[Dict[str, str]]:
+    """Yield the flashcard only if both texts are present"""
+    if (
+        isinstance(flashcard, dict)
+        and isinstance(flashcard.get("english"), str)
+        and isinstance(flashcard.get("target_language"), str)
+    ):
+        yield {
+            "english": flashcard["english"],
+            "target_language": flashcard["target_language"],
+        }
+
+
+def _valid_pair(flashcard: Any) -> Iterator[Dict[str, str]]:
+    """Yield the flashcard of a compact pair only if it consists of exactly two texts"""
+    if (
+        isinstance(flashcard, list)
+        and len(flashcard) == 2
+        and all(isinstance(text, str) for text in flashcard)
+    ):
+        yield {"english": flashcard[0], "target_language": flashcard[1]}
+
+
+class FlashcardWriter:
+    """
+    Write flashcards one by one to a file or to stdout, skipping flashcards that should be excluded.
+
+    Supports CSV and JSON Lines. Use "-" as output to write to stdout.
+    """
+
+    def __init__(
+        self,
+        output: str,
+        delimiter: str = ",",
+        output_format: str = "csv",
+        excluded_keys: Optional[Set[str]] = None,
+        flush: bool = False,
+        near_duplicates: Optional[Dict[str, Tuple[str, float]]] = None,
+    ):
+        """
+        Initialize the FlashcardWriter class
+
+        Args:
+            output: Path of the file to create or "-" for stdout
+            delimiter: Delimiter to use in CSV format
+            output_format: Either "csv" or "jsonl"
+            excluded_keys: Normalized English texts of flashcards that should not be written
+            flush: Whether to flush the output after every flashcard, so downstream tools receive it immediately
+            near_duplicates: Most similar existing flashcard and its similarity per normalized English text.
+                Flashcards contained are not written
+        """
+        self.output = output
+        self.delimiter = delimiter
+        self.output_format = OutputFormat(output_format)
+        self.excluded_keys = excluded_keys or set()
+        self.flush = flush
+        self.near_duplicates = near_duplicates
+        self.written = 0
+        self.excluded = 0
+        # Dropped near-duplicates as (flashcard, existing flashcard, similarity)
+        self.dropped: List[Tuple[str, str, float]] = []
+        self._file = None
+        self._csv_writer = None
+
+    def __enter__(self) -> "FlashcardWriter":
+        if self.output == "-":
+            self._file = sys.stdout
+        else:
+            self._file = open(self.output, "w", newline="", encoding="utf-8")
+        if self.output_format == OutputFormat.CSV:
+            self._csv_writer = csv.writer(self._file, delimiter=self.delimiter)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._file is not sys.stdout:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def _is_excluded(self, english: str) -> bool:
+        if self.excluded_keys and normalize_key(english) in self.excluded_keys:
+            self.excluded += 1
+            return True
+        if self.near_duplicates:
+            match = self.near_duplicates.get(normalize_text(english))
+            if match is not None:
+                self.dropped.append((english, *match))
+                return True
+        return False
+
+    def write(self, english: str, target_language: str) -> bool:
+        """
+        Write a single flashcard, unless it is excluded
+
+        Args:
+            english: The English word, phrase or sentence
+            target_language: The translation in the target language
+
+        Returns:
+            True if the flashcard was written, False if it was excluded
+        """
+        if self._is_excluded(english):
+            return False
+
+        if self._csv_writer is not None:
+            self._csv_writer.writerow([english, target_language])
+        else:
+            self._file.write(
+                json.dumps(
+                    {"english": english, "target_language": target_language},
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+        if self.flush:
+            self._file.flush()
+        self.written += 1
+        return True
+
+    def write_all(self, flashcards: Iterable[Any]) -> None:
+        """
+        Write all flashcards, skipping excluded ones
+
+        Args:
+            flashcards: Objects with the attributes "english" and "target_language"
+        """
+        if self._csv_writer is None or self.flush:
+            for flashcard in flashcards:
+                self.write(flashcard.english, flashcard.target_language)
+            return
+
+        def rows() -> Iterator[list]:
+            for flashcard in flashcards:
+                if not self._is_excluded(flashcard.english):
+                    self.written += 1
+                    yield [flashcard.english, flashcard.target_language]
+
+        # Rows are generated lazily, the flashcards are never copied into a list
+        self._csv_writer.writerows(rows())
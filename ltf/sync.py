@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from ltf import youtube_fetch
+
+MANIFEST_VERSION = 1
+
+
+@dataclass(frozen=True)
+class LessonInputs:
+    """Everything that determines the flashcards of a lesson, as recorded in the sync manifest."""
+
+    transcript_hash: str
+    model: str
+    prompt_hash: str
+    output: str
+
+
+def content_hash(content: Union[str, bytes]) -> str:
+    """
+    Return the SHA-256 hash of a text or file content
+
+    Args:
+        content: The content to hash
+
+    Returns:
+        The hash as hexadecimal string
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_hash(path: Union[str, Path]) -> str:
+    """Return the SHA-256 hash of the content of a file, e.g. of the prompt template"""
+    return content_hash(Path(path).read_bytes())
+
+
+def video_id(url: str) -> str:
+    """
+    Return the ID of a YouTube video, which identifies a lesson in the manifest
+
+    Args:
+        url: The URL of the YouTube video
+
+    Returns:
+        The video ID
+
+    Raises:
+        ValueError: If the URL is not valid.
+    """
+    video_id = youtube_fetch.extract_video_id(url)
+    if video_id is None:
+        raise ValueError(
+            "Please provide a valid YouTube URL "
+            'in the form of "https://www.youtube.com/watch?v=VIDEO_ID".'
+        )
+    return video_id
+
+
+class SyncManifest:
+    """
+    JSON file recording the inputs of every processed lesson, keyed by video ID.
+
+    A lesson only needs to be processed again, if it is new, one of its inputs changed or its output file is gone.
+    Lessons can be recorded from several threads at the same time.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Initialize the SyncManifest class. An existing manifest is loaded, a missing or unreadable one starts empty
+
+        Args:
+            path: Path of the manifest file
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._lessons: Dict[str, Dict[str, str]] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                content = json.load(file)
+        except (OSError, ValueError):
+            return
+        if content.get("version") == MANIFEST_VERSION:
+            self._lessons = content.get("lessons", {})
+
+    def __len__(self) -> int:
+        return len(self._lessons)
+
+    def get(self, lesson_id: str) -> Optional[LessonInputs]:
+        """
+        Return the recorded inputs of a lesson
+
+        Args:
+            lesson_id: Video ID of the lesson
+
+        Returns:
+            The inputs of the last successful run or None if the lesson was never processed
+        """
+        with self._lock:
+            entry = self._lessons.get(lesson_id)
+        return LessonInputs(**entry) if entry is not None else None
+
+    def is_current(self, lesson_id: str, inputs: LessonInputs) -> bool:
+        """
+        Return whether the lesson was already processed with the same inputs and its output file still exists
+
+        Args:
+            lesson_id: Video ID of the lesson
+            inputs: The current inputs of the lesson
+
+        Returns:
+            True if the lesson can be skipped
+        """
+        return self.get(lesson_id) == inputs and Path(inputs.output).is_file()
+
+    def record(self, lesson_id: str, inputs: LessonInputs) -> None:
+        """
+        Record the inputs of a successfully processed lesson. The manifest is only written by save
+
+        Args:
+            lesson_id: Video ID of the lesson
+            inputs: The inputs the lesson was processed with
+        """
+        with self._lock:
+            self._lessons[lesson_id] = asdict(inputs)
+
+    def save(self) -> None:
+        """Write the manifest, replacing the previous file at once, so an interrupted write never corrupts it"""
+        with self._lock:
+            content = {"version": MANIFEST_VERSION, "lessons": dict(self._lessons)}
+
+        directory = self.path.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+                json.dump(content, file, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
@@ -0,0 +1,103 @@
+"""
+Generator-based cleaning of transcript segments.
+
+Every stage takes an iterable of segments and yields segments, so stages can be chained freely and a
+transcript is cleaned one segment at a time, without intermediate copies of the whole text. Downloaded
+transcripts pass the stages with their timestamps, the text is joined once at the end.
+"""
+
+import re
+from typing import Callable, Iterable, Iterator, NamedTuple, Sequence
+
+
+class Segment(NamedTuple):
+    """A single transcript line with its position in the video."""
+
+    text: str
+    start: float
+    duration: float
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+
+Stage = Callable[[Iterable[Segment]], Iterator[Segment]]
+
+# Annotations of auto-generated transcripts, which carry no spoken text
+ANNOTATIONS = ("[Music]",)
+# Newlines, non-breaking spaces and multiple whitespaces
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def clean_text(text: str) -> str:
+    """
+    Clean a whole transcript or title of annotations and unwanted whitespaces at once
+
+    Args:
+        text: The text to clean.
+
+    Returns:
+        The cleaned text.
+    """
+    # A plain replace is faster than a regex alternation for the fixed annotation
+    for annotation in ANNOTATIONS:
+        text = text.replace(annotation, " ")
+    return WHITESPACE_PATTERN.sub(" ", text)
+
+
+def remove_unwanted(segments: Iterable[Segment]) -> Iterator[Segment]:
+    """Replace annotations like "[Music]" with a whitespace"""
+    for segment in segments:
+        text = segment.text
+        for annotation in ANNOTATIONS:
+            text = text.replace(annotation, " ")
+        yield segment._replace(text=text)
+
+
+def collapse_whitespace(segments: Iterable[Segment]) -> Iterator[Segment]:
+    """Replace newlines, non-breaking spaces and multiple whitespaces with a single whitespace"""
+    for segment in segments:
+        yield segment._replace(text=" ".join(segment.text.split()))
+
+
+def drop_empty(segments: Iterable[Segment]) -> Iterator[Segment]:
+    """Skip segments without any text left"""
+    for segment in segments:
+        if segment.text:
+            yield segment
+
+
+DEFAULT_STAGES: Sequence[Stage] = (remove_unwanted, collapse_whitespace, drop_empty)
+
+
+def clean_segments(
+    segments: Iterable[Segment], stages: Sequence[Stage] = DEFAULT_STAGES
+) -> Iterator[Segment]:
+    """
+    Chain the cleaning stages over the segments. Nothing is processed until the result is iterated.
+
+    Args:
+        segments: Raw transcript segments
+        stages: Cleaning stages, applied in the given order
+
+    Returns:
+        Iterator over the cleaned segments
+    """
+    cleaned = iter(segments)
+    for stage in stages:
+        cleaned = stage(cleaned)
+    return cleaned
+
+
+def join_segments(segments: Iterable[Segment]) -> str:
+    """
+    Join the segments to the transcript text, which is passed to the prompt
+
+    Args:
+        segments: Cleaned transcript segments
+
+    Returns:
+        The text of all segments separated by a single whitespace
+    """
+    return " ".join(segment.text for segment in segments)
@@ -1,39 +1,64 @@
-import csv
 import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Union, Any, Dict
+from typing import TYPE_CHECKING, Union, Any, Dict, List, Optional, TextIO, Tuple
 
-import yaml
-from langchain_openai import ChatOpenAI
 from rich import print
+from rich.markup import escape
+from rich.table import Table
 
-from ltf.models import FlashcardSet
+from ltf import config, exclusion, llm
+from ltf.anki import AnkiDeckWriter, AnkiPackage
+from ltf.cache import DiskCache, exclusion_index
+from ltf.corpus import HIGHLIGHT_END, HIGHLIGHT_START, SearchResult
+from ltf.llm import Backend
+from ltf.metrics import metrics
+from ltf.streaming import FlashcardWriter
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+    from ltf.models import FlashcardSet
 
 PROJECT_DIR = Path(__file__).resolve().parent.parent
+PROMPT_FILE = PROJECT_DIR / "ltf" / "data" / "prompt.yaml"
 
 
+@lru_cache(maxsize=None)
 def load_template() -> str:
-    """Return prompt template as string"""
-    with open(PROJECT_DIR / "ltf" / "data" / "prompt.yaml", "r") as f:
+    """Return prompt template as string. The file is only read once per process"""
+    import yaml
+
+    with open(PROMPT_FILE, "r") as f:
         prompt = yaml.safe_load(f)
     return prompt.get("template")
 
 
-def initialize_llm(api_key: str, model_name: str) -> ChatOpenAI:
+def initialize_llm(
+    api_key: Optional[str],
+    model_name: str,
+    backend: Optional[Backend] = None,
+    base_url: Optional[str] = None,
+) -> "ChatOpenAI":
     """
-    Return an LLM instance
+    Return an LLM instance. All instances share a keep-alive connection pool.
 
     Args:
-        api_key: OpenAI API key
+        api_key: OpenAI API key. Not required for local backends
         model_name: OpenAI model name to use
+        backend: The backend serving the model. If None, takes value from .env file
+        base_url: URL of an OpenAI-compatible API. If None, takes value from .env file or the default of the backend
 
     Returns:
         LLM instance
     """
-    return ChatOpenAI(
+    return llm.create_chat_model(
         model_name=model_name,
         api_key=api_key,
-        temperature=0,
+        backend=backend or config.settings.LLM_BACKEND,
+        base_url=base_url or config.settings.LLM_BASE_URL,
+        timeout=config.settings.LLM_TIMEOUT,
+        max_connections=config.settings.LLM_MAX_CONNECTIONS,
     )
 
 
@@ -52,10 +77,11 @@ def clean_youtube_video_title(video_title: str) -> str:
 
 
 def save_flashcards_as_csv(
-    flashcard_set: Union[FlashcardSet, Dict[str, Any]],
+    flashcard_set: Union["FlashcardSet", Dict[str, Any]],
     filename: str,
     delimiter: str,
     exclude: str,
+    similarity_threshold: Optional[float] = None,
 ) -> None:
     """
     Create a CSV file with the flashcards in the FlashcardSet object.
@@ -65,48 +91,164 @@ def save_flashcards_as_csv(
         filename: The name of the CSV file to be created.
         delimiter: The delimiter used in the CSV file.
         exclude: The directory containing CSV files with words and sentences to exclude.
+        similarity_threshold: If set, also exclude near-duplicates of the existing flashcards with at least
+            this similarity (between 0 and 1).
     """
-    existing_flashcards = _load_existing_flashcards(exclude) if exclude else set()
+    existing_flashcards, near_duplicates = _load_exclusions(
+        flashcard_set, exclude, similarity_threshold
+    )
 
-    with open(filename, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile, delimiter=delimiter)
+    with metrics.span("csv_write"), FlashcardWriter(
+        filename,
+        delimiter=delimiter,
+        excluded_keys=existing_flashcards,
+        near_duplicates=near_duplicates,
+    ) as writer:
+        writer.write_all(flashcard_set.flashcards)
+    metrics.increment("written_flashcards", writer.written)
+    metrics.increment("excluded_flashcards", writer.excluded)
+    metrics.increment("near_duplicate_flashcards", len(writer.dropped))
+
+    show_dropped_near_duplicates(writer.dropped)
+    _show_file_location(filename)
 
-        writer.writerows(
-            [
-                [flashcard.english, flashcard.target_language]
-                for flashcard in flashcard_set.flashcards
-                if not exclude
-                or flashcard.english.strip().lower() not in existing_flashcards
-            ]
-        )
 
-    _show_file_location(filename)
+def add_flashcards_to_package(
+    flashcard_set: "FlashcardSet",
+    package: AnkiPackage,
+    deck_name: str,
+    exclude: str,
+    similarity_threshold: Optional[float] = None,
+) -> None:
+    """
+    Add the flashcards in the FlashcardSet object as deck to an Anki package.
+
+    Args:
+        flashcard_set: The FlashcardSet object containing the flashcards.
+        package: The Anki package, written by the caller once all decks are added.
+        deck_name: The name of the deck, use "::" to create subdecks.
+        exclude: The directory containing CSV files with words and sentences to exclude.
+        similarity_threshold: If set, also exclude near-duplicates of the existing flashcards with at least
+            this similarity (between 0 and 1).
+    """
+    existing_flashcards, near_duplicates = _load_exclusions(
+        flashcard_set, exclude, similarity_threshold
+    )
+
+    with metrics.span("apkg_write"), AnkiDeckWriter(
+        package,
+        deck_name,
+        excluded_keys=existing_flashcards,
+        near_duplicates=near_duplicates,
+    ) as writer:
+        writer.write_all(flashcard_set.flashcards)
+    metrics.increment("written_flashcards", writer.written)
+    metrics.increment("excluded_flashcards", writer.excluded)
+    metrics.increment("near_duplicate_flashcards", len(writer.dropped))
+
+    show_dropped_near_duplicates(writer.dropped)
 
 
-def _load_existing_flashcards(directory: str) -> set:
+def _load_exclusions(
+    flashcard_set: "FlashcardSet", exclude: str, similarity_threshold: Optional[float]
+) -> Tuple[set, Optional[Dict[str, Tuple[str, float]]]]:
+    """
+    Load the English texts of the existing flashcards and find near-duplicates of the new flashcards.
+
+    Args:
+        flashcard_set: The FlashcardSet object containing the new flashcards.
+        exclude: The directory containing CSV files with words and sentences to exclude.
+        similarity_threshold: Minimum similarity of a near-duplicate. If None, near-duplicates are not searched.
+
+    Returns:
+        The existing English texts and the near-duplicates of the new flashcards.
+    """
+    existing_flashcards = _load_existing_flashcards(exclude) if exclude else set()
+    near_duplicates = (
+        _find_near_duplicates(flashcard_set, exclude, similarity_threshold)
+        if exclude and similarity_threshold
+        else None
+    )
+    return existing_flashcards, near_duplicates
+
+
+def _load_existing_flashcards(directory: str, file: Optional[TextIO] = None) -> set:
     """
     Load existing flashcards from CSV files in the specified directory. Only get the English words.
+    Only new or modified files are parsed, the others are loaded from a persistent index.
 
     Args:
         directory: The directory containing the CSV files.
+        file: The file to print status messages to. If None, prints to stdout.
 
     Returns:
         A set of English words.
     """
-    keys = set()
     directory_path = Path(directory)
     if not directory_path.exists():
         print(
             f'Directory: "{directory}" does not exist. '
-            f"Continuing without loading existing flashcards.\n"
+            f"Continuing without loading existing flashcards.\n",
+            file=file,
+        )
+        return set()
+
+    with metrics.span("exclusion_load"):
+        return exclusion.load_english_keys(directory_path, index=exclusion_index())
+
+
+def _find_near_duplicates(
+    flashcard_set: "FlashcardSet",
+    directory: str,
+    similarity_threshold: float,
+) -> Dict[str, Tuple[str, float]]:
+    """
+    Find the flashcards, which are near-duplicates of existing flashcards in the specified directory.
+    Only new or modified files are hashed, the others are loaded from a persistent index.
+
+    Args:
+        flashcard_set: The FlashcardSet object containing the new flashcards.
+        directory: The directory containing the CSV files.
+        similarity_threshold: Minimum similarity of a near-duplicate, between 0 and 1.
+
+    Returns:
+        The most similar existing flashcard and its similarity per normalized English text.
+    """
+    directory_path = Path(directory)
+    if not directory_path.exists():
+        return {}
+
+    with metrics.span("near_duplicate_search"):
+        return exclusion.find_near_duplicates(
+            directory_path,
+            (flashcard.english for flashcard in flashcard_set.flashcards),
+            similarity_threshold,
+            index=exclusion_index(),
         )
-        return keys
 
-    return {
-        row[0].strip().lower()
-        for csv_file in directory_path.glob("*.csv")
-        for row in csv.reader(csv_file.open("r"))
-    }
+
+def show_dropped_near_duplicates(
+    dropped: List[Tuple[str, str, float]], file: Optional[TextIO] = None
+) -> None:
+    """
+    Print the flashcards, which were not written because they are near-duplicates of existing ones.
+
+    Args:
+        dropped: The dropped flashcards as (flashcard, existing flashcard, similarity).
+        file: The file to print to. If None, prints to stdout.
+    """
+    if not dropped:
+        return
+
+    table = Table(
+        "Flashcard",
+        "Existing flashcard",
+        "Similarity",
+        title=f"Dropped {len(dropped)} near-duplicate flashcard(s)",
+    )
+    for english, existing, similarity in dropped:
+        table.add_row(english, existing, f"{similarity:.2f}")
+    print(table, file=file)
 
 
 def save_prompt_as_txt(prompt: str, filename: str) -> None:
@@ -134,6 +276,68 @@ def _show_file_location(filename: str) -> None:
     print(f'File saved at: "{cwd / filename}"')
 
 
+def show_cache_statistics(llm_cache: DiskCache, file: Optional[TextIO] = None) -> None:
+    """
+    Print how many LLM results were reused from the cache.
+
+    Args:
+        llm_cache: The cache for the flashcards created by the LLM.
+        file: The file to print to. If None, prints to stdout.
+    """
+    print(
+        f"LLM cache: [green bold]{llm_cache.hits}[/green bold] hits, "
+        f"[yellow bold]{llm_cache.misses}[/yellow bold] misses",
+        file=file,
+    )
+
+
+def show_prompt_cache_statistics(file: Optional[TextIO] = None) -> None:
+    """
+    Print how many input tokens the LLM provider reused from its prompt cache, which are billed at a discount.
+
+    Args:
+        file: The file to print to. If None, prints to stdout.
+    """
+    input_tokens = metrics.counters["input_tokens"]
+    if not input_tokens:
+        return
+    cached_tokens = metrics.counters["cached_input_tokens"]
+    print(
+        f"Prompt cache: [green bold]{cached_tokens}[/green bold] of {input_tokens} input tokens cached "
+        f"({cached_tokens / input_tokens:.0%})",
+        file=file,
+    )
+
+
+def search_results_table(results: List[SearchResult]) -> Table:
+    """
+    Return the results of a corpus search as table, with the matched terms highlighted
+
+    Args:
+        results: The matching flashcards, best matches first
+
+    Returns:
+        Table with one row per flashcard, ready to be printed
+    """
+
+    def highlight(text: str) -> str:
+        return (
+            escape(text)
+            .replace(HIGHLIGHT_START, "[yellow bold]")
+            .replace(HIGHLIGHT_END, "[/yellow bold]")
+        )
+
+    table = Table("Lesson", "#", "English", "Translation")
+    for result in results:
+        table.add_row(
+            escape(result.title),
+            str(result.position + 1),
+            highlight(result.english),
+            highlight(result.target_text),
+        )
+    return table
+
+
 def env_information(file_path: Path) -> str:
     return (
         "Language Transfer Flashcards (ltf) is looking for the .env file at the following location:\n"
@@ -0,0 +1,231 @@
+"""
+Lightweight download of YouTube transcripts and titles, without the pytube video info lookup.
+
+The transcript is read from the caption tracks listed in the watch page, the title from the oEmbed endpoint,
+a small JSON document. All requests go through an HttpBackend, which can be swapped, e.g. to replay recorded
+responses in tests.
+"""
+
+import json
+import re
+import urllib.error
+import urllib.request
+from functools import lru_cache
+from html import unescape
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Protocol, Sequence
+from urllib.parse import parse_qs, quote, urlparse
+from xml.etree import ElementTree
+
+from ltf.transcript_pipeline import Segment
+
+if TYPE_CHECKING:
+    import httpx
+
+WATCH_URL = "https://www.youtube.com/watch?v={video_id}"
+OEMBED_URL = "https://www.youtube.com/oembed?format=json&url={url}"
+CONSENT_FORM = 'action="https://consent.youtube.com/s"'
+# Hosts of YouTube URLs, the same as accepted by the langchain YoutubeLoader
+YOUTUBE_HOSTS = {
+    "youtu.be",
+    "m.youtube.com",
+    "youtube.com",
+    "www.youtube.com",
+    "www.youtube-nocookie.com",
+    "vid.plus",
+}
+VIDEO_ID_LENGTH = 11
+TIMEOUT = 30
+# Formatting tags inside caption texts
+HTML_TAG_PATTERN = re.compile(r"<[^>]*>")
+
+
+class HttpResponse(NamedTuple):
+    """Status code and decoded body of an HTTP response."""
+
+    status_code: int
+    text: str
+
+
+class HttpBackend(Protocol):
+    """Sends the GET requests of the transcript download."""
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        """Send a GET request, following redirects. Error status codes are returned, not raised"""
+        ...
+
+
+class HttpxBackend:
+    """HTTP backend with a keep-alive connection pool, so the requests of a download share one connection."""
+
+    def __init__(self, client: Optional["httpx.Client"] = None):
+        """
+        Initialize the HttpxBackend class
+
+        Args:
+            client: The HTTP client to use. If None, a new client following redirects is created
+        """
+        if client is None:
+            import httpx
+
+            client = httpx.Client(follow_redirects=True, timeout=TIMEOUT)
+        self.client = client
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        response = self.client.get(url, headers=headers)
+        return HttpResponse(response.status_code, response.text)
+
+
+class UrllibBackend:
+    """HTTP backend using only the standard library."""
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        request = urllib.request.Request(url, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+                return HttpResponse(response.status, self._decode(response))
+        except urllib.error.HTTPError as error:
+            return HttpResponse(error.code, self._decode(error))
+
+    @staticmethod
+    def _decode(response) -> str:
+        charset = response.headers.get_content_charset() or "utf-8"
+        return response.read().decode(charset, errors="replace")
+
+
+@lru_cache(maxsize=None)
+def default_backend() -> HttpBackend:
+    """Return the HTTP backend shared by all downloads of the process"""
+    return HttpxBackend()
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """
+    Return the ID of a YouTube video, without importing the langchain YoutubeLoader
+
+    Args:
+        url: The URL of the YouTube video, e.g. "https://youtu.be/VIDEO_ID"
+
+    Returns:
+        The video ID, None if the URL is not a valid YouTube URL
+    """
+    parsed_url = urlparse(url)
+    if (
+        parsed_url.scheme not in ("http", "https")
+        or parsed_url.netloc not in YOUTUBE_HOSTS
+    ):
+        return None
+    if parsed_url.path.endswith("/watch"):
+        video_id = parse_qs(parsed_url.query).get("v", [""])[0]
+    else:
+        video_id = parsed_url.path.lstrip("/").split("/")[-1]
+    return video_id if len(video_id) == VIDEO_ID_LENGTH else None
+
+
+def fetch_title(video_id: str, backend: HttpBackend) -> Optional[str]:
+    """
+    Download the title of a YouTube video from the oEmbed endpoint
+
+    Args:
+        video_id: ID of the YouTube video
+        backend: The HTTP backend to use
+
+    Returns:
+        The title, None if it could not be downloaded. The title is only used for file and deck names
+    """
+    url = OEMBED_URL.format(url=quote(WATCH_URL.format(video_id=video_id), safe=""))
+    try:
+        response = backend.get(url)
+        if response.status_code != 200:
+            return None
+        return json.loads(response.text).get("title") or None
+    except Exception:
+        return None
+
+
+def fetch_segments(
+    video_id: str, backend: HttpBackend, languages: Sequence[str] = ("en",)
+) -> List[Segment]:
+    """
+    Download the transcript of a YouTube video as raw segments
+
+    Args:
+        video_id: ID of the YouTube video
+        backend: The HTTP backend to use
+        languages: Language codes of the transcript, in order of preference
+
+    Returns:
+        The uncleaned segments of the transcript
+
+    Raises:
+        IndexError: If the video does not have a transcript in one of the languages.
+        ConnectionError: If YouTube does not respond with the watch page or the transcript.
+    """
+    caption_tracks = _caption_tracks(_fetch_watch_page(video_id, backend))
+    base_url = _select_caption_track(caption_tracks, languages)
+    if base_url is None:
+        raise IndexError("Video does not have a transcript. Please try another video.")
+
+    response = backend.get(base_url)
+    if response.status_code != 200:
+        raise ConnectionError(
+            f"YouTube responded with status {response.status_code} to the transcript request."
+        )
+    return [
+        Segment(
+            HTML_TAG_PATTERN.sub("", unescape(element.text)),
+            float(element.attrib["start"]),
+            float(element.attrib.get("dur", "0.0")),
+        )
+        for element in ElementTree.fromstring(response.text)
+        if element.text is not None
+    ]
+
+
+def _fetch_watch_page(video_id: str, backend: HttpBackend) -> str:
+    """Download the watch page, accepting the cookie consent form shown in the EU if necessary"""
+    url = WATCH_URL.format(video_id=video_id)
+    headers = {"Accept-Language": "en-US"}
+    for _ in range(2):
+        response = backend.get(url, headers=headers)
+        if response.status_code != 200:
+            raise ConnectionError(
+                f"YouTube responded with status {response.status_code} to the video request."
+            )
+        html = unescape(response.text)
+        if CONSENT_FORM not in html:
+            return html
+        match = re.search('name="v" value="(.*?)"', html)
+        if match is None:
+            break
+        headers["Cookie"] = f"CONSENT=YES+{match.group(1)}"
+    raise ConnectionError("YouTube cookie consent could not be accepted.")
+
+
+def _caption_tracks(html: str) -> List[dict]:
+    """Return the caption tracks listed in the watch page, an empty list if the video has none"""
+    _, found, captions = html.partition('"captions":')
+    if not found:
+        return []
+    try:
+        captions_json = json.loads(
+            captions.split(',"videoDetails')[0].replace("\n", "")
+        )
+    except ValueError:
+        return []
+    renderer = captions_json.get("playerCaptionsTracklistRenderer") or {}
+    return renderer.get("captionTracks", [])
+
+
+def _select_caption_track(
+    caption_tracks: List[dict], languages: Sequence[str]
+) -> Optional[str]:
+    """Return the URL of the best caption track: per language, manually created tracks before generated ones"""
+    for language in languages:
+        for generated in (False, True):
+            for track in caption_tracks:
+                if (
+                    track.get("languageCode") == language
+                    and (track.get("kind") == "asr") == generated
+                ):
+                    return track["baseUrl"]
+    return None
@@ -1,7 +1,21 @@
-import re
-from typing import Tuple
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
 
-from langchain_community.document_loaders import YoutubeLoader
+from rich import print
+from rich.markup import escape
+from youtube_transcript_api import CouldNotRetrieveTranscript, YouTubeTranscriptApi
+
+from ltf.cache import DiskCache
+from ltf.metrics import metrics
+from ltf.transcript_pipeline import Segment, clean_segments, clean_text, join_segments
+from ltf.youtube_fetch import (
+    WATCH_URL,
+    HttpBackend,
+    extract_video_id,
+    fetch_segments,
+    fetch_title,
+)
 
 
 class YoutubeTranscript:
@@ -10,10 +24,34 @@ class YoutubeTranscript:
     of a YouTube video given its URL, and clean the text for further processing.
     """
 
+    def __init__(
+        self,
+        cache: Optional[DiskCache] = None,
+        http_backend: Optional[HttpBackend] = None,
+        fetch_title: bool = True,
+    ):
+        """
+        Initialize the YoutubeTranscript class
+
+        Args:
+            cache: Cache storing the cleaned title and transcript per video ID. If None, nothing is cached
+            http_backend: If given, the transcript and title are first downloaded through this backend, without
+                the pytube video info lookup. If that fails, or if None, the youtube-transcript-api and pytube are used
+            fetch_title: Whether the title is downloaded next to the transcript of the fast path. If False, the video
+                ID is used as title
+        """
+        self.cache = cache
+        self.http_backend = http_backend
+        self.fetch_title = fetch_title
+
     def download_from_url(self, video_url: str) -> Tuple[str, str]:
         """
         Download the transcript and title of a YouTube video, based on the URL.
 
+        The transcript is downloaded as segments, which pass the cleaning stages of ltf.transcript_pipeline
+        and are joined to the transcript text once at the end. If the fast path fails, e.g. because YouTube
+        changed its watch page, the youtube-transcript-api and pytube are used instead.
+
         Args:
             video_url: The URL of the YouTube video. Example: "https://www.youtube.com/watch?v=VIDEO_ID"
 
@@ -24,27 +62,142 @@ class YoutubeTranscript:
             ValueError: If the URL is not valid.
             IndexError: If the video does not have a transcript.
         """
-        try:
-            # Try loading the transcript from the YouTube URL - not all videos have transcripts
-            loader = YoutubeLoader.from_youtube_url(
-                youtube_url=video_url, language="en", add_video_info=True
+        video_id = self._video_id(video_url)
+        skip_title = self.http_backend is not None and not self.fetch_title
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.get(video_id)
+            metrics.increment(
+                "transcript_cache_hits" if cached else "transcript_cache_misses"
             )
-            yt_document = loader.load()[0]
-        except ValueError:
-            raise ValueError(
-                "Please provide a valid YouTube URL "
-                'in the form of "https://www.youtube.com/watch?v=VIDEO_ID".'
+
+        if cached is not None:
+            if cached["title"] is not None or skip_title:
+                return cached["title"] or video_id, cached["transcript"]
+            # Stored by a run without the title lookup, so only the title is downloaded
+            title, transcript = self._lookup_title(video_id), cached["transcript"]
+        else:
+            title, transcript = self._download(video_id)
+            if title is None and not skip_title:
+                title = self._download_title(video_id)
+
+        title = self._clean_text(title) if title is not None else None
+        if self.cache is not None:
+            # Without the title lookup, the transcript is stored without a title, which a later run can add
+            self.cache.set(video_id, {"title": title, "transcript": transcript})
+
+        return title or video_id, transcript
+
+    def _download(self, video_id: str) -> Tuple[Optional[str], str]:
+        """
+        Download the transcript, through the fast path if possible, and the title if the fast path provides it
+
+        Returns:
+            The uncleaned title, None if it was not downloaded, and the transcript
+
+        Raises:
+            IndexError: If the video does not have a transcript.
+        """
+        if self.http_backend is not None:
+            try:
+                return self._fast_download(video_id)
+            except Exception as error:
+                print(
+                    f"[yellow]Direct transcript download failed ({escape(str(error))}), "
+                    "retrying through the youtube-transcript-api[/yellow]",
+                    file=sys.stderr,
+                )
+        return None, join_segments(self._download_segments(video_id))
+
+    def _lookup_title(self, video_id: str) -> str:
+        """Download only the title: from the oEmbed endpoint on the fast path, through pytube otherwise"""
+        title = (
+            fetch_title(video_id, self.http_backend)
+            if self.http_backend is not None
+            else None
+        )
+        return title if title is not None else self._download_title(video_id)
+
+    def _fast_download(self, video_id: str) -> Tuple[Optional[str], str]:
+        """
+        Download the transcript and the title at the same time through the HTTP backend.
+
+        Returns:
+            The uncleaned title, None if it was not fetched or could not be downloaded, and the transcript
+
+        Raises:
+            IndexError: If the watch page does not list a transcript.
+            ConnectionError: If YouTube does not respond with the watch page or the transcript.
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            title_future = (
+                executor.submit(fetch_title, video_id, self.http_backend)
+                if self.fetch_title
+                else None
             )
-        except IndexError:
+            segments = fetch_segments(video_id, self.http_backend)
+            title = title_future.result() if title_future is not None else None
+
+        return title, join_segments(clean_segments(segments))
+
+    @classmethod
+    def download_segments(cls, video_url: str) -> Iterator[Segment]:
+        """
+        Download the transcript of a YouTube video as cleaned segments, which keep their timestamps.
+
+        Use transcript_pipeline.join_segments to get the transcript text, once it is needed.
+
+        Args:
+            video_url: The URL of the YouTube video. Example: "https://www.youtube.com/watch?v=VIDEO_ID"
+
+        Returns:
+            Iterator over the cleaned segments
+
+        Raises:
+            ValueError: If the URL is not valid.
+            IndexError: If the video does not have a transcript.
+        """
+        return cls._download_segments(cls._video_id(video_url))
+
+    @staticmethod
+    def _download_segments(video_id: str) -> Iterator[Segment]:
+        """Download the English transcript through the youtube-transcript-api and clean it segment by segment"""
+        try:
+            raw_segments = YouTubeTranscriptApi.get_transcript(
+                video_id, languages=["en"]
+            )
+        except CouldNotRetrieveTranscript:
             raise IndexError(
                 "Video does not have a transcript. Please try another video."
             )
 
-        return (
-            self._clean_text(yt_document.metadata.get("title")),
-            self._clean_text(yt_document.page_content),
+        return clean_segments(
+            Segment(raw["text"], raw["start"], raw["duration"]) for raw in raw_segments
         )
 
+    @staticmethod
+    def _download_title(video_id: str) -> str:
+        """Download the title of the video through pytube, the same way as the langchain YoutubeLoader"""
+        from pytube import YouTube
+
+        return YouTube(WATCH_URL.format(video_id=video_id)).title
+
+    @staticmethod
+    def _video_id(video_url: str) -> str:
+        """
+        Return the ID of the YouTube video
+
+        Raises:
+            ValueError: If the URL is not a valid YouTube URL.
+        """
+        video_id = extract_video_id(video_url)
+        if video_id is None:
+            raise ValueError(
+                "Please provide a valid YouTube URL "
+                'in the form of "https://www.youtube.com/watch?v=VIDEO_ID".'
+            )
+        return video_id
+
     @staticmethod
     def _clean_text(text: str) -> str:
         """
@@ -56,7 +209,4 @@ class YoutubeTranscript:
         Returns:
             The cleaned text.
         """
-        # Remove unwanted characters
-        cleaned = re.sub(r"(\xa0|\n|\[Music])", " ", text)
-        # Replace multiple whitespaces with single whitespace
-        return re.sub(r"\s+", " ", cleaned)
+        return clean_text(text)
@@ -0,0 +1,31 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ltf import LanguageTransferFlashcards
+
+
+@pytest.fixture
+def transcript():
+    """Transcript of the lesson downloaded by the flashcard_extraction fixture"""
+    return "to sleep is kulala"
+
+
+@pytest.fixture
+def flashcard_extraction(transcript):
+    with patch("ltf.language_transfer_flashcards.YoutubeTranscript") as mock:
+        mock.return_value.download_from_url.return_value = (
+            "Swahili Track 02",
+            transcript,
+        )
+        yield LanguageTransferFlashcards(
+            "https://www.youtube.com/watch?v=jIhkYHycv4M", target_language="Swahili"
+        )
+
+
+@pytest.fixture
+def llm():
+    llm = MagicMock()
+    llm.model_name = "gpt-4o"
+    llm.temperature = 0
+    return llm
@@ -0,0 +1,92 @@
+import json
+import sqlite3
+import zipfile
+
+import pytest
+
+from ltf.anki import AnkiDeckWriter, AnkiPackage, note_guid
+from ltf.models import Flashcard
+
+
+def read_package(path, tmp_path):
+    with zipfile.ZipFile(path) as package:
+        assert sorted(package.namelist()) == ["collection.anki2", "media"]
+        package.extract("collection.anki2", tmp_path)
+    connection = sqlite3.connect(tmp_path / "collection.anki2")
+    try:
+        decks = json.loads(connection.execute("SELECT decks FROM col").fetchone()[0])
+        rows = connection.execute(
+            "SELECT notes.guid, notes.flds, cards.did, cards.due "
+            "FROM notes JOIN cards ON cards.nid = notes.id ORDER BY cards.due"
+        ).fetchall()
+    finally:
+        connection.close()
+    deck_names = {int(deck_id): deck["name"] for deck_id, deck in decks.items()}
+    return [
+        (guid, fields.split("\x1f"), deck_names[did]) for guid, fields, did, _ in rows
+    ]
+
+
+def test_note_guid_is_stable():
+    assert note_guid("Swahili", "I want to go") == note_guid(
+        "Swahili", " i want to go "
+    )
+    assert note_guid("Swahili", "I want to go") != note_guid("Greek", "I want to go")
+    assert note_guid("Swahili", "I want to go") != note_guid("Swahili", "I want to eat")
+
+
+def test_write_package(tmp_path):
+    package = AnkiPackage(namespace="Swahili")
+    package.add("Swahili::Track 01", "to want", "kutaka")
+    package.add("Swahili::Track 01", "to eat", "kula")
+
+    package.write(tmp_path / "lesson.apkg")
+
+    assert read_package(tmp_path / "lesson.apkg", tmp_path) == [
+        (note_guid("Swahili", "to want"), ["to want", "kutaka"], "Swahili::Track 01"),
+        (note_guid("Swahili", "to eat"), ["to eat", "kula"], "Swahili::Track 01"),
+    ]
+
+
+def test_write_course_in_deck_order(tmp_path):
+    package = AnkiPackage(namespace="Swahili")
+    # Lessons of a batch finish in any order
+    package.add("Swahili::Track 02", "to eat", "kula")
+    package.add("Swahili::Track 02", "to want", "kutaka")
+    package.add("Swahili::Track 01", "to want", "kutaka")
+
+    package.write(
+        tmp_path / "course.apkg", deck_order=["Swahili::Track 01", "Swahili::Track 02"]
+    )
+
+    rows = read_package(tmp_path / "course.apkg", tmp_path)
+    assert [(fields[0], deck) for _, fields, deck in rows] == [
+        ("to want", "Swahili::Track 01"),
+        ("to eat", "Swahili::Track 02"),
+    ]
+
+
+@pytest.fixture
+def flashcards():
+    return [
+        Flashcard(english="to sleep", target_language="kulala"),
+        Flashcard(english="To eat", target_language="kula"),
+        Flashcard(english="I want to go!", target_language="nataka kwenda"),
+    ]
+
+
+def test_anki_deck_writer_with_exclusion(tmp_path, flashcards):
+    package = AnkiPackage(namespace="Swahili")
+
+    with AnkiDeckWriter(
+        package,
+        "Swahili::Track 01",
+        excluded_keys={"to eat"},
+        near_duplicates={"i want to go": ("i want to go", 1.0)},
+    ) as writer:
+        writer.write_all(flashcards)
+    package.write(tmp_path / "lesson.apkg")
+
+    assert (writer.written, writer.excluded, len(writer.dropped)) == (1, 1, 1)
+    rows = read_package(tmp_path / "lesson.apkg", tmp_path)
+    assert [fields for _, fields, _ in rows] == [["to sleep", "kulala"]]
@@ -0,0 +1,54 @@
+import pytest
+import typer
+
+from ltf import batch
+
+
+def test_resolve_urls_from_file(tmp_path):
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text(
+        "# Swahili course\n"
+        "https://www.youtube.com/watch?v=VIDEO_1\n"
+        "\n"
+        "https://www.youtube.com/watch?v=VIDEO_2\n"
+        "https://www.youtube.com/watch?v=VIDEO_1\n"
+    )
+
+    assert batch.resolve_urls(str(url_file)) == [
+        "https://www.youtube.com/watch?v=VIDEO_1",
+        "https://www.youtube.com/watch?v=VIDEO_2",
+    ]
+
+
+def test_resolve_urls_invalid_source():
+    with pytest.raises(ValueError, match="neither a file"):
+        batch.resolve_urls("https://www.youtube.com/watch?v=VIDEO_ID")
+
+
+def test_run_batch_collects_failures_without_aborting():
+    def process_lesson(url):
+        if url.endswith("2"):
+            raise IndexError("Video does not have a transcript.")
+        return f"{url[-1]}.csv"
+
+    urls = [f"https://www.youtube.com/watch?v=VIDEO_{i}" for i in range(1, 4)]
+    results = batch.run_batch(urls, process_lesson, concurrency=2)
+
+    assert [result.url for result in results] == urls
+    assert [result.filename for result in results] == ["1.csv", None, "3.csv"]
+    assert results[1].error == "Video does not have a transcript."
+    assert [result.ok for result in results] == [True, False, True]
+
+
+def test_run_batch_stops_on_fatal_errors():
+    processed = []
+
+    def process_lesson(url):
+        processed.append(url)
+        raise typer.Abort()
+
+    urls = [f"https://www.youtube.com/watch?v=VIDEO_{i}" for i in range(1, 11)]
+    with pytest.raises(typer.Abort):
+        batch.run_batch(urls, process_lesson, concurrency=1)
+
+    assert len(processed) < len(urls)
@@ -0,0 +1,60 @@
+import gzip
+import os
+
+from ltf.cache import DiskCache
+
+
+def test_set_and_get(tmp_path):
+    cache = DiskCache(tmp_path, max_size_bytes=1024 * 1024)
+    cache.set("VIDEO_ID", {"title": "Test Title", "transcript": "Test Content"})
+
+    assert cache.get("VIDEO_ID") == {
+        "title": "Test Title",
+        "transcript": "Test Content",
+    }
+    assert cache.get("MISSING_ID") is None
+
+
+def test_entries_are_compressed(tmp_path):
+    cache = DiskCache(tmp_path, max_size_bytes=1024 * 1024)
+    cache.set("VIDEO_ID", {"transcript": "word " * 10_000})
+
+    entry = tmp_path / "VIDEO_ID.json.gz"
+    assert entry.stat().st_size < 1000
+    with gzip.open(entry, "rt") as file:
+        assert "word word" in file.read()
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = DiskCache(tmp_path, max_size_bytes=1024 * 1024, ttl_seconds=-1)
+    cache.set("VIDEO_ID", {"title": "Test Title"})
+
+    assert cache.get("VIDEO_ID") is None
+    assert not (tmp_path / "VIDEO_ID.json.gz").exists()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(tmp_path, max_size_bytes=1024 * 1024)
+    for index, key in enumerate(["first", "second", "third"]):
+        cache.set(key, {"data": str(index) * 200})
+        os.utime(tmp_path / f"{key}.json.gz", (index, index))
+
+    # Reading "first" marks it as recently used, so "second" is the oldest entry
+    assert cache.get("first") is not None
+    entry_size = (tmp_path / "first.json.gz").stat().st_size
+    # Leave some slack, the size of an entry varies by a few bytes
+    cache.max_size_bytes = 3 * entry_size + entry_size // 2
+    cache.set("fourth", {"data": "3" * 200})
+
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+    assert cache.get("fourth") is not None
+
+
+def test_clear(tmp_path):
+    cache = DiskCache(tmp_path / "transcripts", max_size_bytes=1024 * 1024)
+    cache.set("VIDEO_ID", {"title": "Test Title"})
+    cache.clear()
+
+    assert cache.get("VIDEO_ID") is None
@@ -0,0 +1,161 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from typer.testing import CliRunner
+
+from ltf.cascade import check_flashcards
+from ltf.cli import app
+from ltf.known_vocabulary import KnownVocabulary
+from ltf.metrics import metrics
+from ltf.models import Flashcard, FlashcardSet
+
+TRANSCRIPT = "how would you say to want? kutaka. and to sleep? kulala. I want to sleep, nataka kulala"
+
+
+def flashcard_set(*pairs):
+    return FlashcardSet(
+        flashcards=[
+            Flashcard(english=english, target_language=target_language)
+            for english, target_language in pairs
+        ]
+    )
+
+
+GOOD = flashcard_set(
+    ("to want", "kutaka"), ("to sleep", "kulala"), ("I want to sleep", "nataka kulala")
+)
+
+
+def create_llm(model_name):
+    llm = MagicMock()
+    llm.model_name = model_name
+    llm.temperature = 0
+    return llm
+
+
+@pytest.fixture
+def transcript():
+    return TRANSCRIPT
+
+
+def test_check_flashcards_passes_grounded_flashcards():
+    assert check_flashcards(GOOD, TRANSCRIPT) == []
+
+
+@pytest.mark.parametrize(
+    "flashcards, transcript, failure",
+    [
+        (flashcard_set(), TRANSCRIPT, "only 0 flashcards, at least 1 expected"),
+        (GOOD, " ".join([TRANSCRIPT] * 100), "only 3 flashcards, at least 5 expected"),
+        (
+            flashcard_set(("to want", "kutaka"), ("to sleep", "to sleep")),
+            TRANSCRIPT,
+            "1 flashcards without a translation",
+        ),
+        (
+            flashcard_set(
+                ("to want", "kutaka"), ("to eat", "kula"), ("to go", "kwenda")
+            ),
+            TRANSCRIPT,
+            "only 1 of 3 target language texts found in the transcript",
+        ),
+    ],
+)
+def test_check_flashcards_failures(flashcards, transcript, failure):
+    assert check_flashcards(flashcards, transcript) == [failure]
+
+
+def test_flashcard_count_is_not_checked_with_known_vocabulary():
+    transcript = " ".join([TRANSCRIPT] * 100)
+
+    assert check_flashcards(GOOD, transcript, known_vocabulary=True) == []
+    assert check_flashcards(flashcard_set(), transcript, known_vocabulary=True) == []
+
+
+def test_lessons_with_known_vocabulary_are_not_escalated_for_fewer_flashcards(
+    flashcard_extraction,
+):
+    cheap, strong = create_llm("gpt-4o-mini"), create_llm("gpt-4o")
+    flashcard_extraction.escalation_llm = strong
+    flashcard_extraction.transcript = " ".join([TRANSCRIPT] * 100)
+    flashcard_extraction.known_vocabulary = KnownVocabulary(
+        ["how would you say"], token_budget=100
+    )
+
+    with patch.object(
+        flashcard_extraction, "_call_llm", return_value=GOOD
+    ) as mock_call_llm:
+        assert flashcard_extraction._create_flashcards(cheap) == GOOD
+
+    assert [call.args[0] for call in mock_call_llm.call_args_list] == [cheap]
+
+
+def test_only_failing_lessons_are_escalated(flashcard_extraction):
+    cheap, strong = create_llm("gpt-4o-mini"), create_llm("gpt-4o")
+    flashcard_extraction.escalation_llm = strong
+    outputs = {"gpt-4o-mini": GOOD, "gpt-4o": flashcard_set(("to be", "kuwa"))}
+
+    with patch.object(
+        flashcard_extraction,
+        "_call_llm",
+        side_effect=lambda llm, *_: outputs[llm.model_name],
+    ) as mock_call_llm:
+        assert flashcard_extraction._create_flashcards(cheap) == GOOD
+        assert mock_call_llm.call_count == 1
+
+        outputs["gpt-4o-mini"] = flashcard_set(("to eat", "kula"))
+        before = metrics.counters.get("cascade_escalations", 0)
+        flashcards = flashcard_extraction._create_flashcards(cheap)
+
+    assert flashcards == outputs["gpt-4o"]
+    assert [call.args[0] for call in mock_call_llm.call_args_list[1:]] == [
+        cheap,
+        strong,
+    ]
+    assert metrics.counters["cascade_escalations"] == before + 1
+
+
+def test_invalid_output_is_escalated(flashcard_extraction):
+    cheap, strong = create_llm("gpt-4o-mini"), create_llm("gpt-4o")
+    flashcard_extraction.escalation_llm = strong
+
+    def call_llm(llm, *_):
+        if llm is cheap:
+            FlashcardSet.parse_obj({"flashcards": [{"english": "to want"}]})
+        return GOOD
+
+    with patch.object(flashcard_extraction, "_call_llm", side_effect=call_llm):
+        assert flashcard_extraction._create_flashcards(cheap) == GOOD
+
+
+def test_other_errors_are_not_escalated(flashcard_extraction):
+    cheap, strong = create_llm("gpt-4o-mini"), create_llm("gpt-4o")
+    flashcard_extraction.escalation_llm = strong
+
+    with patch.object(
+        flashcard_extraction, "_call_llm", side_effect=ValueError("a bug")
+    ) as mock_call_llm:
+        with pytest.raises(ValueError, match="a bug"):
+            flashcard_extraction._create_flashcards(cheap)
+
+    assert mock_call_llm.call_count == 1
+
+
+def test_cascade_can_not_be_streamed():
+    result = CliRunner().invoke(
+        app,
+        [
+            "csv",
+            "https://www.youtube.com/watch?v=jIhkYHycv4M",
+            "-l",
+            "Swahili",
+            "-k",
+            "sk-test",
+            "--stream",
+            "--escalation-model",
+            "gpt-4o",
+        ],
+    )
+
+    assert result.exit_code == 2
+    assert "Invalid value for '--stream'" in result.output
@@ -0,0 +1,53 @@
+import pytest
+
+from ltf import chunking
+from ltf.exclusion import normalize_key
+from ltf.models import Flashcard, FlashcardSet
+
+
+def test_split_transcript_overlapping_windows():
+    transcript = " ".join(str(number) for number in range(10))
+
+    assert chunking.split_transcript(transcript, chunk_size=4, overlap=1) == [
+        "0 1 2 3",
+        "3 4 5 6",
+        "6 7 8 9",
+    ]
+
+
+def test_split_transcript_shorter_than_chunk_size():
+    assert chunking.split_transcript("to sleep", chunk_size=100, overlap=10) == [
+        "to sleep"
+    ]
+
+
+@pytest.mark.parametrize("chunk_size, overlap", [(0, 0), (10, 10), (10, -1)])
+def test_split_transcript_invalid_parameters(chunk_size, overlap):
+    with pytest.raises(ValueError):
+        chunking.split_transcript("to sleep", chunk_size=chunk_size, overlap=overlap)
+
+
+def test_merge_flashcard_sets_keeps_first_occurrence_in_lesson_order():
+    first = FlashcardSet(
+        flashcards=[
+            Flashcard(english="to sleep", target_language="kulala"),
+            Flashcard(english="to eat", target_language="kula"),
+        ]
+    )
+    second = FlashcardSet(
+        flashcards=[
+            Flashcard(english="To eat ", target_language="kula"),
+            Flashcard(english="to want", target_language="kutaka"),
+        ]
+    )
+
+    merged = chunking.merge_flashcard_sets([first, second])
+
+    assert [flashcard.english for flashcard in merged.flashcards] == [
+        "to sleep",
+        "to eat",
+        "to want",
+    ]
+    assert (
+        len({normalize_key(flashcard.english) for flashcard in merged.flashcards}) == 3
+    )
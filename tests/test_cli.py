@@ -5,6 +5,7 @@ import pytest
 from typer.testing import CliRunner
 
 from ltf.cli import app
+from ltf.cli.cli import _resolve_chunk_overlap
 from ltf.config import settings
 
 runner = CliRunner()
@@ -101,10 +102,27 @@ def test_prompt_command():
         prompt_file_contents = prompt_file.read()
 
     # Test if the prompt contains the correct data
-    assert (
-        "Act as a language expert fluent in both Swahili and English."
-        in prompt_file_contents
-    )
+    assert "Target language: Swahili" in prompt_file_contents
 
     # Clean Up
     Path(file_name).unlink()
+
+
+@pytest.mark.parametrize(
+    "chunk_size, chunk_overlap, expected",
+    [(0, None, 0), (80, None, 16), (1500, None, 100), (80, 10, 10), (0, 500, 500)],
+)
+def test_chunk_overlap_defaults_to_the_chunk_size(chunk_size, chunk_overlap, expected):
+    assert _resolve_chunk_overlap(chunk_size, chunk_overlap) == expected
+
+
+def test_chunk_overlap_is_checked_in_any_parameter_order():
+    arguments = ["csv", "lesson.txt", "-l", "Swahili", "-k", "sk-test"]
+    for options in (
+        ["--chunk-overlap", "500", "--chunk-size", "80"],
+        ["--chunk-size", "80", "--chunk-overlap", "500"],
+    ):
+        result = runner.invoke(app, arguments + options)
+
+        assert result.exit_code == 2
+        assert "Invalid value for '--chunk-overlap'" in result.output
@@ -0,0 +1,115 @@
+import pytest
+from typer.testing import CliRunner
+
+from ltf import LanguageTransferFlashcards
+from ltf.cli import app
+from ltf.compression import (
+    collapse_repetitions,
+    compress_transcript,
+    filler_words,
+    remove_fillers,
+)
+from ltf.local_transcript import read_transcript
+
+runner = CliRunner()
+
+TRANSCRIPT = (
+    "um so uh how would you say I want I want to go? okay so w- want is kutaka kutaka. "
+    "uh and to go is kwenda, so I want to go is nataka kwenda nataka kwenda"
+)
+
+
+def test_remove_fillers():
+    assert remove_fillers("um so uh I, uh, want Okay so w- want it".split()) == [
+        "so",
+        "I,",
+        "want",
+        "want",
+        "it",
+    ]
+
+
+def test_fillers_of_the_target_language_are_kept():
+    words = "sie kommt um acht, uh, er kommt".split()
+
+    assert "um" not in filler_words("German")
+    assert remove_fillers(words, filler_words("German")) == [
+        "sie",
+        "kommt",
+        "um",
+        "acht,",
+        "er",
+        "kommt",
+    ]
+    assert remove_fillers(words) == ["sie", "kommt", "acht,", "kommt"]
+
+
+@pytest.mark.parametrize(
+    "transcript, collapsed",
+    [
+        ("the the the word", "the word"),
+        ("I want I want to go", "I want to go"),
+        ("kutaka kutaka. is to want", "kutaka is to want"),
+        ("a b c d a b c d e", "a b c d e"),
+        ("a b c d e a b c d e", "a b c d e a b c d e"),
+        ("no repetition here", "no repetition here"),
+    ],
+)
+def test_collapse_repetitions(transcript, collapsed):
+    assert " ".join(collapse_repetitions(transcript.split())) == collapsed
+
+
+def test_compress_transcript_keeps_every_word():
+    result = compress_transcript(TRANSCRIPT, target_language="Swahili")
+
+    assert result.transcript == (
+        "so how would you say I want to go? want is kutaka and to go is kwenda, "
+        "so I want to go is nataka kwenda"
+    )
+    removed = {"um", "uh", "okay", "w-"}
+    assert {word.strip(".,?").lower() for word in TRANSCRIPT.split()} - removed == {
+        word.strip(".,?").lower() for word in result.transcript.split()
+    }
+    assert result.tokens_before == 38
+    assert result.tokens_after == 26
+    assert result.reduction == pytest.approx(12 / 38)
+
+
+def test_compression_can_be_disabled():
+    result = compress_transcript(TRANSCRIPT, remove_filler_words=False, max_ngram=0)
+
+    assert result.transcript == TRANSCRIPT
+    assert result.reduction == 0
+
+
+def test_lesson_sends_compressed_transcript(tmp_path):
+    path = tmp_path / "Swahili Track 01.txt"
+    path.write_text(TRANSCRIPT)
+    transcript = read_transcript(path)
+
+    lesson = LanguageTransferFlashcards(
+        str(path), target_language="Swahili", transcript=transcript, compress=True
+    )
+
+    assert lesson.compression.tokens_before == 38
+    assert lesson.render_prompt().rstrip().endswith("nataka kwenda")
+    assert "kutaka kutaka" not in lesson.render_prompt()
+    assert (
+        LanguageTransferFlashcards(
+            str(path), target_language="Swahili", transcript=transcript, compress=False
+        ).compression
+        is None
+    )
+
+
+def test_prompt_command_with_compression(tmp_path, monkeypatch):
+    (tmp_path / "Swahili Track 01.txt").write_text(TRANSCRIPT)
+    monkeypatch.chdir(tmp_path)
+
+    result = runner.invoke(
+        app, ["prompt", "Swahili Track 01.txt", "-l", "Swahili", "--compress"]
+    )
+
+    assert result.exit_code == 0
+    prompt = (tmp_path / "swahili_track_01.txt").read_text(encoding="utf-8")
+    assert "I want to go? want is kutaka and" in prompt
@@ -0,0 +1,111 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from typer.testing import CliRunner
+
+from ltf import corpus
+from ltf.cli import app
+from ltf.corpus import HIGHLIGHT_END, HIGHLIGHT_START, CorpusStore, to_match_query
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def store(tmp_path):
+    with CorpusStore(tmp_path / "corpus.sqlite3") as store:
+        store.add_lesson(
+            "VIDEO_1",
+            "Swahili Track 01",
+            "Swahili",
+            [("to want", "kutaka"), ("I want to go out", "Nataka kutoka")],
+        )
+        store.add_lesson(
+            "VIDEO_2",
+            "Swahili Track 02",
+            "Swahili",
+            [("to sleep", "kulala"), ("Do you want to sleep?", "Unataka kulala?")],
+        )
+        store.add_lesson("VIDEO_3", "Greek Track 01", "Greek", [("I want", "Thélo")])
+        yield store
+
+
+def test_search_in_both_languages(store):
+    (result,) = store.search("kutaka")
+    assert (result.title, result.video_id, result.position) == (
+        "Swahili Track 01",
+        "VIDEO_1",
+        0,
+    )
+    assert result.target_text == f"{HIGHLIGHT_START}kutaka{HIGHLIGHT_END}"
+
+    assert [result.english for result in store.search("sleep")] == [
+        f"to {HIGHLIGHT_START}sleep{HIGHLIGHT_END}",
+        f"Do you want to {HIGHLIGHT_START}sleep{HIGHLIGHT_END}?",
+    ]
+
+
+def test_search_matches_word_beginnings_without_diacritics(store):
+    assert [result.video_id for result in store.search("thel")] == ["VIDEO_3"]
+    assert len(store.search("want", target_language="Swahili")) == 3
+    assert store.search("want", limit=2)[0].english.startswith("to ")
+
+
+def test_rerunning_a_lesson_replaces_its_flashcards(store):
+    store.add_lesson("VIDEO_1", "Swahili Track 01", "Swahili", [("to eat", "kula")])
+
+    assert store.search("kutaka") == []
+    assert [result.target_text for result in store.search("eat")] == ["kula"]
+    assert len(store) == 4
+
+
+@pytest.mark.parametrize("query", ['"', "want?", "AND", "to-*", ""])
+def test_search_handles_query_syntax(store, query):
+    store.search(query)
+
+
+def test_to_match_query():
+    assert to_match_query('want "to" go') == '"want"* """to"""* "go"*'
+
+
+def test_search_is_fast_for_a_large_collection(tmp_path):
+    with CorpusStore(tmp_path / "corpus.sqlite3") as store:
+        for lesson in range(200):
+            store.add_lesson(
+                f"VIDEO_{lesson}",
+                f"Swahili Track {lesson}",
+                "Swahili",
+                [
+                    (f"sentence {lesson} {card}", f"sentensi {card}")
+                    for card in range(250)
+                ],
+            )
+        store.add_lesson(
+            "VIDEO_X", "Swahili Track X", "Swahili", [("to want", "kutaka")]
+        )
+
+        start = time.perf_counter()
+        results = store.search("kutaka")
+        duration = time.perf_counter() - start
+
+    assert [result.video_id for result in results] == ["VIDEO_X"]
+    assert duration < 0.05
+
+
+def test_search_command(tmp_path):
+    corpus_file = tmp_path / "corpus.sqlite3"
+    with CorpusStore(corpus_file) as store:
+        store.add_lesson(
+            "VIDEO_1", "Swahili [Track 01]", "Swahili", [("to want", "kutaka")]
+        )
+
+    with patch.object(corpus, "CORPUS_FILE", corpus_file):
+        result = runner.invoke(app, ["search", "kutaka"])
+    assert result.exit_code == 0
+    assert "1 matches in 1 flashcards" in result.output
+    assert "Swahili [Track 01]" in result.output
+
+    with patch.object(corpus, "CORPUS_FILE", tmp_path / "missing.sqlite3"):
+        result = runner.invoke(app, ["search", "kutaka"])
+    assert result.exit_code == 1
+    assert "CORPUS_ENABLED=true" in result.output
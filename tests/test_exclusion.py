@@ -0,0 +1,96 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from ltf import exclusion
+from ltf.cache import DiskCache
+
+
+@pytest.fixture
+def index(tmp_path):
+    return DiskCache(tmp_path / "index", max_size_bytes=1024 * 1024)
+
+
+@pytest.fixture
+def exclude_dir(tmp_path):
+    directory = tmp_path / "decks"
+    directory.mkdir()
+    (directory / "lesson_01.csv").write_text("To sleep ,kulala\n\nto eat,kula\n")
+    (directory / "lesson_02.csv").write_text("to want,kutaka\n")
+    (directory / "notes.txt").write_text("ignored,ignored\n")
+    return directory
+
+
+def test_load_english_keys(exclude_dir, index):
+    assert exclusion.load_english_keys(exclude_dir, index=index) == {
+        "to sleep",
+        "to eat",
+        "to want",
+    }
+
+
+def test_load_english_keys_only_parses_new_and_modified_files(exclude_dir, index):
+    exclusion.load_english_keys(exclude_dir, index=index)
+
+    (exclude_dir / "lesson_02.csv").write_text("to want,kutaka\nto go,kwenda\n")
+    (exclude_dir / "lesson_03.csv").write_text("to sleep well,kulala salama\n")
+    with patch.object(exclusion, "_read_keys", wraps=exclusion._read_keys) as read:
+        keys = exclusion.load_english_keys(exclude_dir, index=index)
+
+    assert sorted(call.args[0].name for call in read.call_args_list) == [
+        "lesson_02.csv",
+        "lesson_03.csv",
+    ]
+    assert keys == {"to sleep", "to eat", "to want", "to go", "to sleep well"}
+
+
+def test_load_english_keys_touched_file_is_not_parsed(exclude_dir, index):
+    exclusion.load_english_keys(exclude_dir, index=index)
+
+    os.utime(exclude_dir / "lesson_01.csv", (0, 0))
+    with patch.object(exclusion, "_read_keys") as read:
+        keys = exclusion.load_english_keys(exclude_dir, index=index)
+
+    read.assert_not_called()
+    assert keys == {"to sleep", "to eat", "to want"}
+
+
+def test_load_english_keys_deleted_file(exclude_dir, index):
+    exclusion.load_english_keys(exclude_dir, index=index)
+    (exclude_dir / "lesson_02.csv").unlink()
+
+    assert exclusion.load_english_keys(exclude_dir, index=index) == {
+        "to sleep",
+        "to eat",
+    }
+
+
+def test_find_near_duplicates(exclude_dir, index):
+    (exclude_dir / "lesson_03.csv").write_text("I want to go.,nataka kwenda\n!!!,\n")
+
+    matches = exclusion.find_near_duplicates(
+        exclude_dir,
+        ["I want to go", "To sleep!", "to travel"],
+        threshold=0.7,
+        index=index,
+    )
+
+    assert matches == {
+        "i want to go": ("i want to go", 1.0),
+        "to sleep": ("to sleep", 1.0),
+    }
+
+
+def test_find_near_duplicates_reuses_bucket_keys(exclude_dir, index):
+    # The bucket keys depend on the banding of the threshold
+    exclusion.find_near_duplicates(exclude_dir, ["to go"], threshold=0.6, index=index)
+
+    with patch.object(exclusion, "_read_keys") as read:
+        matches = exclusion.find_near_duplicates(
+            exclude_dir, ["to eat now"], threshold=0.6, index=index
+        )
+
+    read.assert_not_called()
+    assert list(matches) == ["to eat now"]
+    assert matches["to eat now"][0] == "to eat"
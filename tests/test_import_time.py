@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+import pytest
+
+# Heavy dependencies, which must only be imported by the commands using them
+HEAVY_MODULES = {
+    "langchain_community",
+    "langchain_core",
+    "langchain_openai",
+    "openai",
+    "pydantic",
+    "pydantic_settings",
+    "pytube",
+    "yaml",
+}
+
+
+def import_times(module: str) -> dict:
+    """Import the module in a fresh interpreter and return the cumulative import time in µs per module"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["ltf", "ltf.cli", "ltf.config"])
+def test_import_does_not_load_heavy_dependencies(module):
+    loaded = {name.split(".")[0] for name in import_times(module)}
+    assert not loaded & HEAVY_MODULES
@@ -0,0 +1,64 @@
+import csv
+from unittest.mock import patch
+
+from ltf import LanguageTransferFlashcards
+from ltf.known_vocabulary import SECTION_HEADER, KnownVocabulary
+
+TRANSCRIPT = "how would you say to want? kutaka. and I want to sleep? nataka kulala"
+KNOWN_KEYS = [
+    "i want to sleep",
+    "to want",
+    "to eat",
+    "where do you want to go?",
+    "i want to travel now",
+]
+
+
+def test_digest_ranks_the_most_relevant_texts_first():
+    known = KnownVocabulary(KNOWN_KEYS, token_budget=1000)
+
+    # "to eat" and "i want to travel now" are not taught in the transcript
+    assert known.digest(TRANSCRIPT) == [
+        "to want",
+        "i want to sleep",
+        "where do you want to go?",
+    ]
+
+
+def test_digest_is_limited_to_the_token_budget():
+    # 4 characters per token: "to want" and "i want to sleep" with their newlines use 24 characters
+    assert KnownVocabulary(KNOWN_KEYS, token_budget=6).digest(TRANSCRIPT) == [
+        "to want",
+        "i want to sleep",
+    ]
+    assert KnownVocabulary(KNOWN_KEYS, token_budget=1).digest(TRANSCRIPT) == []
+
+
+def test_prompt_section():
+    known = KnownVocabulary(KNOWN_KEYS, token_budget=2)
+
+    assert known.prompt_section(TRANSCRIPT) == SECTION_HEADER + "to want\n\n"
+    assert known.prompt_section("kula") == ""
+
+
+def test_known_vocabulary_is_passed_into_the_prompt(tmp_path):
+    with open(tmp_path / "track_01.csv", "w", newline="") as file:
+        csv.writer(file).writerows([["To want", "kutaka"], ["to eat", "kula"]])
+    with patch("ltf.language_transfer_flashcards.YoutubeTranscript") as mock:
+        mock.return_value.download_from_url.return_value = (
+            "Swahili Track 02",
+            TRANSCRIPT,
+        )
+        lesson = LanguageTransferFlashcards(
+            "https://www.youtube.com/watch?v=jIhkYHycv4M", target_language="Swahili"
+        )
+    without_known_vocabulary = lesson.render_prompt()
+
+    with patch("ltf.utils.exclusion_index", return_value=None):
+        lesson.use_known_vocabulary(str(tmp_path), token_budget=100)
+    prompt = lesson.render_prompt()
+
+    assert (
+        prompt.replace(SECTION_HEADER + "to want\n\n", "") == without_known_vocabulary
+    )
+    assert "\n\n*** Already Known ***" in prompt
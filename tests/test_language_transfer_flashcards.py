@@ -0,0 +1,193 @@
+from unittest.mock import patch
+
+from langchain_core.runnables import RunnableGenerator, RunnableLambda
+
+from ltf import LanguageTransferFlashcards, utils
+from ltf.cache import DiskCache, flashcard_cache_key
+from ltf.corpus import CorpusStore
+from ltf.language_transfer_flashcards import compiled_prompt_template
+from ltf.metrics import metrics
+from ltf.models import CompactFlashcardSet, Flashcard, FlashcardSet
+
+
+def test_flashcard_cache_key_depends_on_all_inputs():
+    key = flashcard_cache_key("prompt", "gpt-4o", 0)
+    assert key == flashcard_cache_key("prompt", "gpt-4o", 0)
+    assert key != flashcard_cache_key("other prompt", "gpt-4o", 0)
+    assert key != flashcard_cache_key("prompt", "gpt-4o-mini", 0)
+    assert key != flashcard_cache_key("prompt", "gpt-4o", 0.5)
+
+
+def test_prompts_of_all_lessons_share_the_static_instructions(flashcard_extraction):
+    with patch("ltf.language_transfer_flashcards.YoutubeTranscript") as mock:
+        mock.return_value.download_from_url.return_value = (
+            "Greek Track 01",
+            "to want is thelo",
+        )
+        other_lesson = LanguageTransferFlashcards(
+            "https://www.youtube.com/watch?v=OTHER_ID", target_language="Greek"
+        )
+
+    # Everything before the first template variable is identical for every lesson
+    prefix = utils.load_template().split("{", 1)[0]
+    assert "*** Output Format ***" in prefix
+    assert flashcard_extraction.render_prompt().startswith(prefix)
+    assert other_lesson.render_prompt().startswith(prefix)
+    assert other_lesson.prompt_template is compiled_prompt_template()
+
+
+def test_create_flashcards_reuses_cached_result(flashcard_extraction, llm, tmp_path):
+    llm_cache = DiskCache(tmp_path, max_size_bytes=1024 * 1024)
+    flashcards = FlashcardSet(
+        flashcards=[Flashcard(english="to sleep", target_language="kulala")]
+    )
+
+    with patch.object(
+        flashcard_extraction, "_call_llm", return_value=flashcards
+    ) as call_llm:
+        first = flashcard_extraction._create_flashcards(llm, llm_cache=llm_cache)
+        second = flashcard_extraction._create_flashcards(llm, llm_cache=llm_cache)
+
+    call_llm.assert_called_once()
+    assert first == second == flashcards
+    assert (llm_cache.hits, llm_cache.misses) == (1, 1)
+
+
+def test_prompt_is_rendered_once_per_llm_call(flashcard_extraction, llm, tmp_path):
+    llm_cache = DiskCache(tmp_path, max_size_bytes=1024 * 1024)
+    llm.with_structured_output.return_value = RunnableLambda(
+        lambda _: FlashcardSet(flashcards=[])
+    )
+    renders = metrics.spans.get("prompt_render", {}).get("count", 0)
+
+    flashcard_extraction._create_flashcards(llm, llm_cache=llm_cache)
+
+    assert metrics.spans["prompt_render"]["count"] == renders + 1
+
+
+def test_create_flashcards_without_cache(flashcard_extraction, llm):
+    flashcards = FlashcardSet(flashcards=[])
+
+    with patch.object(
+        flashcard_extraction, "_call_llm", return_value=flashcards
+    ) as call_llm:
+        flashcard_extraction._create_flashcards(llm)
+        flashcard_extraction._create_flashcards(llm)
+
+    assert call_llm.call_count == 2
+
+
+def test_create_flashcards_in_chunks(flashcard_extraction, llm):
+    flashcard_extraction.transcript = "one two three four five six"
+
+    def call_llm(_, transcript, *__):
+        return FlashcardSet(
+            flashcards=[
+                Flashcard(english=word, target_language=word.upper())
+                for word in transcript.split()
+            ]
+        )
+
+    with patch.object(
+        flashcard_extraction, "_call_llm", side_effect=call_llm
+    ) as mock_call_llm:
+        flashcards = flashcard_extraction._create_flashcards(
+            llm, chunk_size=3, chunk_overlap=1
+        )
+
+    assert mock_call_llm.call_count == 3
+    assert [flashcard.english for flashcard in flashcards.flashcards] == [
+        "one",
+        "two",
+        "three",
+        "four",
+        "five",
+        "six",
+    ]
+
+
+def test_stream_flashcards_writes_cards_and_caches_result(
+    flashcard_extraction, llm, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    llm_cache = DiskCache(tmp_path / "cache", max_size_bytes=1024 * 1024)
+    partial_outputs = [
+        {"flashcards": [{"english": "to sleep", "target_language": "kulala"}]},
+        {
+            "flashcards": [
+                {"english": "to sleep", "target_language": "kulala"},
+                {"english": "to eat", "target_language": "kula"},
+            ]
+        },
+    ]
+
+    def generate(_):
+        yield from partial_outputs
+
+    llm.with_structured_output.return_value = RunnableGenerator(generate)
+
+    output = flashcard_extraction.stream_flashcards(
+        llm, delimiter=",", exclude="", llm_cache=llm_cache
+    )
+
+    assert output == "swahili_track_02.csv"
+    assert (tmp_path / output).read_text().splitlines() == [
+        "to sleep,kulala",
+        "to eat,kula",
+    ]
+    cached = list(flashcard_extraction._stream_flashcards(llm, llm_cache=llm_cache))
+    assert [flashcard.english for flashcard in cached] == ["to sleep", "to eat"]
+    assert (llm_cache.hits, llm_cache.misses) == (1, 1)
+
+
+def test_stream_to_stdout_prints_status_messages_to_stderr(
+    flashcard_extraction, llm, tmp_path, capsys
+):
+    def generate(_):
+        yield {"flashcards": [{"english": "to sleep", "target_language": "kulala"}]}
+
+    llm.with_structured_output.return_value = RunnableGenerator(generate)
+
+    flashcard_extraction.stream_flashcards(
+        llm, delimiter=",", exclude=str(tmp_path / "missing"), output="-"
+    )
+
+    captured = capsys.readouterr()
+    assert captured.out == "to sleep,kulala\r\n"
+    assert "Continuing without loading existing flashcards" in captured.err
+
+
+def test_compact_schema_is_decoded_into_flashcards(flashcard_extraction, llm):
+    flashcard_extraction.compact_schema = True
+    llm.with_structured_output.return_value = RunnableLambda(
+        lambda _: CompactFlashcardSet(cards=[["to sleep", "kulala"]])
+    )
+
+    flashcards = flashcard_extraction._call_llm(llm, "to sleep is kulala")
+
+    llm.with_structured_output.assert_called_once_with(CompactFlashcardSet)
+    assert flashcards == FlashcardSet(
+        flashcards=[Flashcard(english="to sleep", target_language="kulala")]
+    )
+
+
+def test_create_csv_adds_flashcards_to_corpus(
+    flashcard_extraction, llm, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    store = CorpusStore(tmp_path / "corpus.sqlite3")
+    flashcards = FlashcardSet(
+        flashcards=[Flashcard(english="to sleep", target_language="kulala")]
+    )
+
+    with patch.object(
+        flashcard_extraction, "_call_llm", return_value=flashcards
+    ), patch("ltf.corpus.default_store", return_value=store):
+        flashcard_extraction.create_csv(llm, delimiter=",", exclude="")
+
+    (result,) = store.search("kulala")
+    assert (result.title, result.video_id, result.position) == (
+        "Swahili Track 02",
+        "jIhkYHycv4M",
+        0,
+    )
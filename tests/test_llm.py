@@ -0,0 +1,38 @@
+from ltf.llm import LOCAL_API_KEY, Backend, create_chat_model, shared_http_client
+
+
+def test_shared_http_client_is_reused():
+    assert shared_http_client(30, 10) is shared_http_client(30, 10)
+    assert shared_http_client(30, 10) is not shared_http_client(60, 10)
+
+
+def test_chat_models_share_the_connection_pool():
+    first = create_chat_model(
+        "gpt-4o", api_key="sk-test", timeout=30, max_connections=10
+    )
+    second = create_chat_model(
+        "gpt-4o-mini", api_key="sk-test", timeout=30, max_connections=10
+    )
+
+    assert first.http_client is second.http_client is shared_http_client(30, 10)
+    assert first.root_client._client is second.root_client._client
+    assert first.temperature == 0
+    # Retries are scheduled by the shared rate limiter instead
+    assert first.max_retries == 0
+
+
+def test_local_backend_uses_default_url_without_api_key():
+    llm = create_chat_model("llama3.1", api_key=None, backend=Backend.OLLAMA)
+
+    assert llm.openai_api_base == "http://localhost:11434/v1"
+    assert llm.openai_api_key.get_secret_value() == LOCAL_API_KEY
+
+
+def test_custom_base_url():
+    llm = create_chat_model(
+        "my-model",
+        api_key=None,
+        backend=Backend.VLLM,
+        base_url="http://gpu-box:8000/v1",
+    )
+    assert llm.openai_api_base == "http://gpu-box:8000/v1"
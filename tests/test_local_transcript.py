@@ -0,0 +1,135 @@
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from ltf import local_transcript
+from ltf.cli import app
+from ltf.local_transcript import iter_transcripts, parse_timestamp, read_transcript
+from ltf.transcript_pipeline import Segment
+
+runner = CliRunner()
+
+VTT = """WEBVTT
+Kind: captions
+Language: en
+
+NOTE auto-generated by YouTube
+
+00:00:00.000 --> 00:00:02.500 align:start position:0%
+[Music]
+
+00:00:02.500 --> 00:00:05.600 align:start position:0%
+how<00:00:03.000><c> would</c><00:00:03.200><c> you</c> say &quot;to want&quot;?
+
+00:00:05.600 --> 00:00:07.800 align:start position:0%
+how would you say &quot;to want&quot;?
+kutaka
+"""
+
+SRT = """1
+00:00:02,500 --> 00:00:05,600
+<i>how would you say</i>
+"to want"?
+
+2
+00:00:05,600 --> 00:00:07,800
+kutaka
+"""
+
+TRANSCRIPT = 'how would you say "to want"? kutaka'
+
+
+@pytest.mark.parametrize(
+    "filename, content",
+    [
+        ("Swahili Track 01.vtt", VTT),
+        ("Swahili Track 01.srt", "﻿" + SRT),
+        ("Swahili Track 01.txt", 'how would you say\n\n"to want"?\xa0kutaka\n'),
+        (
+            "Swahili Track 01.json",
+            json.dumps(
+                [
+                    {"text": "how would you say", "start": 2.5, "duration": 3.1},
+                    {"text": '"to want"?\nkutaka', "start": 5.6, "duration": 2.2},
+                ]
+            ),
+        ),
+    ],
+)
+def test_read_transcript(tmp_path, filename, content):
+    path = tmp_path / filename
+    path.write_text(content, encoding="utf-8")
+
+    transcript = read_transcript(path)
+
+    assert transcript.title == "Swahili Track 01"
+    assert transcript.transcript == TRANSCRIPT
+
+
+def test_read_json_transcript_with_title(tmp_path):
+    path = tmp_path / "lesson.json"
+    path.write_text(json.dumps({"title": "Swahili Track 02", "transcript": "kula"}))
+
+    assert read_transcript(path)[1:] == ("Swahili Track 02", "kula")
+
+
+def test_parse_cues_keeps_timestamps():
+    segments = list(local_transcript.parse_cues(SRT.splitlines()))
+
+    assert segments[0] == Segment("how would you say", 2.5, pytest.approx(3.1))
+    assert segments[-1].start == 5.6
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("01:02:03,456") == pytest.approx(3723.456)
+    assert parse_timestamp("02:03.500") == 123.5
+
+
+def test_iter_transcripts_of_a_directory(tmp_path):
+    (tmp_path / "Track 02.srt").write_text(SRT)
+    (tmp_path / "Track 01.vtt").write_text(VTT)
+    (tmp_path / "notes.md").write_text("ignored")
+
+    titles = [transcript.title for transcript in iter_transcripts(tmp_path)]
+
+    assert titles == ["Track 01", "Track 02"]
+
+
+@pytest.mark.parametrize(
+    "filename, content, message",
+    [
+        ("lesson.md", "text", "not a supported transcript file"),
+        ("lesson.vtt", "WEBVTT\n", "does not contain a transcript"),
+        ("lesson.json", '{"text": "kula"}', "must be a list of segments"),
+    ],
+)
+def test_invalid_transcript_files(tmp_path, filename, content, message):
+    path = tmp_path / filename
+    path.write_text(content)
+
+    with pytest.raises(ValueError, match=message):
+        list(iter_transcripts(path))
+
+
+def test_prompt_command_with_local_transcripts(tmp_path, monkeypatch):
+    transcripts = tmp_path / "transcripts"
+    transcripts.mkdir()
+    (transcripts / "Swahili Track 01.vtt").write_text(VTT)
+    (transcripts / "Swahili Track 02.srt").write_text(SRT)
+    monkeypatch.chdir(tmp_path)
+
+    result = runner.invoke(app, ["prompt", str(transcripts), "-l", "Swahili"])
+
+    assert result.exit_code == 0
+    prompt = (tmp_path / "swahili_track_01.txt").read_text(encoding="utf-8")
+    assert 'Video title: "Swahili Track 01"' in prompt
+    assert prompt.rstrip().endswith(TRANSCRIPT)
+    assert (tmp_path / "swahili_track_02.txt").exists()
+
+
+def test_prompt_command_with_an_empty_directory(tmp_path):
+    result = runner.invoke(app, ["prompt", str(tmp_path), "-l", "Swahili"])
+
+    assert result.exit_code == 2
+    assert "Invalid value for 'URL'" in result.output
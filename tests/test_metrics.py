@@ -0,0 +1,77 @@
+import json
+from types import SimpleNamespace
+
+from langchain_core.outputs import LLMResult
+
+from ltf.callbacks import TokenUsageHandler
+from ltf.metrics import Metrics
+
+
+def test_span_and_counters():
+    metrics = Metrics()
+    for _ in range(2):
+        with metrics.span("llm_call"):
+            pass
+    metrics.increment("flashcards", 12)
+    metrics.increment("excluded_flashcards", 0)
+
+    result = metrics.to_dict()
+
+    assert result["spans"]["llm_call"]["count"] == 2
+    assert (
+        result["spans"]["llm_call"]["total_s"] >= result["spans"]["llm_call"]["max_s"]
+    )
+    assert result["counters"] == {"flashcards": 12}
+
+
+def test_write_jsonl_appends_one_line_per_run(tmp_path):
+    metrics = Metrics()
+    metrics_file = tmp_path / "metrics.jsonl"
+
+    metrics.increment("input_tokens", 100)
+    metrics.write_jsonl(metrics_file, command="csv")
+    metrics.reset()
+    metrics.write_jsonl(metrics_file, command="batch")
+
+    records = [json.loads(line) for line in metrics_file.read_text().splitlines()]
+    assert [record["command"] for record in records] == ["csv", "batch"]
+    assert records[0]["counters"] == {"input_tokens": 100}
+    assert records[1]["counters"] == {}
+    assert "timestamp" in records[0]
+
+
+def test_summary_table_contains_all_rows():
+    metrics = Metrics()
+    with metrics.span("transcript_fetch"):
+        pass
+    metrics.increment("output_tokens", 5)
+
+    assert metrics.summary_table().row_count == 2
+
+
+def test_token_usage_handler():
+    metrics = Metrics()
+    handler = TokenUsageHandler(metrics)
+
+    handler.on_llm_end(
+        LLMResult(
+            generations=[],
+            llm_output={
+                "token_usage": {
+                    "prompt_tokens": 1000,
+                    "completion_tokens": 200,
+                    "prompt_tokens_details": {"cached_tokens": 768},
+                }
+            },
+        )
+    )
+    streamed = SimpleNamespace(
+        message=SimpleNamespace(usage_metadata={"input_tokens": 10, "output_tokens": 2})
+    )
+    handler.on_llm_end(SimpleNamespace(llm_output=None, generations=[[streamed]]))
+
+    assert metrics.counters == {
+        "input_tokens": 1010,
+        "cached_input_tokens": 768,
+        "output_tokens": 202,
+    }
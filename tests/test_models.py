@@ -1,6 +1,7 @@
 import pytest
 
 from ltf.models import (
+    CompactFlashcardSet,
     Flashcard,
     FlashcardSet,
     AvailableTargetLanguages,
@@ -32,3 +33,15 @@ def test_flashcard_set_creation():
 def test_invalid_target_language():
     with pytest.raises(ValueError):
         AvailableTargetLanguages("InvalidLanguage")
+
+
+def test_compact_flashcard_set_round_trip():
+    flashcard_set = FlashcardSet(
+        flashcards=[Flashcard(english="to sleep", target_language="kulala")]
+    )
+    compact = CompactFlashcardSet.from_flashcard_set(flashcard_set)
+
+    assert compact.json() == '{"cards": [["to sleep", "kulala"]]}'
+    assert compact.to_flashcard_set() == flashcard_set
+    # Generated pairs without exactly two texts are skipped
+    assert CompactFlashcardSet(cards=[["to eat"]]).to_flashcard_set().flashcards == []
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+from ltf.near_duplicates import (
+    NearDuplicateIndex,
+    banding,
+    jaccard,
+    normalize_text,
+    trigrams,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("I want to go.", "i want to go"),
+        ("  Café, please!  ", "cafe please"),
+        ("Where's   the_station?", "where s the station"),
+        ("?!", ""),
+    ],
+)
+def test_normalize_text(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_jaccard():
+    assert jaccard(trigrams("to go"), trigrams("to go")) == 1.0
+    assert jaccard(set(), trigrams("to go")) == 0.0
+    assert 0 < jaccard(trigrams("i want to go"), trigrams("i want to go now")) < 1
+
+
+@pytest.fixture
+def index():
+    near_duplicates = NearDuplicateIndex(threshold=0.7)
+    for text in ["i want to go", "we are eating now", "where is the station"]:
+        near_duplicates.add(text)
+    return near_duplicates
+
+
+def test_matches_finds_near_duplicates(index):
+    assert index.matches("i want to go") == [("i want to go", 1.0)]
+    [(english, similarity)] = index.matches("i want to go now")
+    assert english == "i want to go"
+    assert 0.7 <= similarity < 1
+
+
+def test_matches_ignores_different_texts(index):
+    assert index.matches("i want to eat") == []
+    assert index.matches("where are you") == []
+    assert index.matches("") == []
+
+
+def test_bucket_keys_are_stable():
+    keys = NearDuplicateIndex(threshold=0.8).bucket_keys("we are eating now")
+
+    # Persisted in the index, so the keys must not depend on the process
+    assert keys == [
+        3761322342,
+        970814578,
+        3575519478,
+        663849254,
+        2540616228,
+        162893404,
+        1920732347,
+        2180099495,
+        4183562176,
+        206421802,
+    ]
+    assert (
+        NearDuplicateIndex(threshold=0.8, seed=1).bucket_keys("we are eating now")
+        != keys
+    )
+
+
+@pytest.mark.parametrize(
+    "threshold, expected", [(0.3, (40, 1)), (0.5, (20, 2)), (0.8, (10, 4))]
+)
+def test_banding_depends_on_the_threshold(threshold, expected):
+    bands, rows = banding(threshold)
+
+    assert (bands, rows) == expected
+    assert len(NearDuplicateIndex(threshold).bucket_keys("we are eating now")) == bands
+    # Texts with exactly the threshold similarity are almost always compared
+    assert 1 - (1 - threshold**rows) ** bands >= 0.99
+
+
+def test_low_thresholds_find_near_duplicates():
+    rng = random.Random(0)
+    words = [f"word{number}" for number in range(50)]
+    pairs = []
+    for _ in range(200):
+        text = rng.choices(words, k=6)
+        similar = text[:3] + rng.choices(words, k=3)
+        pairs.append((" ".join(text), " ".join(similar)))
+
+    index = NearDuplicateIndex(threshold=0.5)
+    expected = found = 0
+    for text, similar in pairs:
+        index.add(text)
+    for text, similar in pairs:
+        if jaccard(trigrams(text), trigrams(similar)) >= 0.5:
+            expected += 1
+            found += text in dict(index.matches(similar))
+
+    assert expected and found / expected > 0.95
+
+
+def test_lookup_only_compares_candidates():
+    rng = random.Random(0)
+    words = [f"word{number}" for number in range(200)]
+    index = NearDuplicateIndex(threshold=0.8)
+    for _ in range(10_000):
+        index.add(" ".join(rng.choices(words, k=5)))
+    text = " ".join(rng.choices(words, k=5))
+
+    candidates = {
+        text_id
+        for key in index.bucket_keys(text)
+        for text_id in index._buckets.get(key, ())
+    }
+
+    assert len(candidates) < len(index) / 20
+    assert index.shares_bucket(index.bucket_keys(index._texts[0]))
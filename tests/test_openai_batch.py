@@ -0,0 +1,174 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from typer.testing import CliRunner
+
+from ltf.cli import app
+from ltf.openai_batch import OpenAIBatch, parse_results, unique_ids
+
+
+def tool_call_response(custom_id, flashcards):
+    arguments = json.dumps({"flashcards": flashcards})
+    message = {
+        "tool_calls": [{"function": {"name": "FlashcardSet", "arguments": arguments}}]
+    }
+    return {
+        "custom_id": custom_id,
+        "response": {"status_code": 200, "body": {"choices": [{"message": message}]}},
+        "error": None,
+    }
+
+
+class StubClient:
+    """Local stand-in for the OpenAI client, answering every request with a fixed flashcard"""
+
+    def __init__(self, statuses=("validating", "in_progress", "completed")):
+        self.statuses = list(statuses)
+        self.uploaded = None
+        self.errors = None
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(
+            create=self._create_batch, retrieve=self._retrieve
+        )
+
+    def _create_file(self, file, purpose):
+        assert purpose == "batch"
+        self.uploaded = [json.loads(line) for line in file.read().decode().splitlines()]
+        return SimpleNamespace(id="file-input")
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        assert input_file_id == "file-input"
+        return SimpleNamespace(id="batch-1")
+
+    def _retrieve(self, batch_id):
+        return SimpleNamespace(
+            id=batch_id,
+            status=self.statuses.pop(0),
+            request_counts=None,
+            output_file_id="file-output",
+            error_file_id=None,
+            errors=self.errors,
+        )
+
+    def _content(self, file_id):
+        lines = [
+            json.dumps(
+                tool_call_response(
+                    request["custom_id"],
+                    [{"english": "to sleep", "target_language": "kulala"}],
+                )
+            )
+            for request in self.uploaded
+        ]
+        return SimpleNamespace(text="\n".join(lines))
+
+
+def test_submit_wait_and_results(tmp_path):
+    client = StubClient()
+    openai_batch = OpenAIBatch(client, model_name="gpt-4o-mini", poll_interval=0)
+    requests_file = tmp_path / "requests.jsonl"
+
+    openai_batch.write_requests(
+        [("lesson_01", "prompt 1"), ("lesson_02", "prompt 2")], requests_file
+    )
+    batch_id = openai_batch.submit(requests_file)
+    results = openai_batch.results(openai_batch.wait(batch_id))
+
+    request = client.uploaded[0]
+    assert request["body"]["model"] == "gpt-4o-mini"
+    assert request["body"]["messages"] == [{"role": "user", "content": "prompt 1"}]
+    assert request["body"]["tool_choice"]["function"]["name"] == "FlashcardSet"
+    assert sorted(results) == ["lesson_01", "lesson_02"]
+    assert results["lesson_01"].flashcards[0].target_language == "kulala"
+
+
+def test_wait_failed_batch():
+    client = StubClient(statuses=["failed"])
+    client.errors = SimpleNamespace(
+        data=[SimpleNamespace(message="Line 1: invalid model.")]
+    )
+    openai_batch = OpenAIBatch(client, "gpt-4o", 0)
+    with pytest.raises(RuntimeError, match='"failed". Line 1: invalid model.'):
+        openai_batch.wait("batch-1")
+
+
+def test_expired_batch_keeps_finished_results():
+    client = StubClient(statuses=["in_progress", "expired"])
+    client.uploaded = [{"custom_id": "lesson_01"}]
+    openai_batch = OpenAIBatch(client, "gpt-4o", 0)
+
+    results = openai_batch.results(openai_batch.wait("batch-1"))
+
+    assert results["lesson_01"].flashcards[0].english == "to sleep"
+
+
+@pytest.mark.parametrize("status", ["failed", "cancelled"])
+def test_batch_api_command_with_unfinished_batch(status, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with patch("openai.OpenAI", return_value=StubClient(statuses=[status])):
+        result = CliRunner().invoke(
+            app,
+            [
+                "batch-api",
+                "-l",
+                "Swahili",
+                "-k",
+                "sk-test",
+                "--batch-id",
+                "batch-1",
+                "--poll-interval",
+                "1",
+            ],
+        )
+
+    assert result.exit_code == 1
+    assert result.exception is None or isinstance(result.exception, SystemExit)
+    output = " ".join(result.output.split())
+    assert f'Batch batch-1 finished with status "{status}".' in output
+    assert "--batch-id batch-1" in output
+
+
+def test_batch_api_command_saves_the_results_of_an_expired_batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client = StubClient(statuses=["expired"])
+    client.uploaded = [{"custom_id": "Swahili Track 01"}]
+    with patch("openai.OpenAI", return_value=client):
+        result = CliRunner().invoke(
+            app,
+            ["batch-api", "-l", "Swahili", "-k", "sk-test", "--batch-id", "batch-1"],
+        )
+
+    assert result.exit_code == 0
+    assert "expired" in result.output
+    assert (tmp_path / "Swahili Track 01.csv").exists()
+
+
+def test_parse_results_with_errors():
+    lines = [
+        json.dumps(
+            tool_call_response("ok", [{"english": "to eat", "target_language": "kula"}])
+        ),
+        json.dumps(
+            {
+                "custom_id": "rate_limited",
+                "response": {
+                    "status_code": 429,
+                    "body": {"error": {"message": "Rate limit reached"}},
+                },
+                "error": None,
+            }
+        ),
+        json.dumps(tool_call_response("invalid", [{"english": "to eat"}])),
+    ]
+
+    results = parse_results(lines)
+
+    assert results["ok"].flashcards[0].english == "to eat"
+    assert results["rate_limited"] == "Rate limit reached"
+    assert results["invalid"].startswith("Invalid response")
+
+
+def test_unique_ids():
+    assert unique_ids(["lesson", "other", "lesson"]) == ["lesson", "other", "lesson_2"]
@@ -0,0 +1,179 @@
+import httpx
+import pytest
+from openai import APITimeoutError, InternalServerError, NotFoundError, RateLimitError
+
+from ltf.rate_limit import (
+    RateLimiter,
+    TokenBucket,
+    estimate_tokens,
+    parse_retry_after,
+    shared_rate_limiter,
+)
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+class FakeClock:
+    """Clock advanced by the fake sleep, so waiting takes no real time"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def api_error(error_class, status_code, headers=None, body=None):
+    response = httpx.Response(status_code, headers=headers, request=REQUEST)
+    return error_class("error", response=response, body=body)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def limiter(clock, **kwargs):
+    return RateLimiter(sleep=clock.sleep, clock=clock, jitter=lambda: 0.5, **kwargs)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("a" * 400, expected_output_tokens=100) == 200
+
+
+def test_token_bucket_spreads_reservations_over_the_minute(clock):
+    bucket = TokenBucket(60, clock=clock)
+
+    # Starts with 10 seconds of burst, afterwards one token per second
+    assert [bucket.reserve(1) for _ in range(12)] == [0] * 10 + [1, 2]
+    clock.now = 2
+    assert bucket.reserve(1) == pytest.approx(1)
+
+
+def test_unlimited_token_bucket_never_waits(clock):
+    bucket = TokenBucket(None, clock=clock)
+    assert bucket.reserve(10**9) == 0
+
+
+def test_throughput_settles_at_the_limits(clock):
+    rate_limiter = limiter(clock, requests_per_minute=600, tokens_per_minute=60_000)
+
+    for _ in range(1000):
+        rate_limiter.call(lambda: None, tokens=600)
+
+    # 100 requests per minute are admitted by the TPM limit, after the initial burst of 10 seconds
+    assert clock.now == pytest.approx((1000 - 1000 / 6 / 10) * 0.6, rel=0.01)
+
+
+def test_retries_rate_limit_with_retry_after(clock):
+    rate_limiter = limiter(clock)
+    responses = iter(
+        [api_error(RateLimitError, 429, headers={"retry-after": "7"}), "flashcards"]
+    )
+
+    def function():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert rate_limiter.call(function, tokens=100) == "flashcards"
+    assert clock.sleeps == [7.5]
+
+
+def test_rate_limit_headers_replace_unknown_limits(clock):
+    rate_limiter = limiter(clock)
+    headers = {"x-ratelimit-limit-requests": "500", "x-ratelimit-limit-tokens": "30000"}
+    attempts = iter([api_error(RateLimitError, 429, headers=headers)])
+
+    def function():
+        error = next(attempts, None)
+        if error:
+            raise error
+        return "flashcards"
+
+    assert rate_limiter.call(function, tokens=100) == "flashcards"
+    assert rate_limiter.requests.per_minute == pytest.approx(475)
+    assert rate_limiter.tokens.per_minute == pytest.approx(28500)
+
+
+def test_server_errors_are_retried_with_exponential_backoff(clock):
+    rate_limiter = limiter(clock, max_retries=3, base_delay=1)
+    attempts = []
+
+    def function():
+        attempts.append(1)
+        raise api_error(InternalServerError, 503)
+
+    with pytest.raises(InternalServerError):
+        rate_limiter.call(function, tokens=100)
+
+    assert len(attempts) == 4
+    assert clock.sleeps == [0.75, 1.5, 3.0]
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        api_error(NotFoundError, 404),
+        api_error(RateLimitError, 429, body={"code": "insufficient_quota"}),
+    ],
+)
+def test_permanent_errors_are_not_retried(clock, error):
+    attempts = []
+
+    def function():
+        attempts.append(1)
+        raise error
+
+    with pytest.raises(type(error)):
+        limiter(clock).call(function, tokens=100)
+    assert len(attempts) == 1
+
+
+def test_timeouts_are_retried(clock):
+    attempts = iter([APITimeoutError(request=REQUEST)])
+
+    def function():
+        error = next(attempts, None)
+        if error:
+            raise error
+        return "flashcards"
+
+    assert limiter(clock).call(function, tokens=100) == "flashcards"
+
+
+def test_stream_is_only_retried_before_the_first_item(clock):
+    rate_limiter = limiter(clock)
+    attempts = []
+
+    def failing_stream():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise api_error(RateLimitError, 429)
+        yield "first"
+        raise api_error(InternalServerError, 500)
+
+    stream = rate_limiter.stream(failing_stream, tokens=100)
+    assert next(stream) == "first"
+    with pytest.raises(InternalServerError):
+        next(stream)
+    assert len(attempts) == 2
+
+
+def test_parse_retry_after():
+    assert parse_retry_after({"retry-after-ms": "1500", "retry-after": "2"}) == 1.5
+    assert parse_retry_after({"retry-after": "2"}) == 2
+    assert parse_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+    assert parse_retry_after({"retry-after": "soon"}) is None
+    assert parse_retry_after({}) is None
+
+
+def test_shared_rate_limiter_is_reused():
+    assert shared_rate_limiter(500, 30000, 6) is shared_rate_limiter(500, 30000, 6)
+    assert shared_rate_limiter(500, 30000, 6) is not shared_rate_limiter(None, None, 6)
@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ltf.server import FlashcardServer, JobQueue, flashcards_as_csv
+
+
+def process_job(job):
+    if "fail" in job.url:
+        raise IndexError("Video does not have a transcript.")
+    return f"{job.target_language} Track 01", [
+        ("to want", "kutaka"),
+        ("I want, to go", "Nataka kwenda"),
+    ]
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(process=process_job, workers=2, max_queued=10):
+        jobs = JobQueue(process, workers=workers, max_queued=max_queued)
+        server = FlashcardServer(
+            ("127.0.0.1", 0),
+            jobs,
+            target_language="Swahili",
+            target_languages=["Swahili", "Greek"],
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append((server, jobs))
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server, jobs in servers:
+        server.shutdown()
+        server.server_close()
+        jobs.shutdown()
+
+
+def request(url, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=5) as response:
+            return response.status, response.headers, response.read().decode("utf-8")
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read().decode("utf-8")
+
+
+def wait_for(base_url, job_id):
+    for _ in range(500):
+        status, _, body = request(f"{base_url}/jobs/{job_id}")
+        job = json.loads(body)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise TimeoutError(job_id)
+
+
+def test_job_lifecycle(start_server):
+    base_url = start_server()
+
+    status, headers, body = request(
+        f"{base_url}/jobs", {"url": "https://www.youtube.com/watch?v=VIDEO_ID"}
+    )
+    assert status == 202
+    job = json.loads(body)
+    assert headers["Location"] == f"/jobs/{job['id']}"
+    assert job["target_language"] == "Swahili"
+
+    job = wait_for(base_url, job["id"])
+    assert job["status"] == "done"
+    assert job["title"] == "Swahili Track 01"
+    assert job["flashcards"][0] == {"english": "to want", "target_language": "kutaka"}
+
+    status, headers, body = request(f"{base_url}/jobs/{job['id']}/flashcards.csv")
+    assert status == 200
+    assert headers["Content-Type"] == "text/csv; charset=utf-8"
+    assert body == 'to want,kutaka\r\n"I want, to go",Nataka kwenda\r\n'
+
+    status, _, body = request(
+        f"{base_url}/jobs/{job['id']}/flashcards.csv?delimiter=%3B"
+    )
+    assert body.splitlines()[1] == "I want, to go;Nataka kwenda"
+
+    status, _, body = request(f"{base_url}/jobs/{job['id']}/flashcards.json")
+    assert len(json.loads(body)) == 2
+
+
+def test_failed_job(start_server):
+    base_url = start_server()
+
+    _, _, body = request(
+        f"{base_url}/jobs",
+        {"url": "https://www.youtube.com/watch?v=fail", "target_language": "Greek"},
+    )
+    job = wait_for(base_url, json.loads(body)["id"])
+
+    assert job["status"] == "failed"
+    assert job["error"] == "Video does not have a transcript."
+    status, _, _ = request(f"{base_url}/jobs/{job['id']}/flashcards.csv")
+    assert status == 409
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        ({}, "url"),
+        (
+            {
+                "url": "https://www.youtube.com/watch?v=VIDEO_ID",
+                "target_language": "Klingon",
+            },
+            "Klingon",
+        ),
+    ],
+)
+def test_invalid_jobs_are_rejected(start_server, body, message):
+    base_url = start_server()
+
+    status, _, response = request(f"{base_url}/jobs", body)
+
+    assert status == 400
+    assert message in json.loads(response)["error"]
+
+
+def test_unknown_job(start_server):
+    base_url = start_server()
+
+    assert request(f"{base_url}/jobs/unknown")[0] == 404
+    assert request(f"{base_url}/unknown")[0] == 404
+
+
+def test_full_queue_rejects_jobs(start_server):
+    release = threading.Event()
+
+    def blocking_process(job):
+        release.wait(5)
+        return process_job(job)
+
+    base_url = start_server(blocking_process, workers=1, max_queued=1)
+    body = {"url": "https://www.youtube.com/watch?v=VIDEO_ID"}
+
+    running = json.loads(request(f"{base_url}/jobs", body)[2])
+    while (
+        json.loads(request(f"{base_url}/jobs/{running['id']}")[2])["status"]
+        != "running"
+    ):
+        time.sleep(0.01)
+    waiting_status = request(f"{base_url}/jobs", body)[0]
+    status, headers, _ = request(f"{base_url}/jobs", body)
+    release.set()
+
+    # One job is running, one is waiting, all further jobs are rejected
+    assert waiting_status == 202
+    assert status == 503
+    assert headers["Retry-After"] == "30"
+
+    _, _, health = request(f"{base_url}/health")
+    assert json.loads(health)["workers"] == 1
+
+
+def test_flashcards_as_csv():
+    assert flashcards_as_csv([("to eat", "kula")], delimiter=";") == "to eat;kula\r\n"
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from ltf.models import Flashcard
+from ltf.streaming import FlashcardWriter, iter_completed_flashcards
+
+
+def test_iter_completed_flashcards_yields_each_card_once_it_is_complete():
+    partial_outputs = [
+        {},
+        {"flashcards": [{"english": "to sl"}]},
+        {"flashcards": [{"english": "to sleep", "target_language": "kula"}]},
+        {"flashcards": [{"english": "to sleep", "target_language": "kulala"}, {}]},
+        {
+            "flashcards": [
+                {"english": "to sleep", "target_language": "kulala"},
+                {"english": "to eat", "target_language": "kula"},
+            ]
+        },
+    ]
+    flashcards = iter_completed_flashcards(iter(partial_outputs))
+
+    # The first card is complete as soon as the second one is started
+    assert next(flashcards) == {"english": "to sleep", "target_language": "kulala"}
+    assert list(flashcards) == [{"english": "to eat", "target_language": "kula"}]
+
+
+def test_iter_completed_flashcards_skips_incomplete_cards():
+    partial_outputs = [{"flashcards": [{"english": "to sleep"}]}]
+    assert list(iter_completed_flashcards(partial_outputs)) == []
+
+
+def test_iter_completed_flashcards_of_compact_pairs():
+    partial_outputs = [
+        {"cards": [["to sleep"]]},
+        {"cards": [["to sleep", "kulala"], []]},
+        {"cards": [["to sleep", "kulala"], ["to eat", "kula"]]},
+    ]
+
+    assert list(iter_completed_flashcards(partial_outputs, compact=True)) == [
+        {"english": "to sleep", "target_language": "kulala"},
+        {"english": "to eat", "target_language": "kula"},
+    ]
+
+
+@pytest.fixture
+def flashcards():
+    return [
+        Flashcard(english="to sleep", target_language="kulala"),
+        Flashcard(english="To eat", target_language="kula"),
+    ]
+
+
+def test_flashcard_writer_csv_with_exclusion(tmp_path, flashcards):
+    output = tmp_path / "lesson.csv"
+
+    with FlashcardWriter(
+        str(output), delimiter=";", excluded_keys={"to eat"}
+    ) as writer:
+        writer.write_all(flashcards)
+
+    assert output.read_text(encoding="utf-8").splitlines() == ["to sleep;kulala"]
+    assert (writer.written, writer.excluded) == (1, 1)
+
+
+def test_flashcard_writer_drops_near_duplicates(tmp_path, flashcards):
+    output = tmp_path / "lesson.csv"
+
+    with FlashcardWriter(
+        str(output), near_duplicates={"to sleep": ("to sleep well", 0.8)}
+    ) as writer:
+        writer.write_all(flashcards)
+
+    assert output.read_text(encoding="utf-8").splitlines() == ["To eat,kula"]
+    assert writer.dropped == [("to sleep", "to sleep well", 0.8)]
+    assert writer.written == 1
+
+
+def test_flashcard_writer_jsonl_to_stdout(capsys, flashcards):
+    with FlashcardWriter("-", output_format="jsonl", flush=True) as writer:
+        for flashcard in flashcards:
+            writer.write(flashcard.english, flashcard.target_language)
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"english": "to sleep", "target_language": "kulala"},
+        {"english": "To eat", "target_language": "kula"},
+    ]
+
+
+def test_flashcard_writer_invalid_format(tmp_path):
+    with pytest.raises(ValueError):
+        FlashcardWriter(str(tmp_path / "lesson.xml"), output_format="xml")
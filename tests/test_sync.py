@@ -0,0 +1,108 @@
+from dataclasses import replace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from typer.testing import CliRunner
+
+from ltf import sync
+from ltf.cli import app
+from ltf.sync import LessonInputs, SyncManifest
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    output = tmp_path / "swahili_track_02.csv"
+    output.write_text("to sleep,kulala\n")
+    return LessonInputs(
+        transcript_hash=sync.content_hash("to sleep is kulala"),
+        model="gpt-4o",
+        prompt_hash=sync.content_hash("template"),
+        output=str(output),
+    )
+
+
+def test_manifest_round_trip(tmp_path, inputs):
+    manifest = SyncManifest(tmp_path / "manifest.json")
+    manifest.record("VIDEO_ID", inputs)
+    manifest.save()
+
+    reloaded = SyncManifest(tmp_path / "manifest.json")
+    assert len(reloaded) == 1
+    assert reloaded.get("VIDEO_ID") == inputs
+    assert reloaded.get("OTHER_ID") is None
+
+
+def test_lesson_is_only_current_with_same_inputs_and_existing_output(tmp_path, inputs):
+    manifest = SyncManifest(tmp_path / "manifest.json")
+    assert not manifest.is_current("VIDEO_ID", inputs)
+
+    manifest.record("VIDEO_ID", inputs)
+    assert manifest.is_current("VIDEO_ID", inputs)
+    assert not manifest.is_current("VIDEO_ID", replace(inputs, model="gpt-4o-mini"))
+    assert not manifest.is_current("VIDEO_ID", replace(inputs, prompt_hash="changed"))
+
+    (tmp_path / "swahili_track_02.csv").unlink()
+    assert not manifest.is_current("VIDEO_ID", inputs)
+
+
+@pytest.mark.parametrize("content", ["not json", '{"version": 0, "lessons": {}}'])
+def test_unreadable_manifest_starts_empty(tmp_path, content):
+    path = tmp_path / "manifest.json"
+    path.write_text(content)
+
+    assert len(SyncManifest(path)) == 0
+
+
+def test_video_id():
+    assert sync.video_id("https://www.youtube.com/watch?v=jIhkYHycv4M") == "jIhkYHycv4M"
+    with pytest.raises(ValueError, match="valid YouTube URL"):
+        sync.video_id("https://example.com")
+
+
+def test_sync_command_only_processes_new_and_changed_lessons(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "urls.txt").write_text(
+        "https://www.youtube.com/watch?v=LESSON_0001\n"
+        "https://www.youtube.com/watch?v=LESSON_0002\n"
+    )
+    transcripts = {"LESSON_0001": "to sleep is kulala", "LESSON_0002": "to eat is kula"}
+    processed = []
+
+    def lesson(url, target_language, use_cache):
+        lesson_id = url[-11:]
+        flashcard_extraction = MagicMock(
+            transcript=transcripts[lesson_id], filename=lesson_id.lower()
+        )
+
+        def create_csv(**kwargs):
+            processed.append(lesson_id)
+            (tmp_path / f"{lesson_id.lower()}.csv").write_text("")
+            return f"{lesson_id.lower()}.csv"
+
+        flashcard_extraction.create_csv.side_effect = create_csv
+        return flashcard_extraction
+
+    def invoke_sync():
+        with patch("ltf.LanguageTransferFlashcards", side_effect=lesson), patch(
+            "ltf.cli.cli.utils.initialize_llm"
+        ) as initialize_llm:
+            initialize_llm.return_value.model_name = "gpt-4o"
+            return runner.invoke(
+                app,
+                ["sync", "urls.txt", "-l", "Swahili", "-k", "test", "--no-llm-cache"],
+            )
+
+    assert invoke_sync().exit_code == 0
+    assert sorted(processed) == ["LESSON_0001", "LESSON_0002"]
+
+    processed.clear()
+    result = invoke_sync()
+    assert result.exit_code == 0
+    assert processed == []
+    assert "2 unchanged lessons skipped" in result.output
+
+    transcripts["LESSON_0002"] = "to eat is kula, food is chakula"
+    assert invoke_sync().exit_code == 0
+    assert processed == ["LESSON_0002"]
@@ -0,0 +1,44 @@
+from ltf.transcript_pipeline import (
+    Segment,
+    clean_segments,
+    collapse_whitespace,
+    join_segments,
+)
+
+
+def test_clean_segments():
+    segments = [
+        Segment("Hello\xa0world\n", 0.0, 1.0),
+        Segment("[Music]", 1.0, 3.0),
+        Segment("  This is  a test", 4.0, 2.0),
+    ]
+
+    cleaned = list(clean_segments(segments))
+
+    assert cleaned == [
+        Segment("Hello world", 0.0, 1.0),
+        Segment("This is a test", 4.0, 2.0),
+    ]
+    assert cleaned[1].end == 6.0
+
+
+def test_clean_segments_is_lazy():
+    def segments():
+        yield Segment("first", 0.0, 1.0)
+        raise AssertionError("Only the first segment should be consumed")
+
+    assert next(clean_segments(segments())).text == "first"
+
+
+def test_clean_segments_custom_stages():
+    segments = [Segment("[Music]  text", 0.0, 1.0)]
+
+    cleaned = list(clean_segments(segments, stages=[collapse_whitespace]))
+
+    assert cleaned == [Segment("[Music] text", 0.0, 1.0)]
+
+
+def test_join_segments():
+    segments = [Segment("Hello world", 0.0, 1.0), Segment("again", 1.0, 1.0)]
+
+    assert join_segments(clean_segments(segments)) == "Hello world again"
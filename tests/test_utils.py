@@ -1,4 +1,5 @@
 import csv
+from unittest.mock import patch
 
 import pytest
 
@@ -94,3 +95,28 @@ def test_save_flashcards_as_csv(tmp_path):
     for i, row in enumerate(rows):
         assert row[0] == flashcards[i].english
         assert row[1] == flashcards[i].target_language
+
+
+def test_save_flashcards_as_csv_drops_near_duplicates(tmp_path, capsys):
+    exclude_dir = tmp_path / "decks"
+    exclude_dir.mkdir()
+    (exclude_dir / "lesson_01.csv").write_text("I want to go,nataka kwenda\n")
+    test_file = tmp_path / "test_flashcards.csv"
+    flashcard_set = FlashcardSet(
+        flashcards=[
+            Flashcard(english="I want to go!", target_language="nataka kwenda"),
+            Flashcard(english="thank you", target_language="asante"),
+        ]
+    )
+
+    with patch.object(utils, "exclusion_index", return_value=None):
+        utils.save_flashcards_as_csv(
+            flashcard_set,
+            str(test_file),
+            delimiter=",",
+            exclude=str(exclude_dir),
+            similarity_threshold=0.8,
+        )
+
+    assert test_file.read_text(encoding="utf-8").splitlines() == ["thank you,asante"]
+    assert "Dropped 1 near-duplicate flashcard(s)" in capsys.readouterr().out
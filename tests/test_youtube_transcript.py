@@ -1,8 +1,13 @@
-from unittest.mock import patch, MagicMock
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
+from youtube_transcript_api import TranscriptsDisabled
 
 from ltf import YoutubeTranscript
+from ltf.cache import DiskCache
+from ltf.transcript_pipeline import Segment
+from ltf.youtube_fetch import HttpResponse, extract_video_id
 
 
 @pytest.fixture
@@ -10,42 +15,249 @@ def youtube_transcript():
     return YoutubeTranscript()
 
 
+RAW_SEGMENTS = [
+    {"text": "[Music]", "start": 0.0, "duration": 2.5},
+    {"text": "Hello\xa0world\nagain", "start": 2.5, "duration": 1.5},
+    {"text": "Test Content", "start": 4.0, "duration": 1.0},
+]
+
+
 @pytest.fixture
-def mock_loader():
-    with patch("ltf.youtube_transcript.YoutubeLoader") as mock:
+def mock_api():
+    with patch("ltf.youtube_transcript.YouTubeTranscriptApi") as mock:
+        mock.get_transcript.return_value = RAW_SEGMENTS
         yield mock
 
 
-def test_download_from_url_success(youtube_transcript, mock_loader):
-    mock_document = MagicMock()
-    mock_document.metadata = {"title": "Test Title"}
-    mock_document.page_content = "Test Content"
-    mock_loader.from_youtube_url.return_value.load.return_value = [mock_document]
+@pytest.fixture
+def mock_pytube():
+    with patch("pytube.YouTube") as mock:
+        mock.return_value.title = "Test\xa0Title"
+        yield mock
+
 
+def test_download_from_url_success(youtube_transcript, mock_api, mock_pytube):
     title, transcript = youtube_transcript.download_from_url(
-        "https://www.youtube.com/watch?v=VIDEO_ID"
+        "https://www.youtube.com/watch?v=VIDEO_ID_11"
     )
 
     assert title == "Test Title"
-    assert transcript == "Test Content"
-    mock_loader.from_youtube_url.assert_called_once()
-
+    assert transcript == "Hello world again Test Content"
+    mock_api.get_transcript.assert_called_once_with("VIDEO_ID_11", languages=["en"])
+    mock_pytube.assert_called_once_with("https://www.youtube.com/watch?v=VIDEO_ID_11")
 
-def test_download_from_url_invalid_url(youtube_transcript, mock_loader):
-    mock_loader.from_youtube_url.side_effect = ValueError
 
+def test_download_from_url_invalid_url(youtube_transcript, mock_api):
     with pytest.raises(ValueError, match="Please provide a valid YouTube URL"):
         youtube_transcript.download_from_url("invalid_url")
 
+    mock_api.get_transcript.assert_not_called()
 
-def test_download_from_url_no_transcript(youtube_transcript, mock_loader):
-    mock_loader.from_youtube_url.return_value.load.side_effect = IndexError
+
+def test_download_from_url_no_transcript(youtube_transcript, mock_api):
+    mock_api.get_transcript.side_effect = TranscriptsDisabled("VIDEO_ID_11")
 
     with pytest.raises(IndexError, match="Video does not have a transcript"):
-        youtube_transcript.download_from_url("https://www.youtube.com/watch?v=VIDEO_ID")
+        youtube_transcript.download_from_url(
+            "https://www.youtube.com/watch?v=VIDEO_ID_11"
+        )
 
 
 def test_clean_text():
     text = "Hello\xa0world\n[Music] This is a test"
     cleaned_text = YoutubeTranscript._clean_text(text)
     assert cleaned_text == "Hello world This is a test"
+
+
+def test_download_from_url_uses_cache(tmp_path, mock_api, mock_pytube):
+    youtube_transcript = YoutubeTranscript(
+        cache=DiskCache(tmp_path, max_size_bytes=1024 * 1024)
+    )
+
+    first = youtube_transcript.download_from_url(
+        "https://www.youtube.com/watch?v=VIDEO_ID_11"
+    )
+    second = youtube_transcript.download_from_url("https://youtu.be/VIDEO_ID_11")
+
+    assert first == second == ("Test Title", "Hello world again Test Content")
+    mock_api.get_transcript.assert_called_once()
+
+
+def test_download_segments_keeps_timestamps(mock_api):
+    segments = list(
+        YoutubeTranscript.download_segments(
+            "https://www.youtube.com/watch?v=VIDEO_ID_11"
+        )
+    )
+
+    assert segments == [
+        Segment("Hello world again", 2.5, 1.5),
+        Segment("Test Content", 4.0, 1.0),
+    ]
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "youtube"
+VIDEO_URL = "https://www.youtube.com/watch?v=jIhkYHycv4M"
+
+
+class RecordedBackend:
+    """Replays recorded YouTube responses, keyed by the beginning of the request URL"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append((url, headers))
+        for prefix, (status_code, fixture) in self.responses.items():
+            if url.startswith(prefix):
+                return HttpResponse(status_code, (FIXTURES / fixture).read_text())
+        raise AssertionError(f"Unexpected request: {url}")
+
+
+RECORDED_RESPONSES = {
+    "https://www.youtube.com/watch": (200, "watch_page.html"),
+    "https://www.youtube.com/api/timedtext": (200, "transcript.xml"),
+    "https://www.youtube.com/oembed": (200, "oembed.json"),
+}
+
+
+def test_fast_download_from_url():
+    backend = RecordedBackend(RECORDED_RESPONSES)
+
+    title, transcript = YoutubeTranscript(http_backend=backend).download_from_url(
+        VIDEO_URL
+    )
+
+    assert title == "Swahili - Track 01 - Language Transfer"
+    assert transcript == 'how would you say "to want"? kutaka nataka kutoka'
+    # The manually created English transcript is preferred over the generated one
+    assert (
+        "https://www.youtube.com/api/timedtext?v=jIhkYHycv4M&lang=en",
+        None,
+    ) in backend.requests
+    assert len(backend.requests) == 3
+
+
+def test_fast_download_without_title(tmp_path, mock_pytube):
+    cache = DiskCache(tmp_path, max_size_bytes=1024 * 1024)
+    responses = {
+        **RECORDED_RESPONSES,
+        "https://www.youtube.com/oembed": (404, "oembed.json"),
+    }
+
+    failed_lookup = YoutubeTranscript(
+        cache=cache, http_backend=RecordedBackend(responses)
+    )
+    skipped_lookup = YoutubeTranscript(
+        http_backend=RecordedBackend(RECORDED_RESPONSES), fetch_title=False
+    )
+
+    # A failed oEmbed lookup falls back to pytube, so the title and file name do not change
+    assert failed_lookup.download_from_url(VIDEO_URL)[0] == "Test Title"
+    assert cache.get("jIhkYHycv4M")["title"] == "Test Title"
+    assert skipped_lookup.download_from_url(VIDEO_URL)[0] == "jIhkYHycv4M"
+    assert len(skipped_lookup.http_backend.requests) == 2
+    mock_pytube.assert_called_once()
+
+
+def test_transcript_without_title_is_cached(tmp_path):
+    cache = DiskCache(tmp_path, max_size_bytes=1024 * 1024)
+    backend = RecordedBackend(RECORDED_RESPONSES)
+    youtube_transcript = YoutubeTranscript(
+        cache=cache, http_backend=backend, fetch_title=False
+    )
+
+    first = youtube_transcript.download_from_url(VIDEO_URL)
+    requests = len(backend.requests)
+    second = youtube_transcript.download_from_url(VIDEO_URL)
+
+    assert first == second == ("jIhkYHycv4M", first[1])
+    assert len(backend.requests) == requests
+    assert cache.get("jIhkYHycv4M")["title"] is None
+
+    # A later run with the title lookup only downloads the title
+    title_backend = RecordedBackend(RECORDED_RESPONSES)
+    title, transcript = YoutubeTranscript(
+        cache=cache, http_backend=title_backend
+    ).download_from_url(VIDEO_URL)
+
+    assert (title, transcript) == ("Swahili - Track 01 - Language Transfer", first[1])
+    assert [url for url, _ in title_backend.requests] == [
+        "https://www.youtube.com/oembed?format=json&url=https%3A%2F%2Fwww.youtube.com%2Fwatch%3Fv%3DjIhkYHycv4M"
+    ]
+    assert cache.get("jIhkYHycv4M")["title"] == title
+
+
+def test_fast_download_accepts_cookie_consent():
+    backend = RecordedBackend(RECORDED_RESPONSES)
+    pages = iter(["consent_page.html", "watch_page.html"])
+    get = backend.get
+
+    def get_with_consent(url, headers=None):
+        if url.startswith("https://www.youtube.com/watch"):
+            backend.requests.append((url, dict(headers)))
+            return HttpResponse(200, (FIXTURES / next(pages)).read_text())
+        return get(url, headers)
+
+    backend.get = get_with_consent
+    YoutubeTranscript(http_backend=backend).download_from_url(VIDEO_URL)
+
+    watch_requests = [headers for url, headers in backend.requests if "/watch" in url]
+    assert "Cookie" not in watch_requests[0]
+    assert watch_requests[1]["Cookie"] == "CONSENT=YES+cb.20240101-00-p0.en+FX+123"
+
+
+@pytest.mark.parametrize(
+    "responses, reason",
+    [
+        (
+            {
+                "https://www.youtube.com/watch": (
+                    200,
+                    "watch_page_without_captions.html",
+                )
+            },
+            "Video does not have a transcript",
+        ),
+        (
+            {"https://www.youtube.com/watch": (429, "watch_page.html")},
+            "status 429",
+        ),
+    ],
+)
+def test_fast_download_errors_fall_back_to_the_library(
+    responses, reason, mock_api, mock_pytube, capsys
+):
+    backend = RecordedBackend(
+        {**responses, "https://www.youtube.com/oembed": (200, "oembed.json")}
+    )
+
+    title, transcript = YoutubeTranscript(http_backend=backend).download_from_url(
+        VIDEO_URL
+    )
+
+    assert (title, transcript) == ("Test Title", "Hello world again Test Content")
+    # rich wraps long lines
+    warning = " ".join(capsys.readouterr().err.split())
+    assert "Direct transcript download failed" in warning
+    assert reason in warning
+    mock_api.get_transcript.assert_called_once_with("jIhkYHycv4M", languages=["en"])
+
+    mock_api.get_transcript.side_effect = TranscriptsDisabled("jIhkYHycv4M")
+    with pytest.raises(IndexError, match="Video does not have a transcript"):
+        YoutubeTranscript(http_backend=backend).download_from_url(VIDEO_URL)
+
+
+@pytest.mark.parametrize(
+    "url, video_id",
+    [
+        (VIDEO_URL, "jIhkYHycv4M"),
+        ("https://youtu.be/jIhkYHycv4M", "jIhkYHycv4M"),
+        ("https://www.youtube.com/embed/jIhkYHycv4M", "jIhkYHycv4M"),
+        ("https://example.com/watch?v=jIhkYHycv4M", None),
+        ("https://www.youtube.com/watch?v=short", None),
+    ],
+)
+def test_extract_video_id(url, video_id):
+    assert extract_video_id(url) == video_id